@@ -0,0 +1,238 @@
+"""
+Normalized tables backfill.
+Copies lead_magnet_candidates into the companies and persons tables created by
+supabase/migrations/20261017140000_create_companies_and_persons.sql, so
+SUPABASE_NORMALIZED_TABLES can be switched on without losing stored scrape
+and AI results.
+
+- Companies: one row per company_key (the stored key, or the Prospeo company
+  ID / normalized domain). When lead_magnet_candidates has several rows for a
+  company, the newest row with a wholesale check result wins, else the newest.
+- Persons: every person row, with company_key pointing at its company and the
+  person JSON without the embedded company. Companies that only appear on
+  person rows get a company row built from the person row's company columns.
+
+Rows keep their lead_magnet_candidates IDs and are upserted, so the script can
+be re-run (e.g. after more runs wrote to the old table). Companies already in
+the companies table are never overwritten. lead_magnet_candidates is only read.
+
+Usage:
+    python backfill_normalized_tables.py --dry-run
+    python backfill_normalized_tables.py
+    python backfill_normalized_tables.py --batch-size 200
+"""
+import argparse
+import logging
+import sys
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import config
+from layer5_output import OutputManager
+from utils import build_company_key
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SOURCE_TABLE = "lead_magnet_candidates"
+
+# Columns shared by lead_magnet_candidates company rows and the companies table
+COMPANY_COLUMNS = (
+    "id", "created_at", "company_key", "company_id", "company_name", "company_description",
+    "company_domain", "company_website", "company_industry", "company_size", "company_location",
+    "is_qualified", "qualified_at", "qualification_criteria", "search_criteria",
+    "slack_user_id", "slack_channel_id", "slack_trigger_id",
+    "wholesale_partner_check", "wholesale_partner_response", "keyword_match_check", "keyword_match_response",
+    "product_categories", "market_segments",
+    "company_scraped_content", "scraped_content_date", "scraped_etag", "scraped_last_modified", "last_scraped_at",
+    "raw_prospeo_data",
+)
+# Columns shared by lead_magnet_candidates person rows and the persons table
+PERSON_COLUMNS = (
+    "id", "created_at", "person_id", "person_name", "person_email", "person_title", "person_linkedin_url",
+    "is_qualified", "qualified_at", "qualification_criteria", "search_criteria",
+    "prospeo_page_number", "processing_order",
+    "slack_user_id", "slack_channel_id", "slack_trigger_id",
+    "raw_prospeo_data", "openrouter_response",
+)
+# Company columns repeated on person rows (used for companies only seen on person rows)
+PERSON_COMPANY_COLUMNS = (
+    "company_id", "company_name", "company_description", "company_domain", "company_website",
+    "company_industry", "company_size", "company_location",
+)
+# Enough to pick the row that represents each company
+COMPANY_RANK_COLUMNS = "id, created_at, company_key, company_id, company_domain, company_website, wholesale_partner_check"
+
+
+def row_company_key(row: Dict) -> Optional[str]:
+    """The row's stored company_key, or the key the app would build for it."""
+    return row.get("company_key") or build_company_key(
+        row.get("company_id"), row.get("company_domain") or row.get("company_website")
+    )
+
+
+def iter_source_rows(output_manager: OutputManager, columns: str, persons: bool) -> Iterator[Dict]:
+    """Yield company-only (persons=False) or person rows of lead_magnet_candidates, keyset-paginated on id."""
+    last_id = None
+    while True:
+        query = output_manager.supabase.table(SOURCE_TABLE).select(columns)
+        query = query.not_.is_("person_id", "null") if persons else query.is_("person_id", "null")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(config.SUPABASE_PAGE_SIZE).execute().data or []
+
+        yield from rows
+        if len(rows) < config.SUPABASE_PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+def select_company_rows(output_manager: OutputManager) -> List[str]:
+    """
+    Pick the lead_magnet_candidates row that represents each company.
+
+    Returns:
+        IDs of the chosen rows (rows without any company key are all kept)
+    """
+    best: Dict[str, Dict] = {}
+    unkeyed = []
+    for row in iter_source_rows(output_manager, COMPANY_RANK_COLUMNS, persons=False):
+        key = row_company_key(row)
+        if not key:
+            unkeyed.append(row["id"])
+            continue
+        rank = (row.get("wholesale_partner_check") is not None, row.get("created_at") or "")
+        current = best.get(key)
+        if current is None or rank > current["rank"]:
+            best[key] = {"id": row["id"], "rank": rank}
+    return [item["id"] for item in best.values()] + unkeyed
+
+
+def fetch_rows_by_id(output_manager: OutputManager, ids: List[str], columns: str, batch_size: int) -> Iterator[Dict]:
+    """Yield full rows for the given IDs, batch_size IDs per request."""
+    for start in range(0, len(ids), batch_size):
+        response = output_manager.supabase.table(SOURCE_TABLE)\
+            .select(columns)\
+            .in_("id", ids[start:start + batch_size])\
+            .execute()
+        yield from response.data or []
+
+
+def upsert_rows(output_manager: OutputManager, table: str, rows: List[Dict], on_conflict: str,
+                batch_size: int, ignore_duplicates: bool = False) -> int:
+    """Upsert rows in batches; returns the number of rows sent."""
+    for start in range(0, len(rows), batch_size):
+        output_manager.supabase.table(table)\
+            .upsert(rows[start:start + batch_size], on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)\
+            .execute()
+    return len(rows)
+
+
+def iter_company_keys(output_manager: OutputManager) -> Iterator[str]:
+    """Yield every company_key already in the companies table."""
+    last_id = None
+    while True:
+        query = output_manager.supabase.table("companies").select("id, company_key")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(config.SUPABASE_PAGE_SIZE).execute().data or []
+
+        for row in rows:
+            if row.get("company_key"):
+                yield row["company_key"]
+        if len(rows) < config.SUPABASE_PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+def backfill_companies(output_manager: OutputManager, batch_size: int, dry_run: bool) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Copy one row per company into companies.
+
+    Returns:
+        Tuple of (counts, company keys copied)
+    """
+    row_ids = select_company_rows(output_manager)
+    keyed, unkeyed = [], []
+    for row in fetch_rows_by_id(output_manager, row_ids, ", ".join(COMPANY_COLUMNS), batch_size):
+        company = {column: row.get(column) for column in COMPANY_COLUMNS}
+        company["company_key"] = row_company_key(row)
+        (keyed if company["company_key"] else unkeyed).append(company)
+
+    if not dry_run:
+        # ignore_duplicates: a company the app already wrote to companies is newer than its old row
+        upsert_rows(output_manager, "companies", keyed, "company_key", batch_size, ignore_duplicates=True)
+        upsert_rows(output_manager, "companies", unkeyed, "id", batch_size, ignore_duplicates=True)
+    counts = {"companies": len(keyed) + len(unkeyed), "companies_without_key": len(unkeyed)}
+    return counts, {company["company_key"] for company in keyed}
+
+
+def backfill_persons(output_manager: OutputManager, known_keys: Set[str], batch_size: int, dry_run: bool) -> Dict[str, int]:
+    """
+    Copy every person row into persons, batch by batch, adding companies only seen on person rows.
+
+    Args:
+        known_keys: Company keys that already have a companies row
+    """
+    counts = {"persons": 0, "companies_from_person_rows": 0}
+    persons, missing_companies = [], {}
+
+    def write_batch():
+        counts["persons"] += len(persons)
+        counts["companies_from_person_rows"] += len(missing_companies)
+        if not dry_run:
+            # Companies first (persons reference them); ignore_duplicates never overwrites a stored company
+            upsert_rows(output_manager, "companies", list(missing_companies.values()), "company_key", batch_size,
+                        ignore_duplicates=True)
+            upsert_rows(output_manager, "persons", persons, "id", batch_size)
+        known_keys.update(missing_companies)
+        persons.clear()
+        missing_companies.clear()
+
+    columns = ", ".join(PERSON_COLUMNS + PERSON_COMPANY_COLUMNS)
+    for row in iter_source_rows(output_manager, columns, persons=True):
+        key = build_company_key(row.get("company_id"), row.get("company_domain") or row.get("company_website"))
+        raw = row.get("raw_prospeo_data")
+        person = {column: row.get(column) for column in PERSON_COLUMNS}
+        person["company_key"] = key
+        if isinstance(raw, dict):
+            person["raw_prospeo_data"] = {name: value for name, value in raw.items() if name != "company"}
+        persons.append(person)
+
+        if key and key not in known_keys and key not in missing_companies:
+            company = {column: row.get(column) for column in PERSON_COMPANY_COLUMNS}
+            company["company_key"] = key
+            company["raw_prospeo_data"] = raw.get("company") if isinstance(raw, dict) else None
+            missing_companies[key] = company
+
+        if len(persons) >= batch_size:
+            write_batch()
+    write_batch()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy lead_magnet_candidates into the normalized companies/persons tables")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per upsert request")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be copied")
+    args = parser.parse_args()
+
+    output_manager = OutputManager(normalized_tables=False)
+    if not output_manager.supabase:
+        print("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)")
+        sys.exit(1)
+
+    counts, company_keys = backfill_companies(output_manager, args.batch_size, args.dry_run)
+    if not args.dry_run:
+        # Also companies the app already wrote to the new table
+        company_keys.update(iter_company_keys(output_manager))
+    counts.update(backfill_persons(output_manager, company_keys, args.batch_size, args.dry_run))
+
+    print(f"\n=== NORMALIZED TABLES BACKFILL{' (DRY RUN)' if args.dry_run else ''} ===")
+    print(f"Companies: {counts['companies']} ({counts['companies_without_key']} without ID or domain)")
+    print(f"Companies only found on person rows: {counts['companies_from_person_rows']}")
+    print(f"Persons: {counts['persons']}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Scraper extraction benchmark.
+Compares CPU time per page of the legacy multi-pass extraction (one find/select
+walk per field, with main-content decompose) against the single-pass
+PageExtractor used by WebsiteScraper, for each available HTML parser backend.
+
+Usage:
+    python benchmark_scraper.py [--pages DIR] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from website_scraper import PARSER_BACKENDS, WebsiteScraper, lxml_etree
+
+DEFAULT_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scraper_pages")
+
+
+# Legacy extraction (before the single-pass extractor), kept as the baseline
+
+
+def legacy_extract_title(soup: BeautifulSoup) -> str:
+    """Extract page title."""
+    title_tag = soup.find('title')
+    return title_tag.get_text(strip=True) if title_tag else ""
+
+
+def legacy_extract_navigation(soup: BeautifulSoup) -> str:
+    """Extract navigation menu items."""
+    nav_items = []
+
+    # Look for nav, header, menu elements
+    for selector in ['nav', 'header nav', '.navigation', '.menu', '#menu', '.navbar']:
+        nav = soup.select_one(selector)
+        if nav:
+            links = nav.find_all('a', href=True)
+            for link in links:
+                text = link.get_text(strip=True)
+                if text:
+                    nav_items.append(text)
+
+    # Also check for common menu patterns
+    for link in soup.find_all('a', href=True, class_=lambda x: x and ('menu' in str(x).lower() or 'nav' in str(x).lower())):
+        text = link.get_text(strip=True)
+        if text and text not in nav_items:
+            nav_items.append(text)
+
+    return " | ".join(nav_items[:20])  # Limit to 20 items
+
+
+def legacy_extract_footer(soup: BeautifulSoup) -> str:
+    """Extract footer content."""
+    footer = soup.find('footer')
+    if footer:
+        # Get all text from footer
+        footer_text = footer.get_text(separator=' | ', strip=True)
+        # Limit length
+        return footer_text[:1000] if len(footer_text) > 1000 else footer_text
+    return ""
+
+
+def legacy_extract_main_content(soup: BeautifulSoup, max_content_length: int) -> str:
+    """Extract main content area."""
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    # Try to find main content area
+    main_content = ""
+    for selector in ['main', '.main-content', '#main', '.content', 'article', 'body']:
+        element = soup.select_one(selector)
+        if element:
+            text = element.get_text(separator=' ', strip=True)
+            if len(text) > len(main_content):
+                main_content = text
+
+    # Limit content length
+    if len(main_content) > max_content_length:
+        main_content = main_content[:max_content_length] + "..."
+
+    return main_content
+
+
+def legacy_extract_product_listings(soup: BeautifulSoup) -> str:
+    """Extract product listing information."""
+    product_info = []
+
+    # Look for product-related elements
+    for selector in ['.product', '.item', '[class*="product"]', '[class*="item"]']:
+        products = soup.select(selector)
+        for product in products[:10]:  # Limit to 10 products
+            # Get product title/name
+            title_elem = product.find(['h1', 'h2', 'h3', 'h4', '.title', '.name', 'a'])
+            if title_elem:
+                title = title_elem.get_text(strip=True)
+                if title and title not in product_info:
+                    product_info.append(title)
+
+    return " | ".join(product_info[:20])  # Limit to 20 products
+
+
+def legacy_extract_brand_mentions(soup: BeautifulSoup) -> str:
+    """Extract mentions of brands or brand-related content."""
+    brand_indicators = []
+
+    # Look for "Brands" (plural) in navigation/links
+    for link in soup.find_all('a', href=True):
+        text = link.get_text(strip=True).lower()
+        href = link.get('href', '').lower()
+
+        if any(keyword in text or keyword in href for keyword in ['brands', 'companies we carry', 'shop by brand', 'all brands']):
+            brand_indicators.append(link.get_text(strip=True))
+
+    # Look for brand filter dropdowns
+    for select in soup.find_all('select'):
+        if 'brand' in select.get('name', '').lower() or 'brand' in select.get('id', '').lower():
+            options = [opt.get_text(strip=True) for opt in select.find_all('option')]
+            if len(options) > 1:  # Multiple brands
+                brand_indicators.append(f"Brand filter with {len(options)} options")
+
+    # Look for "Dealers", "Wholesale", etc. (negative indicators)
+    negative_indicators = []
+    for text in soup.stripped_strings:
+        text_lower = text.lower()
+        if any(keyword in text_lower for keyword in ['dealer sign up', 'become a distributor', 'where to buy', 'stockists', 'retail partners']):
+            negative_indicators.append(text[:100])  # First 100 chars
+
+    return {
+        'positive': " | ".join(brand_indicators[:10]),
+        'negative': " | ".join(negative_indicators[:10])
+    }
+
+
+def legacy_extract_meta_description(soup: BeautifulSoup) -> str:
+    """Extract meta description."""
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc:
+        return meta_desc.get('content', '')
+    return ""
+
+
+def legacy_extract_content(html, url: str, max_content_length: int = 50000) -> dict:
+    """Run the legacy multi-pass extraction on one page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'url': url,
+        'title': legacy_extract_title(soup),
+        'navigation': legacy_extract_navigation(soup),
+        'footer': legacy_extract_footer(soup),
+        'main_content': legacy_extract_main_content(soup, max_content_length),
+        'product_listings': legacy_extract_product_listings(soup),
+        'brand_mentions': legacy_extract_brand_mentions(soup),
+        'meta_description': legacy_extract_meta_description(soup)
+    }
+
+
+def time_extraction(extract, pages: dict, repeat: int) -> float:
+    """
+    Measure average CPU milliseconds per page for an extraction function.
+    
+    Args:
+        extract: Callable taking (html, url)
+        pages: Mapping of page name -> HTML bytes
+        repeat: Number of passes over all pages
+    
+    Returns:
+        CPU milliseconds per page
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        for name, html in pages.items():
+            extract(html, name)
+    elapsed = time.process_time() - start
+    return elapsed * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark website scraper content extraction")
+    parser.add_argument("--pages", default=DEFAULT_PAGES_DIR, help="Directory of .html pages to parse")
+    parser.add_argument("--repeat", type=int, default=50, help="Passes over all pages")
+    args = parser.parse_args()
+    
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        print(f"❌ No .html pages found in {args.pages}")
+        return
+    
+    extractors = {'legacy': legacy_extract_content}
+    for backend in PARSER_BACKENDS:
+        if backend == 'lxml' and lxml_etree is None:
+            continue
+        extractors[backend] = WebsiteScraper(parser_backend=backend).extract_content
+    
+    print(f"Benchmarking {len(pages)} pages x {args.repeat} passes (CPU ms per page)")
+    header = f"{'page':<24}" + "".join(f"{name:>14}" for name in extractors)
+    print(header)
+    print("=" * len(header))
+    
+    # Per-page comparison
+    for name, html in pages.items():
+        timings = [time_extraction(extract, {name: html}, args.repeat) for extract in extractors.values()]
+        print(f"{name:<24}" + "".join(f"{ms:14.2f}" for ms in timings))
+    
+    averages = {label: time_extraction(extract, pages, args.repeat) for label, extract in extractors.items()}
+    print("=" * len(header))
+    print(f"{'average':<24}" + "".join(f"{ms:14.2f}" for ms in averages.values()))
+    for label, ms in averages.items():
+        if label != 'legacy' and ms > 0:
+            print(f"Speedup vs legacy ({label}): {averages['legacy'] / ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Qualification mode comparison.
+Runs the same companies through the two-call path (Check #1, then Check #2)
+and the combined single-call path, and reports how often the wholesale,
+keyword and final verdicts agree, plus AI requests and prompt tokens per mode.
+Use it before switching AI_COMBINED_QUALIFICATION on.
+
+Companies come from a JSON file (a list of company dictionaries with name,
+website, description, industry and optionally scraped_content) or from cached
+company records in Supabase (--supabase N, records that have scraped_content).
+
+Usage:
+    python compare_qualification_modes.py --companies companies.json --keywords "golf, outdoor"
+    python compare_qualification_modes.py --supabase 50 --keywords "golf" --our-company-details "..."
+"""
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import config
+from layer3_ai_judge import AIQualifier
+from layer5_output import OutputManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ("two_call", "combined")
+
+
+def load_companies_from_file(path: str) -> List[Dict]:
+    """Load company dictionaries from a JSON list (ids are assigned when missing)."""
+    with open(path, encoding="utf-8") as f:
+        companies = json.load(f)
+    for index, company in enumerate(companies):
+        company.setdefault("id", f"company-{index}")
+    return companies
+
+
+def load_companies_from_supabase(limit: int) -> List[Dict]:
+    """Load recent company records that already have scraped website content."""
+    output_manager = OutputManager()
+    if not output_manager.supabase:
+        raise RuntimeError("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)")
+    response = output_manager.company_query(
+        "company_id, company_name, company_domain, company_website, company_description, company_industry, company_scraped_content"
+    )\
+        .not_.is_("company_scraped_content", "null")\
+        .order("created_at", desc=True)\
+        .limit(limit)\
+        .execute()
+    return [
+        {
+            "id": row.get("company_id") or f"company-{index}",
+            "name": row.get("company_name"),
+            "domain": row.get("company_domain"),
+            "website": row.get("company_website"),
+            "description": row.get("company_description"),
+            "industry": row.get("company_industry"),
+            "scraped_content": row.get("company_scraped_content"),
+        }
+        for index, row in enumerate(response.data or [])
+    ]
+
+
+def run_mode(
+    combined_mode: bool,
+    companies: List[Dict],
+    keywords: list,
+    our_company_details: Optional[str],
+    max_concurrency: Optional[int]
+) -> Dict:
+    """
+    Qualify every company in one mode, max_concurrency companies at a time
+    (worker threads, like Layer 4's qualify stage; all AI calls share the
+    OpenRouter rate limiter).
+
+    Returns:
+        Results by company ID (None when qualification failed) plus call statistics
+    """
+    qualifier = AIQualifier(combined_mode=combined_mode)
+    qualifier.reset_run_stats()
+    criteria = {"our_company_details": our_company_details} if our_company_details else {}
+
+    def qualify_one(company: Dict) -> Optional[Dict]:
+        try:
+            return qualifier.qualify_person(
+                {"id": None, "company": company}, keywords, criteria, scraped_content=company.get("scraped_content")
+            )
+        except Exception as e:
+            logger.error(f"Error qualifying company {company.get('name')}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_concurrency or config.OPENROUTER_MAX_CONCURRENCY) as executor:
+        outcomes = list(executor.map(qualify_one, companies))
+    results = {company["id"]: result for company, result in zip(companies, outcomes)}
+
+    stats = qualifier.get_run_stats()
+    return {
+        "results": results,
+        "ai_calls": stats["ai_requests"],
+        "cache_hits": stats["verdict_cache_hits"],
+        "prompt_tokens": stats["prompt_tokens"],
+    }
+
+
+def compare(companies: List[Dict], runs: Dict[str, Dict]) -> Dict:
+    """Count verdict agreement between the two modes (companies that failed in either mode are skipped)."""
+    fields = {
+        "wholesale": lambda r: r["wholesale_check"]["passed"],
+        "keyword": lambda r: r["keyword_check"]["matches_keywords"],
+        "final": lambda r: r["is_qualified"],
+    }
+    agreement = {name: 0 for name in fields}
+    disagreements = []
+    compared = 0
+
+    for company in companies:
+        two_call = runs["two_call"]["results"].get(company["id"])
+        combined = runs["combined"]["results"].get(company["id"])
+        if not two_call or not combined or _is_error(two_call) or _is_error(combined):
+            continue
+        compared += 1
+        differs = []
+        for name, verdict in fields.items():
+            if verdict(two_call) == verdict(combined):
+                agreement[name] += 1
+            else:
+                differs.append(f"{name}: two_call={verdict(two_call)} combined={verdict(combined)}")
+        if differs:
+            disagreements.append({"name": company.get("name"), "id": company["id"], "differences": differs})
+
+    return {"compared": compared, "agreement": agreement, "disagreements": disagreements}
+
+
+def _is_error(result: Dict) -> bool:
+    """True when the first (or only) AI call failed."""
+    return str(result["wholesale_check"]["response"]).startswith("Error:")
+
+
+def print_report(total: int, comparison: Dict, runs: Dict[str, Dict], show_disagreements: bool):
+    """Print agreement rates and per-mode cost."""
+    compared = comparison["compared"]
+    print("\n=== QUALIFICATION MODE COMPARISON ===")
+    print(f"Companies: {total} (compared: {compared}, skipped after errors: {total - compared})")
+    for name, agreed in comparison["agreement"].items():
+        rate = agreed / compared * 100 if compared else 0.0
+        print(f"  {name:<10} verdict agreement: {agreed}/{compared} ({rate:.1f}%)")
+
+    print(f"\n{'mode':<10} {'AI calls':>9} {'cache hits':>11} {'prompt tokens':>14} {'qualified':>10}")
+    for mode in MODES:
+        run = runs[mode]
+        qualified = sum(1 for r in run["results"].values() if r and r["is_qualified"])
+        print(f"{mode:<10} {run['ai_calls']:>9} {run['cache_hits']:>11} {run['prompt_tokens']:>14} {qualified:>10}")
+
+    if show_disagreements and comparison["disagreements"]:
+        print("\nDisagreements:")
+        for item in comparison["disagreements"]:
+            print(f"  {item['name']} ({item['id']}): " + "; ".join(item["differences"]))
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two-call and combined single-call AI qualification")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--companies", help="JSON file with a list of company dictionaries")
+    source.add_argument("--supabase", type=int, metavar="N", help="Use the N most recent cached company records")
+    parser.add_argument("--keywords", required=True, help="Comma-separated target keywords/industries")
+    parser.add_argument("--our-company-details", default=None, help="Description of our company and products")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Companies judged at once per mode")
+    parser.add_argument("--show-disagreements", action="store_true", help="List companies whose verdicts differ")
+    parser.add_argument("--output", default=None, help="Write per-company results of both modes to this JSON file")
+    args = parser.parse_args()
+
+    companies = load_companies_from_file(args.companies) if args.companies else load_companies_from_supabase(args.supabase)
+    if not companies:
+        print("No companies to compare")
+        sys.exit(1)
+    keywords = [keyword.strip() for keyword in args.keywords.split(",") if keyword.strip()]
+
+    runs = {}
+    for mode in MODES:
+        logger.info(f"Running {mode} qualification for {len(companies)} companies")
+        runs[mode] = run_mode(
+            mode == "combined", companies, keywords, args.our_company_details, args.max_concurrency
+        )
+
+    comparison = compare(companies, runs)
+    print_report(len(companies), comparison, runs, args.show_disagreements)
+
+    if args.output:
+        output = {"comparison": comparison, "runs": {}}
+        for mode, run in runs.items():
+            output["runs"][mode] = {
+                "ai_calls": run["ai_calls"],
+                "cache_hits": run["cache_hits"],
+                "prompt_tokens": run["prompt_tokens"],
+                # Scraped content is the input, not a result
+                "results": {
+                    company_id: {k: v for k, v in result.items() if k != "scraped_content"} if result else None
+                    for company_id, result in run["results"].items()
+                },
+            }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,15 @@ PROSPEO_API_KEY = os.getenv("PROSPEO_API_KEY")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Rows per page for paginated Supabase reads (PostgREST returns at most 1000 by default)
+SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+# Write-behind buffer for lead_magnet_candidates inserts/updates: rows per batched write
+# (1 writes every row immediately) and the longest a queued row waits before it is written
+SUPABASE_WRITE_BATCH_SIZE = int(os.getenv("SUPABASE_WRITE_BATCH_SIZE", "100"))
+SUPABASE_WRITE_FLUSH_SECONDS = float(os.getenv("SUPABASE_WRITE_FLUSH_SECONDS", "2.0"))
+# Store companies and persons in the normalized companies/persons tables instead of the wide
+# lead_magnet_candidates table (apply the 20261017140000 migration and run backfill_normalized_tables.py first)
+SUPABASE_NORMALIZED_TABLES = os.getenv("SUPABASE_NORMALIZED_TABLES", "false").lower() in ("1", "true", "yes")
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
 
@@ -20,14 +29,101 @@ SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
 TARGET_QUALIFIED_COUNT = 50
 MAX_PROCESSED_LEADS = 500
 PROSPEO_BATCH_SIZE = 25
+
+# Pipeline Configuration (Layer 4)
+# Each stage runs in its own worker threads; stages are connected by bounded queues.
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+PIPELINE_WORKERS = {
+    "lookup": int(os.getenv("PIPELINE_LOOKUP_WORKERS", "4")),
+    "scrape": int(os.getenv("PIPELINE_SCRAPE_WORKERS", "16")),
+    "wholesale": int(os.getenv("PIPELINE_WHOLESALE_WORKERS", "2")),  # Each worker sends one batch at a time
+    "qualify": int(os.getenv("PIPELINE_QUALIFY_WORKERS", "8")),
+    "person_search": int(os.getenv("PIPELINE_PERSON_SEARCH_WORKERS", "4")),
+    "enrich": int(os.getenv("PIPELINE_ENRICH_WORKERS", "8")),
+    "persist": int(os.getenv("PIPELINE_PERSIST_WORKERS", "2")),
+}
 # Only gpt-oss-20b. Override via OPENROUTER_MODEL if needed (must be openai/gpt-oss-20b or equivalent).
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "openai/gpt-oss-20b")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Companies judged at once by compare_qualification_modes.py (Layer 4 uses PIPELINE_QUALIFY_WORKERS)
+OPENROUTER_MAX_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "8"))
+# Shared token-bucket limit for all OpenRouter calls (every thread; set to your account's limit)
+OPENROUTER_RATE_LIMIT_PER_SECOND = float(os.getenv("OPENROUTER_RATE_LIMIT_PER_SECOND", "10"))
+OPENROUTER_RATE_LIMIT_BURST = float(os.getenv("OPENROUTER_RATE_LIMIT_BURST", "10"))
+# Retries for HTTP 429: Retry-After when sent, else capped exponential backoff with jitter
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "5"))
+OPENROUTER_BACKOFF_BASE = float(os.getenv("OPENROUTER_BACKOFF_BASE", "1.0"))
+OPENROUTER_BACKOFF_MAX = float(os.getenv("OPENROUTER_BACKOFF_MAX", "60"))
+# Request JSON-schema structured output for the AI checks (text responses are still parsed as a fallback).
+# Off by default: OpenRouter then only routes to providers that support response_format, and models
+# without one fail instead of answering in text
+AI_STRUCTURED_OUTPUT = os.getenv("AI_STRUCTURED_OUTPUT", "false").lower() in ("1", "true", "yes")
+# Token budget for scraped website content in each check's prompt (sections ranked, deduplicated
+# and trimmed to fit by prompt_builder; 0 = no limit)
+PROMPT_CONTENT_TOKEN_BUDGETS = {
+    "wholesale": int(os.getenv("PROMPT_BUDGET_WHOLESALE_TOKENS", "700")),
+    "keyword": int(os.getenv("PROMPT_BUDGET_KEYWORD_TOKENS", "1000")),
+    "combined": int(os.getenv("PROMPT_BUDGET_COMBINED_TOKENS", "1000")),
+}
+# Check #1 for many companies per request (Layer 4 wholesale stage); 1 disables batching.
+# Off by default until batched verdicts have been compared with single-call verdicts
+WHOLESALE_BATCH_SIZE = int(os.getenv("WHOLESALE_BATCH_SIZE", "1"))
+# Seconds the wholesale stage waits for a batch to fill before sending a partial one
+WHOLESALE_BATCH_WAIT_SECONDS = float(os.getenv("WHOLESALE_BATCH_WAIT_SECONDS", "2.0"))
+# Local heuristic pre-classifier for Check #1 (heuristic_classifier): scores at or above the YES
+# threshold / at or below the NO threshold are decided without an AI call. Off until the thresholds
+# have been measured against labelled verdicts with evaluate_heuristic.py
+HEURISTIC_PRECLASSIFIER = os.getenv("HEURISTIC_PRECLASSIFIER", "false").lower() in ("1", "true", "yes")
+HEURISTIC_YES_THRESHOLD = float(os.getenv("HEURISTIC_YES_THRESHOLD", "4.0"))
+HEURISTIC_NO_THRESHOLD = float(os.getenv("HEURISTIC_NO_THRESHOLD", "-4.0"))
+# Phase 0 keyword matching against stored categories/segments (keyword_index): a similarity at or above
+# STRONG counts as a keyword match, between WEAK and STRONG leaves the company for an AI re-check.
+# Defaults are calibrated for TF-IDF; with an embedding model (e.g. sentence-transformers/all-MiniLM-L6-v2)
+# start around 0.65 / 0.45
+KEYWORD_EMBEDDING_MODEL = os.getenv("KEYWORD_EMBEDDING_MODEL", "")  # Empty = TF-IDF (no extra dependency)
+KEYWORD_MATCH_STRONG_SIMILARITY = float(os.getenv("KEYWORD_MATCH_STRONG_SIMILARITY", "0.6"))
+KEYWORD_MATCH_WEAK_SIMILARITY = float(os.getenv("KEYWORD_MATCH_WEAK_SIMILARITY", "0.25"))
+# Seconds before the shared Phase 0 keyword index is reloaded from Supabase (it is updated in place
+# as this process qualifies companies; the reload picks up rows written by other processes)
+KEYWORD_INDEX_REFRESH_SECONDS = float(os.getenv("KEYWORD_INDEX_REFRESH_SECONDS", "900"))
+# Combined mode: ask for both verdicts (wholesale + keyword fit) in one structured call per company
+AI_COMBINED_QUALIFICATION = os.getenv("AI_COMBINED_QUALIFICATION", "false").lower() in ("1", "true", "yes")
 
 # Prospeo API Configuration
 PROSPEO_BASE_URL = "https://api.prospeo.io"
 PROSPEO_SEARCH_PERSON_ENDPOINT = f"{PROSPEO_BASE_URL}/search-person"
 PROSPEO_SEARCH_COMPANY_ENDPOINT = f"{PROSPEO_BASE_URL}/search-company"
+PROSPEO_ENRICH_PERSON_ENDPOINT = f"{PROSPEO_BASE_URL}/enrich-person"
+# Keep-alive connections the Prospeo client pools for the Layer 4 pipeline's worker threads
+PROSPEO_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PROSPEO_MAX_KEEPALIVE_CONNECTIONS", "10"))
+# Shared token-bucket limit for all Prospeo endpoints (set to your plan's quota)
+PROSPEO_RATE_LIMIT_PER_SECOND = float(os.getenv("PROSPEO_RATE_LIMIT_PER_SECOND", "5"))
+PROSPEO_RATE_LIMIT_BURST = float(os.getenv("PROSPEO_RATE_LIMIT_BURST", "5"))
+# Retries for HTTP 429: Retry-After when sent, else capped exponential backoff with jitter
+PROSPEO_MAX_RETRIES = int(os.getenv("PROSPEO_MAX_RETRIES", "5"))
+PROSPEO_BACKOFF_BASE = float(os.getenv("PROSPEO_BACKOFF_BASE", "1.0"))
+PROSPEO_BACKOFF_MAX = float(os.getenv("PROSPEO_BACKOFF_MAX", "60"))
+
+# Website Scraper Configuration
+# Scrape workers (PIPELINE_SCRAPE_WORKERS) allowed on one site at a time, so we stay polite to each site
+SCRAPER_PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST_LIMIT", "2"))
+# Hard cap on bytes downloaded per page; the download stops once it is reached
+SCRAPER_MAX_BYTES = int(os.getenv("SCRAPER_MAX_BYTES", str(2 * 1024 * 1024)))
+# HTML parser backend: "lxml" (fastest, falls back to "stdlib" if lxml is missing),
+# "stdlib" (Python's html.parser, streamed) or "html.parser" (BeautifulSoup tree)
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "lxml")
+
+# Persistent scrape cache (local SQLite, shared by all runs on this machine)
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", "./cache/scrape_cache.sqlite3")
+SCRAPE_CACHE_TTL_DAYS = float(os.getenv("SCRAPE_CACHE_TTL_DAYS", "180"))  # Same window as scraped_content_date reuse
+SCRAPE_CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", "500"))  # Least recently used entries evicted above this
+
+# Persistent AI verdict cache (local SQLite), keyed by model + hash of the rendered prompt
+VERDICT_CACHE_ENABLED = os.getenv("VERDICT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+VERDICT_CACHE_PATH = os.getenv("VERDICT_CACHE_PATH", "./cache/verdict_cache.sqlite3")
+VERDICT_CACHE_TTL_DAYS = float(os.getenv("VERDICT_CACHE_TTL_DAYS", "30"))
+VERDICT_CACHE_MAX_MB = float(os.getenv("VERDICT_CACHE_MAX_MB", "100"))  # Least recently used entries evicted above this
 
 # Flask/Slack Configuration
 SLACK_PORT = int(os.getenv("SLACK_PORT", "3000"))
@@ -0,0 +1,202 @@
+"""
+Heuristic pre-classifier evaluation.
+Replays stored Check #1 results (wholesale_partner_check) through
+heuristic_classifier and reports, for the chosen thresholds, how many
+companies would be decided locally and how precise those decisions are.
+
+Labels are the stored AI verdicts; records that the heuristic itself decided,
+records whose check failed ("Error: ...") and records without scraped content
+are left out.
+
+Records come from Supabase (company rows) or from a JSON file with a list of
+records holding company_scraped_content (or scraped_content) and
+wholesale_partner_check.
+
+Usage:
+    python evaluate_heuristic.py --supabase
+    python evaluate_heuristic.py --file companies.json --yes-threshold 5 --no-threshold -3 --show-errors
+    python evaluate_heuristic.py --supabase --sweep
+"""
+import argparse
+import json
+import logging
+import sys
+from typing import Dict, List, Optional
+
+import config
+from heuristic_classifier import is_heuristic_response, score_wholesale_signals
+from layer5_output import OutputManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUPABASE_PAGE_SIZE = 1000
+EVALUATION_COLUMNS = "id, company_id, company_name, company_scraped_content, wholesale_partner_check, wholesale_partner_response"
+
+
+def load_records_from_supabase(limit: Optional[int] = None) -> List[Dict]:
+    """Load company rows that have scraped content and a stored Check #1 verdict."""
+    output_manager = OutputManager()
+    if not output_manager.supabase:
+        raise RuntimeError("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)")
+
+    records = []
+    while limit is None or len(records) < limit:
+        page_size = SUPABASE_PAGE_SIZE if limit is None else min(SUPABASE_PAGE_SIZE, limit - len(records))
+        response = output_manager.company_query(EVALUATION_COLUMNS)\
+            .not_.is_("wholesale_partner_check", "null")\
+            .not_.is_("company_scraped_content", "null")\
+            .order("id")\
+            .range(len(records), len(records) + page_size - 1)\
+            .execute()
+        rows = response.data or []
+        records.extend(rows)
+        if len(rows) < page_size:
+            break
+    return records
+
+
+def load_records_from_file(path: str) -> List[Dict]:
+    """Load records from a JSON list (scraped_content is accepted for company_scraped_content)."""
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    for record in records:
+        record.setdefault("company_scraped_content", record.get("scraped_content"))
+    return records
+
+
+def score_records(records: List[Dict]) -> List[Dict]:
+    """Score every usable record once: [{name, label, score, signals}]."""
+    scored = []
+    for record in records:
+        response = record.get("wholesale_partner_response") or ""
+        if record.get("wholesale_partner_check") is None or not record.get("company_scraped_content"):
+            continue
+        if is_heuristic_response(response) or response.startswith("Error:"):
+            continue
+        result = score_wholesale_signals(record["company_scraped_content"])
+        scored.append({
+            "name": record.get("company_name") or record.get("company_id") or record.get("id"),
+            "label": bool(record["wholesale_partner_check"]),
+            "score": result["score"],
+            "signals": result["signals"],
+        })
+    return scored
+
+
+def evaluate(scored: List[Dict], yes_threshold: float, no_threshold: float) -> Dict:
+    """
+    Compare heuristic decisions at the given thresholds with the stored verdicts.
+
+    Returns:
+        Dictionary with counts, per-verdict precision and recall, coverage (share decided
+        locally, i.e. AI calls saved) and the misclassified records
+    """
+    counts = {"yes_correct": 0, "yes_wrong": 0, "no_correct": 0, "no_wrong": 0, "ambiguous": 0}
+    errors = []
+    for item in scored:
+        has_signals = bool(item["signals"])
+        if has_signals and item["score"] >= yes_threshold:
+            decision = True
+        elif has_signals and item["score"] <= no_threshold:
+            decision = False
+        else:
+            counts["ambiguous"] += 1
+            continue
+        prefix = "yes" if decision else "no"
+        if decision == item["label"]:
+            counts[f"{prefix}_correct"] += 1
+        else:
+            counts[f"{prefix}_wrong"] += 1
+            errors.append({**item, "decision": decision})
+
+    total = len(scored)
+    labelled_yes = sum(1 for item in scored if item["label"])
+    labelled_no = total - labelled_yes
+    decided_yes = counts["yes_correct"] + counts["yes_wrong"]
+    decided_no = counts["no_correct"] + counts["no_wrong"]
+    return {
+        "total": total,
+        "counts": counts,
+        "yes_precision": _ratio(counts["yes_correct"], decided_yes),
+        "yes_recall": _ratio(counts["yes_correct"], labelled_yes),
+        "no_precision": _ratio(counts["no_correct"], decided_no),
+        "no_recall": _ratio(counts["no_correct"], labelled_no),
+        "coverage": _ratio(decided_yes + decided_no, total),
+        "errors": errors,
+    }
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    """numerator / denominator, or None when there is nothing to divide by."""
+    return numerator / denominator if denominator else None
+
+
+def _percent(value: Optional[float]) -> str:
+    """Format a ratio as a percentage ('-' when undefined)."""
+    return "-" if value is None else f"{value * 100:.1f}%"
+
+
+def print_report(report: Dict, yes_threshold: float, no_threshold: float, show_errors: bool):
+    """Print precision, recall and coverage for one pair of thresholds."""
+    counts = report["counts"]
+    print("\n=== HEURISTIC PRE-CLASSIFIER EVALUATION ===")
+    print(f"Records: {report['total']} (YES threshold {yes_threshold:+.1f}, NO threshold {no_threshold:+.1f})")
+    print(f"Decided locally: {_percent(report['coverage'])} (ambiguous, sent to AI: {counts['ambiguous']})")
+    print(f"  YES: {counts['yes_correct']} correct, {counts['yes_wrong']} wrong  "
+          f"precision {_percent(report['yes_precision'])}  recall {_percent(report['yes_recall'])}")
+    print(f"  NO:  {counts['no_correct']} correct, {counts['no_wrong']} wrong  "
+          f"precision {_percent(report['no_precision'])}  recall {_percent(report['no_recall'])}")
+
+    if show_errors and report["errors"]:
+        print("\nDisagreements with the stored verdict:")
+        for item in report["errors"]:
+            verdict = "YES" if item["decision"] else "NO"
+            print(f"  {item['name']}: heuristic {verdict} (score {item['score']:.1f}) vs stored "
+                  f"{'YES' if item['label'] else 'NO'} - {'; '.join(item['signals'])}")
+    print("=" * 50)
+
+
+def print_sweep(scored: List[Dict]):
+    """Print YES and NO precision/recall at every score seen in the data, to pick thresholds."""
+    scores = sorted({item["score"] for item in scored if item["signals"]})
+    print("\n=== THRESHOLD SWEEP ===")
+    print(f"{'YES >=':>8} {'precision':>10} {'recall':>8} {'decided':>8}")
+    for threshold in (score for score in scores if score > 0):
+        report = evaluate(scored, threshold, float("-inf"))
+        decided = report["counts"]["yes_correct"] + report["counts"]["yes_wrong"]
+        print(f"{threshold:>8.1f} {_percent(report['yes_precision']):>10} {_percent(report['yes_recall']):>8} {decided:>8}")
+    print(f"\n{'NO <=':>8} {'precision':>10} {'recall':>8} {'decided':>8}")
+    for threshold in (score for score in reversed(scores) if score < 0):
+        report = evaluate(scored, float("inf"), threshold)
+        decided = report["counts"]["no_correct"] + report["counts"]["no_wrong"]
+        print(f"{threshold:>8.1f} {_percent(report['no_precision']):>10} {_percent(report['no_recall']):>8} {decided:>8}")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the Check #1 heuristic pre-classifier against stored verdicts")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--supabase", action="store_true", help="Use company records stored in Supabase")
+    source.add_argument("--file", help="JSON file with a list of records")
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate at most N Supabase records")
+    parser.add_argument("--yes-threshold", type=float, default=config.HEURISTIC_YES_THRESHOLD)
+    parser.add_argument("--no-threshold", type=float, default=config.HEURISTIC_NO_THRESHOLD)
+    parser.add_argument("--sweep", action="store_true", help="Also print precision/recall for every candidate threshold")
+    parser.add_argument("--show-errors", action="store_true", help="List records where the heuristic disagrees")
+    args = parser.parse_args()
+
+    records = load_records_from_file(args.file) if args.file else load_records_from_supabase(args.limit)
+    scored = score_records(records)
+    if not scored:
+        print("No records with scraped content and a stored AI verdict")
+        sys.exit(1)
+
+    report = evaluate(scored, args.yes_threshold, args.no_threshold)
+    print_report(report, args.yes_threshold, args.no_threshold, args.show_errors)
+    if args.sweep:
+        print_sweep(scored)
+
+
+if __name__ == "__main__":
+    main()
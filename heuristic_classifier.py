@@ -0,0 +1,186 @@
+"""
+Heuristic Classifier Module
+Scores a company's scraped website content for Check #1 (multi-brand
+retailer/reseller vs manufacturer) without an AI call.
+
+The score uses the signals WebsiteScraper already collects in the BRAND
+INDICATORS section (brand links, brand-filter <select> option counts,
+manufacturer phrases such as "become a distributor" / "where to buy") plus
+the navigation menu text. Companies scoring at or above
+HEURISTIC_YES_THRESHOLD are decided YES, at or below HEURISTIC_NO_THRESHOLD
+NO; everything in between is ambiguous and goes to OpenRouter.
+
+Tune the thresholds with evaluate_heuristic.py, which replays stored
+wholesale_partner_check results.
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+import config
+from prompt_builder import BRAND_SECTION, NAVIGATION_SECTION, split_sections
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Auto-decided responses start with the verdict (so parse_wholesale_check_response reads them)
+# and carry this marker, so they can be told apart from AI verdicts in Supabase
+HEURISTIC_RESPONSE_MARKER = "(local heuristic"
+
+# Signal weights (positive = multi-brand retailer, negative = manufacturer)
+BRAND_FILTER_STRONG_OPTIONS = 10  # A brand filter with this many options is a strong retailer sign
+BRAND_FILTER_STRONG_WEIGHT = 3.0
+BRAND_FILTER_WEAK_WEIGHT = 1.5
+BRAND_LINK_WEIGHTS = (2.0, 1.0, 1.0)  # First, second and third distinct brand link; more add nothing
+MANUFACTURER_SIGN_WEIGHT = -2.0
+MAX_MANUFACTURER_SIGNS = 3
+RETAILER_NAV_WEIGHT = 1.0
+MAX_RETAILER_NAV_TERMS = 2
+MANUFACTURER_NAV_WEIGHT = -1.5
+MAX_MANUFACTURER_NAV_TERMS = 2
+
+# Navigation terms not already covered by the scraper's brand-link keywords
+RETAILER_NAV_TERMS = ('designers', 'vendors', 'top brands', 'featured brands', 'pro shop', 'gift cards')
+MANUFACTURER_NAV_TERMS = (
+    'where to buy', 'find a dealer', 'dealer locator', 'become a dealer', 'dealer login',
+    'become a distributor', 'distributors', 'wholesale', 'oem', 'our factory', 'product registration'
+)
+
+_BRAND_FILTER_PATTERN = re.compile(r"^Brand filter with (\d+) options$", re.IGNORECASE)
+_POSITIVE_PREFIX = "Positive (Multi-brand retailer signs):"
+_NEGATIVE_PREFIX = "Negative (Manufacturer signs):"
+_EMPTY_VALUES = {"", "none found", "not found"}
+
+
+def _split_items(value: str) -> List[str]:
+    """Split a " | " joined signal list into distinct non-empty items (case-insensitive)."""
+    items = []
+    seen = set()
+    for item in value.split(" | "):
+        item = item.strip()
+        if item.lower() in _EMPTY_VALUES or item.lower() in seen:
+            continue
+        seen.add(item.lower())
+        items.append(item)
+    return items
+
+
+def extract_signals(scraped_content: Optional[str]) -> Dict[str, List[str]]:
+    """
+    Pull the heuristic's inputs out of formatted scraped content.
+
+    Args:
+        scraped_content: Text from format_scraped_content_for_ai (or cached in Supabase)
+
+    Returns:
+        Dictionary with 'positive' and 'negative' brand indicators and 'navigation' items
+    """
+    signals = {'positive': [], 'negative': [], 'navigation': []}
+    if not scraped_content:
+        return signals
+
+    for name, body in split_sections(scraped_content):
+        if name == BRAND_SECTION:
+            for line in body.split("\n"):
+                line = line.strip()
+                if line.startswith(_POSITIVE_PREFIX):
+                    signals['positive'] = _split_items(line[len(_POSITIVE_PREFIX):])
+                elif line.startswith(_NEGATIVE_PREFIX):
+                    signals['negative'] = _split_items(line[len(_NEGATIVE_PREFIX):])
+        elif name == NAVIGATION_SECTION:
+            signals['navigation'] = _split_items(body.replace("\n", " | "))
+    return signals
+
+
+def _matched_terms(items: List[str], terms: Tuple[str, ...]) -> List[str]:
+    """Terms found in any item, as whole words, in the order of terms."""
+    text = " | ".join(items).lower()
+    return [term for term in terms if re.search(r"\b" + re.escape(term) + r"\b", text)]
+
+
+def score_wholesale_signals(scraped_content: Optional[str]) -> Dict:
+    """
+    Score scraped content for Check #1.
+
+    Args:
+        scraped_content: Formatted scraped website content
+
+    Returns:
+        Dictionary with 'score' (float; above 0 leans retailer, below 0 manufacturer)
+        and 'signals' (list of "description (+weight)" strings that made the score)
+    """
+    signals = extract_signals(scraped_content)
+    reasons = []
+
+    # Brand filter <select> and brand links ("Shop by Brand", "All Brands", ...)
+    brand_links = []
+    for item in signals['positive']:
+        match = _BRAND_FILTER_PATTERN.match(item)
+        if not match:
+            brand_links.append(item)
+            continue
+        options = int(match.group(1))
+        weight = BRAND_FILTER_STRONG_WEIGHT if options >= BRAND_FILTER_STRONG_OPTIONS else BRAND_FILTER_WEAK_WEIGHT
+        reasons.append((f"brand filter with {options} options", weight))
+    for item, weight in zip(brand_links, BRAND_LINK_WEIGHTS):
+        reasons.append((f"brand link '{item}'", weight))
+
+    # Manufacturer phrases in the page text ("become a distributor", "where to buy", ...)
+    for item in signals['negative'][:MAX_MANUFACTURER_SIGNS]:
+        reasons.append((f"manufacturer sign '{item}'", MANUFACTURER_SIGN_WEIGHT))
+
+    # Navigation menu wording
+    for term in _matched_terms(signals['navigation'], RETAILER_NAV_TERMS)[:MAX_RETAILER_NAV_TERMS]:
+        reasons.append((f"navigation '{term}'", RETAILER_NAV_WEIGHT))
+    for term in _matched_terms(signals['navigation'], MANUFACTURER_NAV_TERMS)[:MAX_MANUFACTURER_NAV_TERMS]:
+        reasons.append((f"navigation '{term}'", MANUFACTURER_NAV_WEIGHT))
+
+    return {
+        'score': sum(weight for _, weight in reasons),
+        'signals': [f"{description} ({weight:+.1f})" for description, weight in reasons]
+    }
+
+
+def classify_wholesale_partner(
+    scraped_content: Optional[str],
+    yes_threshold: float = None,
+    no_threshold: float = None
+) -> Dict:
+    """
+    Decide Check #1 locally when the signals are clear.
+
+    Args:
+        scraped_content: Formatted scraped website content
+        yes_threshold: Score at or above which the company is a retailer (default: HEURISTIC_YES_THRESHOLD)
+        no_threshold: Score at or below which it is not (default: HEURISTIC_NO_THRESHOLD)
+
+    Returns:
+        Dictionary with 'decision' (True = YES, False = NO, None = ambiguous, ask the AI),
+        'score' and 'signals'
+    """
+    yes_threshold = config.HEURISTIC_YES_THRESHOLD if yes_threshold is None else yes_threshold
+    no_threshold = config.HEURISTIC_NO_THRESHOLD if no_threshold is None else no_threshold
+
+    result = score_wholesale_signals(scraped_content)
+    decision = None
+    if result['signals'] and result['score'] >= yes_threshold:
+        decision = True
+    elif result['signals'] and result['score'] <= no_threshold:
+        decision = False
+    result['decision'] = decision
+    return result
+
+
+def format_heuristic_response(result: Dict) -> str:
+    """
+    Render an auto-decided verdict as the Check #1 response text.
+
+    Example: "YES (local heuristic, score 5.0: brand filter with 40 options (+3.0); brand link 'Shop by Brand' (+2.0))"
+    """
+    verdict = 'YES' if result['decision'] else 'NO'
+    return f"{verdict} {HEURISTIC_RESPONSE_MARKER}, score {result['score']:.1f}: {'; '.join(result['signals'])})"
+
+
+def is_heuristic_response(response_text: Optional[str]) -> bool:
+    """True when a stored Check #1 response was decided by this module rather than the AI."""
+    return bool(response_text) and HEURISTIC_RESPONSE_MARKER in response_text
@@ -0,0 +1,433 @@
+"""
+Keyword Index Module
+Matches search keywords against the product categories and market segments
+stored for many companies at once (Phase 0 pre-check).
+
+Every distinct stored term (category or segment) is vectorized once. A
+keyword is compared with all terms in one sparse similarity query over the
+index postings, so a keyword set is resolved against thousands of companies
+without a per-company loop. Similarity comes from TF-IDF over words and
+character 3-grams, which also catches spelling variants and shared words
+("golf pro shops" vs "pro shop golf gear"), or from a sentence-embedding model
+when KEYWORD_EMBEDDING_MODEL is set and sentence-transformers is installed,
+which also catches synonyms.
+
+A keyword matches a company when its best similarity to one of the company's
+terms reaches KEYWORD_MATCH_STRONG_SIMILARITY (substring matches, the old
+quick-match rule, always count). Similarities between the weak and strong
+thresholds leave the company uncertain, so it gets an AI re-check.
+
+The index is inverted twice: normalized token/n-gram features -> terms, and
+term -> company IDs. resolve() turns a keyword set into strong / uncertain /
+no-match company ID sets with set unions and differences only. The shared
+process-wide index (get_keyword_index) is loaded once, kept current with
+add_company/remove_company as companies are qualified, and reloaded after
+KEYWORD_INDEX_REFRESH_SECONDS to pick up rows written by other processes.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHAR_NGRAM_SIZE = 3
+WORD_FEATURE_WEIGHT = 2.0  # Whole words count more than their character n-grams
+# Share of keywords that must match for a strong match (same rule as quick_match_keywords_against_categories)
+STRONG_MATCH_KEYWORD_SHARE = 0.5
+# New terms (as a share of the indexed terms) after which IDF weights are recomputed
+IDF_REBUILD_SHARE = 0.1
+
+_NON_ALNUM_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_term(text: str) -> str:
+    """Lowercase, replace punctuation with spaces and collapse whitespace ("Golf & Outdoor" -> "golf outdoor")."""
+    return " ".join(_NON_ALNUM_PATTERN.sub(" ", (text or "").lower()).split())
+
+
+def _stem(word: str) -> str:
+    """Light plural stemming so "shops" and "shop", "accessories" and "accessory" share features."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def term_features(term: str) -> Dict[str, float]:
+    """Sparse feature counts for a normalized term: stemmed words plus their character 3-grams."""
+    features = defaultdict(float)
+    for word in term.split():
+        word = _stem(word)
+        features["w:" + word] += WORD_FEATURE_WEIGHT
+        padded = f" {word} "
+        for start in range(len(padded) - CHAR_NGRAM_SIZE + 1):
+            features[padded[start:start + CHAR_NGRAM_SIZE]] += 1.0
+    return features
+
+
+class KeywordIndex:
+    """
+    In-memory similarity index over companies' stored categories and segments.
+
+    Usage:
+        index = KeywordIndex()
+        index.add_company("company-1", ["Golf Equipment", "Outdoor Apparel"])
+        results = index.match(["golf clubs", "rain jackets"])  # {company_id: quick-match style result}
+    """
+
+    def __init__(
+        self,
+        embedding_model: Optional[str] = None,
+        strong_similarity: float = None,
+        weak_similarity: float = None
+    ):
+        """
+        Args:
+            embedding_model: sentence-transformers model name (default: KEYWORD_EMBEDDING_MODEL; empty = TF-IDF)
+            strong_similarity: Similarity at which a keyword matches a term (default: KEYWORD_MATCH_STRONG_SIMILARITY)
+            weak_similarity: Similarity from which a company is uncertain (default: KEYWORD_MATCH_WEAK_SIMILARITY)
+        """
+        self.embedding_model = config.KEYWORD_EMBEDDING_MODEL if embedding_model is None else embedding_model
+        self.strong_similarity = (
+            config.KEYWORD_MATCH_STRONG_SIMILARITY if strong_similarity is None else strong_similarity
+        )
+        self.weak_similarity = config.KEYWORD_MATCH_WEAK_SIMILARITY if weak_similarity is None else weak_similarity
+
+        self._term_ids: Dict[str, int] = {}  # normalized term -> term ID
+        self._terms: List[str] = []
+        self._labels: List[str] = []  # Term as first stored (for reasoning text)
+        self._label_variants: List[Set[str]] = []  # Every stored spelling of the term
+        self._term_companies: List[Set[str]] = []
+        self._company_terms: Dict[str, Set[int]] = {}
+
+        # Postings (or embeddings) cover terms[:_indexed_terms]; newer terms are added on the next query
+        self._lock = threading.RLock()
+        self._indexed_terms = 0
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._default_idf = 1.0
+        self._encoder = None
+        self._embeddings = None
+        self.loaded_at: Optional[float] = None  # When rebuild() last loaded the full company set
+
+    def __len__(self) -> int:
+        return len(self._company_terms)
+
+    def is_stale(self, max_age_seconds: float = None) -> bool:
+        """True when the index was never loaded or was loaded more than max_age_seconds ago."""
+        max_age_seconds = config.KEYWORD_INDEX_REFRESH_SECONDS if max_age_seconds is None else max_age_seconds
+        return self.loaded_at is None or time.time() - self.loaded_at > max_age_seconds
+
+    def rebuild(self, companies: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        """
+        Replace the indexed companies with a full set of (company_id, terms) pairs.
+        The new index is built aside and swapped in, so queries keep working meanwhile.
+        """
+        fresh = KeywordIndex(self.embedding_model, self.strong_similarity, self.weak_similarity)
+        fresh._encoder = self._encoder
+        for company_id, terms in companies:
+            fresh.add_company(company_id, terms)
+        fresh._refresh()
+        with self._lock:
+            self.__dict__.update({name: value for name, value in fresh.__dict__.items() if name != '_lock'})
+            self.loaded_at = time.time()
+
+    def add_company(self, company_id: str, terms: Iterable[str]) -> None:
+        """Index (or re-index) a company's product categories / market segments."""
+        with self._lock:
+            self.remove_company(company_id)
+            term_ids = set()
+            for label in terms or []:
+                term = normalize_term(label)
+                if not term:
+                    continue
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    term_id = len(self._terms)
+                    self._term_ids[term] = term_id
+                    self._terms.append(term)
+                    self._labels.append(label)
+                    self._label_variants.append(set())
+                    self._term_companies.append(set())
+                self._label_variants[term_id].add(label)
+                self._term_companies[term_id].add(company_id)
+                term_ids.add(term_id)
+            self._company_terms[company_id] = term_ids
+
+    def remove_company(self, company_id: str) -> None:
+        """Drop a company from the index (its terms stay in the vocabulary)."""
+        with self._lock:
+            for term_id in self._company_terms.pop(company_id, set()):
+                self._term_companies[term_id].discard(company_id)
+
+    def similarities(self, keywords: List[str]) -> List[Dict[int, float]]:
+        """
+        Similarity of each keyword to every indexed term in one query.
+
+        Returns:
+            One {term_id: similarity} dictionary per keyword, holding the terms
+            at or above the weak threshold (substring matches score 1.0)
+        """
+        with self._lock:
+            self._refresh()
+            normalized = [normalize_term(keyword) for keyword in keywords]
+            if self._embeddings is not None:
+                scores = self._embedding_similarities(normalized)
+            else:
+                scores = [self._tfidf_similarities(keyword) for keyword in normalized]
+
+            results = []
+            for keyword, keyword_scores in zip(normalized, scores):
+                # Substring containment either way is always a match (quick-match compatibility)
+                for term_id in list(keyword_scores):
+                    term = self._terms[term_id]
+                    if keyword and (keyword in term or term in keyword):
+                        keyword_scores[term_id] = 1.0
+                results.append({
+                    term_id: score for term_id, score in keyword_scores.items() if score >= self.weak_similarity
+                })
+            return results
+
+    def matched_labels(self, keywords: List[str]) -> Set[str]:
+        """Stored category/segment spellings of every term that strongly matches one of the keywords."""
+        with self._lock:
+            return {
+                label
+                for keyword_scores in self.similarities(keywords)
+                for term_id, score in keyword_scores.items() if score >= self.strong_similarity
+                for label in self._label_variants[term_id]
+            }
+
+    def resolve(self, keywords: List[str]) -> Dict[str, Set[str]]:
+        """
+        Sort every indexed company into strong_match / uncertain / no_match with set operations.
+
+        Same rules as match(): a company is a strong match when at least half the keywords
+        (and at least one) reach the strong threshold on one of its terms, uncertain when
+        any keyword reaches the weak threshold otherwise, and no_match when none does.
+
+        Args:
+            keywords: Keywords from the current search
+
+        Returns:
+            Dictionary with 'strong_match', 'uncertain' and 'no_match' sets of company IDs
+        """
+        keywords = [keyword for keyword in keywords or [] if normalize_term(keyword)]
+        with self._lock:
+            all_companies = set(self._company_terms)
+            if not keywords:
+                return {'strong_match': set(), 'uncertain': all_companies, 'no_match': set()}
+
+            strong_counts = Counter()
+            touched = set()
+            for keyword_scores in self.similarities(keywords):
+                strong_companies = set()
+                for term_id, score in keyword_scores.items():
+                    companies = self._term_companies[term_id]
+                    touched |= companies
+                    if score >= self.strong_similarity:
+                        strong_companies |= companies
+                strong_counts.update(strong_companies)
+
+        required = max(1, math.ceil(len(keywords) * STRONG_MATCH_KEYWORD_SHARE))
+        strong_match = {company_id for company_id, count in strong_counts.items() if count >= required}
+        return {
+            'strong_match': strong_match,
+            'uncertain': touched - strong_match,
+            'no_match': all_companies - touched
+        }
+
+    def match(self, keywords: List[str]) -> Dict[str, Dict]:
+        """
+        Match a keyword set against every indexed company.
+
+        Args:
+            keywords: Keywords from the current search
+
+        Returns:
+            Dictionary of company ID -> result with the same keys as
+            utils.quick_match_keywords_against_categories (confidence, matched,
+            match_count, reasoning); companies with identical matches share a result
+        """
+        keywords = [keyword for keyword in keywords or [] if normalize_term(keyword)]
+        with self._lock:
+            return self._match(keywords)
+
+    def _match(self, keywords: List[str]) -> Dict[str, Dict]:
+        """Body of match() (lock held)."""
+        if not keywords:
+            return {
+                company_id: {
+                    'confidence': 'uncertain',
+                    'matched': None,
+                    'match_count': 0,
+                    'reasoning': 'Missing keywords or categories for matching'
+                }
+                for company_id in self._company_terms
+            }
+
+        # Best (similarity, term) per company and keyword
+        best: Dict[str, Dict[int, Tuple[float, int]]] = defaultdict(dict)
+        for keyword_index, keyword_scores in enumerate(self.similarities(keywords)):
+            for term_id, score in keyword_scores.items():
+                for company_id in self._term_companies[term_id]:
+                    current = best[company_id].get(keyword_index)
+                    if current is None or score > current[0]:
+                        best[company_id][keyword_index] = (score, term_id)
+
+        # Companies with the same best matches share one result dictionary (treat results as read-only)
+        results_by_matches = {}
+        results = {}
+        for company_id in self._company_terms:
+            matches = tuple(sorted(best[company_id].items())) if company_id in best else ()
+            if matches not in results_by_matches:
+                results_by_matches[matches] = self._company_result(keywords, dict(matches))
+            results[company_id] = results_by_matches[matches]
+        return results
+
+    def _company_result(self, keywords: List[str], best: Dict[int, Tuple[float, int]]) -> Dict:
+        """Turn one company's best keyword similarities into a quick-match style result."""
+        total_keywords = len(keywords)
+        matches = []
+        near_matches = []
+        for keyword_index, (score, term_id) in sorted(best.items()):
+            description = f"{keywords[keyword_index].lower().strip()} → {self._labels[term_id].lower().strip()} ({score:.2f})"
+            if score >= self.strong_similarity:
+                matches.append(description)
+            else:
+                near_matches.append(description)
+        match_count = len(matches)
+
+        if match_count == 0 and not near_matches:
+            return {
+                'confidence': 'no_match',
+                'matched': False,
+                'match_count': 0,
+                'reasoning': 'No keywords matched stored categories or segments'
+            }
+        if match_count and match_count >= total_keywords * STRONG_MATCH_KEYWORD_SHARE:
+            return {
+                'confidence': 'strong_match',
+                'matched': True,
+                'match_count': match_count,
+                'reasoning': f'{match_count}/{total_keywords} keywords matched (strong match): {matches}'
+            }
+        return {
+            'confidence': 'uncertain',
+            'matched': None,
+            'match_count': match_count,
+            'reasoning': f'Only {match_count}/{total_keywords} keywords matched - ambiguous, needs AI check: {matches + near_matches}'
+        }
+
+    def _refresh(self) -> None:
+        """
+        Bring postings (or term embeddings) up to date with the terms.
+        New terms are appended with the current IDF weights; IDF is recomputed
+        (full rebuild) once they exceed IDF_REBUILD_SHARE of the indexed terms.
+        """
+        new_terms = len(self._terms) - self._indexed_terms
+        if new_terms <= 0:
+            return
+
+        if self.embedding_model and self._load_encoder():
+            new_embeddings = self._encoder.encode(self._terms[self._indexed_terms:], normalize_embeddings=True)
+            if self._embeddings is None:
+                self._embeddings = new_embeddings
+            else:
+                import numpy
+                self._embeddings = numpy.vstack([self._embeddings, new_embeddings])
+            self._indexed_terms = len(self._terms)
+            return
+
+        if self._indexed_terms and new_terms <= self._indexed_terms * IDF_REBUILD_SHARE:
+            for term_id in range(self._indexed_terms, len(self._terms)):
+                for feature, weight in self._weighted(term_features(self._terms[term_id])).items():
+                    self._postings[feature].append((term_id, weight))
+            self._indexed_terms = len(self._terms)
+            return
+
+        term_features_list = [term_features(term) for term in self._terms]
+        document_frequency = defaultdict(int)
+        for features in term_features_list:
+            for feature in features:
+                document_frequency[feature] += 1
+        term_count = len(self._terms)
+        self._idf = {
+            feature: math.log((1 + term_count) / (1 + frequency)) + 1.0
+            for feature, frequency in document_frequency.items()
+        }
+        self._default_idf = math.log(1 + term_count) + 1.0  # Features no stored term has
+
+        self._postings = defaultdict(list)
+        for term_id, features in enumerate(term_features_list):
+            for feature, weight in self._weighted(features).items():
+                self._postings[feature].append((term_id, weight))
+        self._indexed_terms = term_count
+
+    def _weighted(self, features: Dict[str, float]) -> Dict[str, float]:
+        """Sublinear TF-IDF weights, L2-normalized."""
+        weights = {
+            feature: (1.0 + math.log(count)) * self._idf.get(feature, self._default_idf)
+            for feature, count in features.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {feature: weight / norm for feature, weight in weights.items()}
+
+    def _tfidf_similarities(self, keyword: str) -> Dict[int, float]:
+        """Cosine similarity of one keyword to every term sharing a feature with it."""
+        scores = defaultdict(float)
+        for feature, weight in self._weighted(term_features(keyword)).items():
+            for term_id, term_weight in self._postings.get(feature, ()):
+                scores[term_id] += weight * term_weight
+        return scores
+
+    def _embedding_similarities(self, keywords: List[str]) -> List[Dict[int, float]]:
+        """Cosine similarity of all keywords to all terms with one matrix product."""
+        if self._embeddings is None:
+            return [{} for _ in keywords]
+        keyword_embeddings = self._encoder.encode(keywords, normalize_embeddings=True)
+        matrix = keyword_embeddings @ self._embeddings.T
+        return [
+            {term_id: float(score) for term_id, score in enumerate(row)}
+            for row in matrix
+        ]
+
+    def _load_encoder(self) -> bool:
+        """Load the sentence-transformers model once; False (TF-IDF fallback) when unavailable."""
+        if self._encoder is not None:
+            return True
+        try:
+            from sentence_transformers import SentenceTransformer
+            self._encoder = SentenceTransformer(self.embedding_model, device="cpu")
+            logger.info(f"Keyword index using embedding model {self.embedding_model}")
+            return True
+        except Exception as e:
+            logger.warning(f"Embedding model {self.embedding_model} unavailable ({e}), using TF-IDF keyword matching")
+            self.embedding_model = ""
+            return False
+
+
+_shared_index: Optional[KeywordIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_keyword_index() -> KeywordIndex:
+    """
+    Get the process-wide keyword index (empty until OutputManager loads it).
+
+    Returns:
+        The shared KeywordIndex; check is_stale() before relying on its contents
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = KeywordIndex()
+        return _shared_index
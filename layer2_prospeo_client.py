@@ -7,16 +7,154 @@ import requests
 import time
 from typing import Dict, List, Optional
 import config
+from rate_limiter import TokenBucket, backoff_delay, get_rate_limiter, parse_retry_after
 from utils import build_prospeo_filters
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prospeo requires filters, so this minimal default is sent if none are provided
+DEFAULT_FILTERS = {"company_industry": {"include": ["Technology"]}}
+
+
+def _build_persons_page_payload(page: int, limit: int, filters: Optional[Dict]) -> Dict:
+    """Build the /search-person payload for a page of persons."""
+    payload = {
+        "page": page,
+        "limit": limit
+    }
+    
+    # Add filters if provided
+    if filters:
+        # Remove 'keywords' if present - Prospeo doesn't support it
+        if 'keywords' in filters:
+            logger.warning("Removing 'keywords' filter - not supported by Prospeo search-person endpoint")
+            filters = {k: v for k, v in filters.items() if k != 'keywords'}
+        
+        if filters:  # Only add if we have valid filters
+            payload["filters"] = filters
+        else:
+            # If only keywords were provided, use minimal default
+            payload["filters"] = DEFAULT_FILTERS
+    else:
+        # Prospeo requires filters, so add a minimal default if none provided
+        payload["filters"] = DEFAULT_FILTERS
+    
+    return payload
+
+
+def _build_persons_at_company_payload(
+    company_id: Optional[str],
+    company_name: Optional[str],
+    company_domain: Optional[str],
+    page: int,
+    limit: int,
+    additional_filters: Optional[Dict]
+) -> Dict:
+    """Build the /search-person payload for persons at one company."""
+    payload = {
+        "page": page,
+        "limit": limit
+    }
+    
+    # Build filters for company search
+    filters = {}
+    
+    # Add company filter (one of: company_id, company_name, company_domain)
+    if company_id:
+        filters['company_id'] = {"include": [company_id]}
+    elif company_name:
+        filters['company_name'] = {"include": [company_name]}
+    elif company_domain:
+        filters['company_domain'] = {"include": [company_domain]}
+    else:
+        raise ValueError("Must provide company_id, company_name, or company_domain")
+    
+    # Add additional filters (e.g., person_seniority)
+    if additional_filters:
+        filters.update(additional_filters)
+    
+    payload["filters"] = filters
+    return payload
+
+
+def _build_companies_page_payload(page: int, limit: int, filters: Optional[Dict]) -> Dict:
+    """Build the /search-company payload for a page of companies."""
+    payload = {
+        "page": page,
+        "limit": limit
+    }
+    
+    # Add filters if provided
+    if filters:
+        # /search-company expects company_keywords, not "keywords". Normalize so we never send "keywords".
+        f = dict(filters)
+        if 'keywords' in f:
+            logger.warning("Removing 'keywords' from filters for /search-company; use company_keywords only.")
+            kw_val = f.pop('keywords')
+            if 'company_keywords' not in f and kw_val:
+                f['company_keywords'] = kw_val if isinstance(kw_val, str) else ', '.join(kw_val) if isinstance(kw_val, (list, tuple)) else str(kw_val)
+        payload["filters"] = f
+    else:
+        # Prospeo requires filters, so add a minimal default if none provided
+        payload["filters"] = DEFAULT_FILTERS
+    
+    return payload
+
+
+def _normalize_companies_response(raw: Dict, page: int) -> Dict:
+    """
+    Convert a /search-company response to the {'data', 'meta'} shape used downstream.
+    
+    Prospeo /search-company returns 'results' and 'pagination', not 'data'/'meta'.
+    """
+    results = raw.get('results', raw.get('data', []))
+    pagination = raw.get('pagination', raw.get('meta', {}))
+    # Each result has a 'company' object; flatten so downstream gets id/name/industry etc. at top level
+    companies = []
+    for r in results:
+        c = r.get('company', r) if isinstance(r, dict) else r
+        if isinstance(c, dict):
+            companies.append(c)
+    total_pages = pagination.get('total_pages') or pagination.get('total_page') or pagination.get('totalPages') or 1
+    current = pagination.get('page') or pagination.get('current_page') or page
+    has_more = current < total_pages if total_pages else bool(companies)
+    meta = {'has_more': has_more, 'total_pages': total_pages, 'page': current, **pagination}
+    return {'data': companies, 'meta': meta}
+
+
+def _companies_filter_error_message(filter_error: str) -> str:
+    """Build the user-friendly message for a /search-company filter error."""
+    low = filter_error.lower()
+    if 'keyword' in low:
+        return (
+            f"❌ Prospeo API Error: {filter_error}\n\n"
+            f"**How to fix:**\n"
+            f"• Prospeo may not accept that exact keyword value. Try rephrasing (e.g. \"vape shops\" instead of \"vape\").\n"
+            f"• Or use only `industry=` and rely on AI to match keywords (e.g. `/lead-magnet industry=General Retail | our-company-details=\"...\"`)."
+        )
+    return (
+        f"❌ Prospeo API Error: {filter_error}\n\n"
+        f"**How to fix:**\n"
+        f"• Industry must match Prospeo's list *exactly* (e.g. \"General Retail\" not \"General\")\n"
+        f"• Full list: https://prospeo.io/api-docs/enum/industries\n"
+        f"• Case-sensitive"
+    )
+
+
+def get_prospeo_rate_limiter() -> TokenBucket:
+    """Return the token bucket shared by every Prospeo client in this process."""
+    return get_rate_limiter(
+        "prospeo",
+        rate=config.PROSPEO_RATE_LIMIT_PER_SECOND,
+        capacity=config.PROSPEO_RATE_LIMIT_BURST
+    )
+
 
 class ProspeoClient:
     """Client for interacting with Prospeo API."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, rate_limiter: TokenBucket = None):
         self.api_key = api_key or config.PROSPEO_API_KEY
         self.base_url = config.PROSPEO_BASE_URL
         self.search_person_endpoint = config.PROSPEO_SEARCH_PERSON_ENDPOINT
@@ -30,6 +168,61 @@ class ProspeoClient:
         self.session.proxies = {'http': None, 'https': None}
         # Also disable proxy from environment
         self.session.trust_env = False
+        # Keep-alive connections for the Layer 4 pipeline's concurrent workers. pool_maxsize is
+        # the connections kept per host; pool_connections is the number of host pools cached
+        # (Prospeo is one host). Extra concurrent requests open short-lived connections.
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.PROSPEO_MAX_KEEPALIVE_CONNECTIONS
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # All Prospeo endpoints draw from one shared quota
+        self.rate_limiter = rate_limiter or get_prospeo_rate_limiter()
+        self.max_retries = config.PROSPEO_MAX_RETRIES
+    
+    def _post(self, endpoint: str, payload: Dict) -> requests.Response:
+        """
+        POST to a Prospeo endpoint through the shared rate limiter.
+        
+        HTTP 429 responses are retried up to max_retries times, waiting for
+        Retry-After (or the rate-limit reset headers) when given, else capped
+        exponential backoff with jitter. The final response is returned either
+        way; callers use raise_for_status().
+        
+        Args:
+            endpoint: Full endpoint URL
+            payload: JSON payload
+        
+        Returns:
+            The HTTP response
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = self.session.post(
+                endpoint,
+                json=payload,
+                headers=self.headers,
+                timeout=30
+            )
+            self.rate_limiter.update_from_headers(response.headers)
+            
+            if response.status_code != 429 or attempt >= self.max_retries:
+                if response.status_code == 429:
+                    logger.error(f"Still rate limited after {self.max_retries} retries: {endpoint}")
+                return response
+            
+            delay = backoff_delay(
+                attempt,
+                base=config.PROSPEO_BACKOFF_BASE,
+                cap=config.PROSPEO_BACKOFF_MAX,
+                retry_after=parse_retry_after(response.headers)
+            )
+            # Hold back every other caller too, so the whole process respects the limit
+            self.rate_limiter.pause(delay)
+            attempt += 1
+            logger.warning(f"Rate limited (429). Retry {attempt}/{self.max_retries} in {delay:.1f}s")
     
     def fetch_persons_page(self, page: int = 1, limit: int = None, filters: Dict = None) -> Dict:
         """
@@ -44,36 +237,11 @@ class ProspeoClient:
             Dictionary containing 'data' (list of persons) and 'meta' (pagination info)
         """
         limit = limit or config.PROSPEO_BATCH_SIZE
-        
-        payload = {
-            "page": page,
-            "limit": limit
-        }
-        
-        # Add filters if provided
-        if filters:
-            # Remove 'keywords' if present - Prospeo doesn't support it
-            if 'keywords' in filters:
-                logger.warning("Removing 'keywords' filter - not supported by Prospeo search-person endpoint")
-                filters = {k: v for k, v in filters.items() if k != 'keywords'}
-            
-            if filters:  # Only add if we have valid filters
-                payload["filters"] = filters
-            else:
-                # If only keywords were provided, use minimal default
-                payload["filters"] = {"company_industry": {"include": ["Technology"]}}
-        else:
-            # Prospeo requires filters, so add a minimal default if none provided
-            payload["filters"] = {"company_industry": {"include": ["Technology"]}}
+        payload = _build_persons_page_payload(page, limit, filters)
         
         try:
             logger.info(f"Fetching Prospeo page {page} with filters: {payload.get('filters')}")
-            response = self.session.post(
-                self.search_person_endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._post(self.search_person_endpoint, payload)
             response.raise_for_status()
             
             data = response.json()
@@ -81,35 +249,30 @@ class ProspeoClient:
             return data
             
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:  # Rate limited
-                logger.warning("Rate limited. Waiting 60 seconds...")
-                time.sleep(60)
-                return self.fetch_persons_page(page, limit, filters)  # Retry
-            else:
-                # Log the actual error response for debugging
-                try:
-                    error_detail = response.json()
-                    logger.error(f"HTTP error fetching Prospeo page {page}: {e}")
-                    logger.error(f"Prospeo API error details: {error_detail}")
-                    
-                    # Extract and format user-friendly error message for industry/seniority errors
-                    if error_detail.get('error') and error_detail.get('filter_error'):
-                        filter_error = error_detail.get('filter_error')
-                        # Check if it's an industry-related error
-                        if 'company_industry' in filter_error.lower() or 'industry' in filter_error.lower():
-                            user_error = (
-                                f"❌ Prospeo API Error: {filter_error}\n\n"
-                                f"**How to fix:**\n"
-                                f"• Industry must match Prospeo's list *exactly* (e.g. \"General Retail\" not \"General\")\n"
-                                f"• Full list: https://prospeo.io/api-docs/enum/industries\n"
-                                f"• Case-sensitive"
-                            )
-                            error_detail['user_friendly_message'] = user_error
-                            
-                except:
-                    logger.error(f"HTTP error fetching Prospeo page {page}: {e}")
-                    logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
-                raise
+            # Log the actual error response for debugging
+            try:
+                error_detail = response.json()
+                logger.error(f"HTTP error fetching Prospeo page {page}: {e}")
+                logger.error(f"Prospeo API error details: {error_detail}")
+                
+                # Extract and format user-friendly error message for industry/seniority errors
+                if error_detail.get('error') and error_detail.get('filter_error'):
+                    filter_error = error_detail.get('filter_error')
+                    # Check if it's an industry-related error
+                    if 'company_industry' in filter_error.lower() or 'industry' in filter_error.lower():
+                        user_error = (
+                            f"❌ Prospeo API Error: {filter_error}\n\n"
+                            f"**How to fix:**\n"
+                            f"• Industry must match Prospeo's list *exactly* (e.g. \"General Retail\" not \"General\")\n"
+                            f"• Full list: https://prospeo.io/api-docs/enum/industries\n"
+                            f"• Case-sensitive"
+                        )
+                        error_detail['user_friendly_message'] = user_error
+                        
+            except:
+                logger.error(f"HTTP error fetching Prospeo page {page}: {e}")
+                logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error fetching Prospeo page {page}: {e}")
             raise
@@ -174,39 +337,13 @@ class ProspeoClient:
             Dictionary containing 'data' (list of persons) and 'meta' (pagination info)
         """
         limit = limit or config.PROSPEO_BATCH_SIZE
-        
-        payload = {
-            "page": page,
-            "limit": limit
-        }
-        
-        # Build filters for company search
-        filters = {}
-        
-        # Add company filter (one of: company_id, company_name, company_domain)
-        if company_id:
-            filters['company_id'] = {"include": [company_id]}
-        elif company_name:
-            filters['company_name'] = {"include": [company_name]}
-        elif company_domain:
-            filters['company_domain'] = {"include": [company_domain]}
-        else:
-            raise ValueError("Must provide company_id, company_name, or company_domain")
-        
-        # Add additional filters (e.g., person_seniority)
-        if additional_filters:
-            filters.update(additional_filters)
-        
-        payload["filters"] = filters
+        payload = _build_persons_at_company_payload(
+            company_id, company_name, company_domain, page, limit, additional_filters
+        )
         
         try:
             logger.info(f"Fetching persons at company (ID: {company_id}, Name: {company_name}) with filters: {additional_filters}")
-            response = self.session.post(
-                self.search_person_endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._post(self.search_person_endpoint, payload)
             response.raise_for_status()
             
             data = response.json()
@@ -215,19 +352,14 @@ class ProspeoClient:
             return data
             
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:  # Rate limited
-                logger.warning("Rate limited. Waiting 60 seconds...")
-                time.sleep(60)
-                return self.fetch_persons_at_company(company_id, company_name, company_domain, page, limit, additional_filters)
-            else:
-                try:
-                    error_detail = response.json()
-                    logger.error(f"HTTP error fetching persons at company: {e}")
-                    logger.error(f"Prospeo API error details: {error_detail}")
-                except:
-                    logger.error(f"HTTP error fetching persons at company: {e}")
-                    logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
-                raise
+            try:
+                error_detail = response.json()
+                logger.error(f"HTTP error fetching persons at company: {e}")
+                logger.error(f"Prospeo API error details: {error_detail}")
+            except:
+                logger.error(f"HTTP error fetching persons at company: {e}")
+                logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error fetching persons at company: {e}")
             raise
@@ -249,92 +381,33 @@ class ProspeoClient:
             Dictionary containing 'data' (list of companies) and 'meta' (pagination info)
         """
         limit = limit or config.PROSPEO_BATCH_SIZE
-        
-        payload = {
-            "page": page,
-            "limit": limit
-        }
-        
-        # Add filters if provided
-        if filters:
-            # /search-company expects company_keywords, not "keywords". Normalize so we never send "keywords".
-            f = dict(filters)
-            if 'keywords' in f:
-                logger.warning("Removing 'keywords' from filters for /search-company; use company_keywords only.")
-                kw_val = f.pop('keywords')
-                if 'company_keywords' not in f and kw_val:
-                    f['company_keywords'] = kw_val if isinstance(kw_val, str) else ', '.join(kw_val) if isinstance(kw_val, (list, tuple)) else str(kw_val)
-            payload["filters"] = f
-        else:
-            # Prospeo requires filters, so add a minimal default if none provided
-            payload["filters"] = {"company_industry": {"include": ["Technology"]}}
+        payload = _build_companies_page_payload(page, limit, filters)
         
         try:
             logger.info(f"Fetching companies page {page} with filters: {payload.get('filters')}")
-            response = self.session.post(
-                self.search_company_endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._post(self.search_company_endpoint, payload)
             response.raise_for_status()
             
-            raw = response.json()
-            # Prospeo /search-company returns 'results' and 'pagination', not 'data'/'meta'
-            results = raw.get('results', raw.get('data', []))
-            pagination = raw.get('pagination', raw.get('meta', {}))
-            # Each result has a 'company' object; flatten so downstream gets id/name/industry etc. at top level
-            companies = []
-            for r in results:
-                c = r.get('company', r) if isinstance(r, dict) else r
-                if isinstance(c, dict):
-                    companies.append(c)
-            total_pages = pagination.get('total_pages') or pagination.get('total_page') or pagination.get('totalPages') or 1
-            current = pagination.get('page') or pagination.get('current_page') or page
-            has_more = current < total_pages if total_pages else bool(companies)
-            meta = {'has_more': has_more, 'total_pages': total_pages, 'page': current, **pagination}
-            data = {'data': companies, 'meta': meta}
-            logger.info(f"Successfully fetched {len(companies)} companies from page {page}")
+            data = _normalize_companies_response(response.json(), page)
+            logger.info(f"Successfully fetched {len(data['data'])} companies from page {page}")
             return data
             
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:  # Rate limited
-                logger.warning("Rate limited. Waiting 60 seconds...")
-                time.sleep(60)
-                return self.fetch_companies_page(page, limit, filters)  # Retry
-            else:
-                # Log the actual error response for debugging
-                try:
-                    error_detail = response.json()
-                    logger.error(f"HTTP error fetching companies page {page}: {e}")
-                    logger.error(f"Prospeo API error details: {error_detail}")
+            # Log the actual error response for debugging
+            try:
+                error_detail = response.json()
+                logger.error(f"HTTP error fetching companies page {page}: {e}")
+                logger.error(f"Prospeo API error details: {error_detail}")
+                
+                # Extract and format user-friendly error message
+                if error_detail.get('error') and error_detail.get('filter_error'):
+                    # Store in error_detail for potential Slack notification
+                    error_detail['user_friendly_message'] = _companies_filter_error_message(error_detail.get('filter_error'))
                     
-                    # Extract and format user-friendly error message
-                    if error_detail.get('error') and error_detail.get('filter_error'):
-                        filter_error = error_detail.get('filter_error')
-                        low = filter_error.lower()
-                        if 'keyword' in low:
-                            user_error = (
-                                f"❌ Prospeo API Error: {filter_error}\n\n"
-                                f"**How to fix:**\n"
-                                f"• Prospeo may not accept that exact keyword value. Try rephrasing (e.g. \"vape shops\" instead of \"vape\").\n"
-                                f"• Or use only `industry=` and rely on AI to match keywords (e.g. `/lead-magnet industry=General Retail | our-company-details=\"...\"`)."
-                            )
-                        else:
-                            user_error = (
-                                f"❌ Prospeo API Error: {filter_error}\n\n"
-                                f"**How to fix:**\n"
-                                f"• Industry must match Prospeo's list *exactly* (e.g. \"General Retail\" not \"General\")\n"
-                                f"• Full list: https://prospeo.io/api-docs/enum/industries\n"
-                                f"• Case-sensitive"
-                            )
-                        # Store in error_detail for potential Slack notification
-                        error_detail['user_friendly_message'] = user_error
-                        
-                except:
-                    logger.error(f"HTTP error fetching companies page {page}: {e}")
-                    logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
-                raise
+            except:
+                logger.error(f"HTTP error fetching companies page {page}: {e}")
+                logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error fetching companies page {page}: {e}")
             raise
@@ -349,7 +422,7 @@ class ProspeoClient:
         Returns:
             Dictionary containing enriched person data including email
         """
-        enrich_endpoint = f"{self.base_url}/enrich-person"
+        enrich_endpoint = config.PROSPEO_ENRICH_PERSON_ENDPOINT
         
         payload = {
             "person_id": person_id
@@ -357,12 +430,7 @@ class ProspeoClient:
         
         try:
             logger.info(f"Enriching person ID: {person_id}")
-            response = self.session.post(
-                enrich_endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._post(enrich_endpoint, payload)
             response.raise_for_status()
             
             data = response.json()
@@ -370,19 +438,14 @@ class ProspeoClient:
             return data
             
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:  # Rate limited
-                logger.warning("Rate limited during enrichment. Waiting 60 seconds...")
-                time.sleep(60)
-                return self.enrich_person(person_id)  # Retry
-            else:
-                try:
-                    error_detail = response.json()
-                    logger.error(f"HTTP error enriching person {person_id}: {e}")
-                    logger.error(f"Prospeo API error details: {error_detail}")
-                except:
-                    logger.error(f"HTTP error enriching person {person_id}: {e}")
-                    logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
-                raise
+            try:
+                error_detail = response.json()
+                logger.error(f"HTTP error enriching person {person_id}: {e}")
+                logger.error(f"Prospeo API error details: {error_detail}")
+            except:
+                logger.error(f"HTTP error enriching person {person_id}: {e}")
+                logger.error(f"Response status: {response.status_code}, Response text: {response.text[:500]}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error enriching person {person_id}: {e}")
             raise
@@ -2,35 +2,342 @@
 Layer 3: AI Judge (Qualification)
 Uses OpenRouter API to qualify leads based on company description and criteria.
 Includes website scraping for better analysis.
+
+Calls are blocking and thread-safe: Layer 4's qualify stage judges many companies
+at once from its worker threads (PIPELINE_QUALIFY_WORKERS). Every call shares one
+OpenRouter token bucket and backs off on HTTP 429, and verdicts for identical
+prompts are reused from the persistent verdict cache.
+
+With AI_COMBINED_QUALIFICATION (or combined_mode=True) both checks are answered
+by one structured call per company, so the company context is sent once.
+
+check_wholesale_partner_types() runs Check #1 for many companies with one request
+per WHOLESALE_BATCH_SIZE companies, so the instruction block is sent once per batch.
+
+Scraped content is fitted to a per-check token budget (prompt_builder) before it
+goes into a prompt, and prompt/completion tokens are recorded for every call.
+
+With HEURISTIC_PRECLASSIFIER, Check #1 is decided locally (heuristic_classifier) when
+the scraped brand/navigation signals are clear; only ambiguous companies are sent.
+
+With AI_STRUCTURED_OUTPUT the checks request JSON-schema output (RESPONSE_SCHEMAS),
+so verdict fields are typed; free-text replies are parsed strictly as a fallback.
 """
+import json
 import logging
 import os
+import threading
+import openai
 from openai import OpenAI
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import config
+from heuristic_classifier import classify_wholesale_partner, format_heuristic_response
+from prompt_builder import content_budget, count_message_tokens, fit_scraped_content
+from rate_limiter import TokenBucket, backoff_delay, get_rate_limiter, parse_retry_after
 from utils import extract_person_and_company_data
+from verdict_cache import VerdictCache, get_verdict_cache, prompt_key
 from website_scraper import WebsiteScraper
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+WHOLESALE_SYSTEM_PROMPT = "You are a wholesale partner type classifier. Determine if a company is a multi-brand retailer/reseller (YES) or a manufacturer who only sells their own products (NO). Respond with ONLY 'YES' or 'NO'."
+KEYWORD_SYSTEM_PROMPT = "You are a product/industry fit classifier. Analyze if a company's product categories align with the target keywords/industries. Respond with VERDICT: YES or NO, plus PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING and EVIDENCE as specified in the prompt."
+WHOLESALE_MAX_TOKENS = 5
+KEYWORD_MAX_TOKENS = 300  # Increased for PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING and EVIDENCE
+COMBINED_SYSTEM_PROMPT = "You are a wholesale partner and product/industry fit classifier. Determine if a company is a multi-brand retailer/reseller and if its product categories align with the target keywords/industries. Respond with WHOLESALE_VERDICT: YES or NO, KEYWORD_VERDICT: YES or NO, plus PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING and EVIDENCE as specified in the prompt."
+COMBINED_MAX_TOKENS = 320  # Check #2 output plus one extra verdict line
+WHOLESALE_BATCH_SYSTEM_PROMPT = "You are a wholesale partner type classifier. For each numbered company, determine if it is a multi-brand retailer/reseller (YES) or a manufacturer who only sells their own products (NO). Respond with ONLY one '<number>: YES' or '<number>: NO' line per company."
+# Completion tokens per company in a batch ("12: YES" line, or one JSON verdict object)
+WHOLESALE_BATCH_TOKENS_PER_COMPANY = 6
+# Verdict cache namespace for answers taken from a batched prompt (kept apart from single-check answers)
+WHOLESALE_BATCH_CACHE_NAMESPACE = "wholesale-batch"
+
+# JSON-schema structured output (AI_STRUCTURED_OUTPUT): typed verdict fields instead of free text
+VERDICT_SCHEMA = {"type": "string", "enum": ["YES", "NO"]}
+STRING_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+RESPONSE_SCHEMAS = {
+    "wholesale": {
+        "type": "object",
+        "properties": {"verdict": VERDICT_SCHEMA},
+        "required": ["verdict"],
+        "additionalProperties": False
+    },
+    "keyword": {
+        "type": "object",
+        "properties": {
+            "verdict": VERDICT_SCHEMA,
+            "product_categories": STRING_LIST_SCHEMA,
+            "market_segments": STRING_LIST_SCHEMA,
+            "reasoning": {"type": "string"},
+            "evidence": {"type": "string"}
+        },
+        "required": ["verdict", "product_categories", "market_segments", "reasoning", "evidence"],
+        "additionalProperties": False
+    },
+    "wholesale_batch": {
+        "type": "object",
+        "properties": {
+            "verdicts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"company": {"type": "string"}, "verdict": VERDICT_SCHEMA},
+                    "required": ["company", "verdict"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["verdicts"],
+        "additionalProperties": False
+    },
+    "combined": {
+        "type": "object",
+        "properties": {
+            "wholesale_verdict": VERDICT_SCHEMA,
+            "keyword_verdict": VERDICT_SCHEMA,
+            "product_categories": STRING_LIST_SCHEMA,
+            "market_segments": STRING_LIST_SCHEMA,
+            "reasoning": {"type": "string"},
+            "evidence": {"type": "string"}
+        },
+        "required": ["wholesale_verdict", "keyword_verdict", "product_categories", "market_segments", "reasoning", "evidence"],
+        "additionalProperties": False
+    }
+}
+# JSON keys and quoting take a few more tokens than the text format
+STRUCTURED_MAX_TOKENS = {"wholesale": 20, "keyword": 350, "combined": 370}
+STRUCTURED_BATCH_TOKENS_PER_COMPANY = 16
+
+
+def get_openrouter_rate_limiter() -> TokenBucket:
+    """Return the token bucket shared by every OpenRouter call in this process."""
+    return get_rate_limiter(
+        "openrouter",
+        rate=config.OPENROUTER_RATE_LIMIT_PER_SECOND,
+        capacity=config.OPENROUTER_RATE_LIMIT_BURST
+    )
+
+
+def _company_id(company_data: Dict) -> Optional[str]:
+    """Prospeo company ID (search results use 'id', some records 'company_id')."""
+    return company_data.get('id') or company_data.get('company_id')
+
+
+def _chat_messages(system_prompt: str, prompt: str) -> List[Dict]:
+    """Build the system + user message list for a check."""
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+def _structured_output_kwargs(response_format: Optional[Dict]) -> Dict:
+    """Extra completion arguments for structured output (none for plain text)."""
+    if response_format is None:
+        return {}
+    # Route only to OpenRouter providers that honour response_format
+    return {"response_format": response_format, "extra_body": {"provider": {"require_parameters": True}}}
+
+
+def _rate_limit_delay(error: "openai.RateLimitError", attempt: int) -> float:
+    """Delay before retrying a 429: Retry-After when OpenRouter sends it, else capped backoff with jitter."""
+    headers = error.response.headers if getattr(error, 'response', None) is not None else {}
+    return backoff_delay(
+        attempt,
+        base=config.OPENROUTER_BACKOFF_BASE,
+        cap=config.OPENROUTER_BACKOFF_MAX,
+        retry_after=parse_retry_after(headers)
+    )
+
 
 class AIQualifier:
     """AI-powered lead qualifier using OpenRouter."""
     
-    def __init__(self, api_key: str = None, model: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = None,
+        rate_limiter: TokenBucket = None,
+        verdict_cache: Optional[VerdictCache] = None,
+        combined_mode: bool = None,
+        structured_output: bool = None,
+        heuristic_preclassifier: bool = None
+    ):
         self.api_key = api_key or config.OPENROUTER_API_KEY
         self.model = model or config.OPENROUTER_MODEL
         self.base_url = config.OPENROUTER_BASE_URL
+        self.max_retries = config.OPENROUTER_MAX_RETRIES
+        # One structured call for both checks instead of two (see check_combined)
+        self.combined_mode = config.AI_COMBINED_QUALIFICATION if combined_mode is None else combined_mode
+        # JSON-schema responses (see RESPONSE_SCHEMAS); text responses are still parsed as a fallback
+        self.structured_output = config.AI_STRUCTURED_OUTPUT if structured_output is None else structured_output
+        # Decide clear-cut Check #1 cases from scraped signals without an AI call (see _heuristic_verdict)
+        self.heuristic_preclassifier = (
+            config.HEURISTIC_PRECLASSIFIER if heuristic_preclassifier is None else heuristic_preclassifier
+        )
+        # Shared by every thread and AIQualifier, so the whole process stays under the limit
+        self.rate_limiter = rate_limiter or get_openrouter_rate_limiter()
         
         # Initialize OpenAI client configured for OpenRouter
+        # (429 retries are handled here so they also pause the shared rate limiter)
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            max_retries=0
         )
         
         # Initialize website scraper
         self.scraper = WebsiteScraper()
+        
+        # Verdicts for identical prompts are reused across runs (temperature 0, deterministic prompts)
+        self.verdict_cache = verdict_cache if verdict_cache is not None else get_verdict_cache()
+        self._stats_lock = threading.Lock()
+        self.verdict_cache_hits = 0
+        self.verdict_cache_misses = 0
+        self.ai_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.heuristic_decisions = 0
+    
+    def reset_run_stats(self):
+        """Reset per-run counters (call at the start of a run)."""
+        with self._stats_lock:
+            self.verdict_cache_hits = 0
+            self.verdict_cache_misses = 0
+            self.ai_requests = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.heuristic_decisions = 0
+    
+    def get_run_stats(self) -> Dict[str, int]:
+        """
+        Return AI call statistics for the current run.
+        
+        Returns:
+            Dictionary with verdict_cache_hits (checks answered from the cache),
+            verdict_cache_misses (checks sent to OpenRouter), ai_requests
+            (completion requests sent; a batch counts once), prompt_tokens /
+            completion_tokens summed over those requests, and heuristic_decisions
+            (Check #1 verdicts decided locally without an AI call)
+        """
+        with self._stats_lock:
+            return {
+                'verdict_cache_hits': self.verdict_cache_hits,
+                'verdict_cache_misses': self.verdict_cache_misses,
+                'ai_requests': self.ai_requests,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'heuristic_decisions': self.heuristic_decisions
+            }
+    
+    def _output_options(
+        self,
+        check: str,
+        text_max_tokens: int,
+        structured_max_tokens: int = None
+    ) -> Tuple[int, Optional[Dict]]:
+        """Return (max_tokens, response_format) for a check: its JSON schema in structured mode, else plain text."""
+        if not self.structured_output:
+            return text_max_tokens, None
+        return structured_max_tokens or STRUCTURED_MAX_TOKENS[check], {
+            "type": "json_schema",
+            "json_schema": {"name": f"{check}_check", "strict": True, "schema": RESPONSE_SCHEMAS[check]}
+        }
+    
+    def _cached_verdict(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        response_format: Optional[Dict] = None,
+        namespaces: Tuple[Optional[str], ...] = (None,)
+    ) -> Optional[Dict]:
+        """
+        Look up a cached response for these exact messages (errors count as a miss).
+        
+        namespaces are tried in order (None = the single-check entry); one lookup counts once in the stats.
+        """
+        cached = None
+        if self.verdict_cache is not None:
+            try:
+                for namespace in namespaces:
+                    cached = self.verdict_cache.get(prompt_key(self.model, messages, max_tokens, response_format, namespace))
+                    if cached:
+                        break
+            except Exception as e:
+                logger.warning(f"Verdict cache read failed: {e}")
+        with self._stats_lock:
+            if cached:
+                self.verdict_cache_hits += 1
+            else:
+                self.verdict_cache_misses += 1
+        return cached
+    
+    def _store_verdict(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        response_text: str,
+        passed: bool,
+        response_format: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> None:
+        """Store a successful check's raw response and verdict (errors are logged, never raised)."""
+        if self.verdict_cache is None:
+            return
+        try:
+            self.verdict_cache.put(
+                prompt_key(self.model, messages, max_tokens, response_format, namespace),
+                self.model,
+                response_text,
+                {'passed': passed}
+            )
+        except Exception as e:
+            logger.warning(f"Verdict cache write failed: {e}")
+    
+    def _create_completion(self, messages: List[Dict], max_tokens: int, response_format: Optional[Dict] = None) -> str:
+        """
+        Run a chat completion through the shared rate limiter and return the stripped text.
+        HTTP 429 is retried up to max_retries times (Retry-After, else capped backoff with jitter).
+        """
+        with self._stats_lock:
+            self.ai_requests += 1
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.0,
+                    **_structured_output_kwargs(response_format)
+                )
+                self._record_usage(messages, response)
+                return response.choices[0].message.content.strip()
+            except openai.RateLimitError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = _rate_limit_delay(e, attempt)
+                self.rate_limiter.pause(delay)
+                attempt += 1
+                logger.warning(f"OpenRouter rate limited (429). Retry {attempt}/{self.max_retries} in {delay:.1f}s")
+    
+    def _record_usage(self, messages: List[Dict], response) -> None:
+        """Add a call's prompt and completion tokens to the run stats (estimated if the API omits usage)."""
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) or count_message_tokens(messages)
+        completion_tokens = getattr(usage, 'completion_tokens', None) or 0
+        with self._stats_lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        logger.debug(f"OpenRouter call: {prompt_tokens} prompt tokens, {completion_tokens} completion tokens")
     
     def check_wholesale_partner_type(
         self,
@@ -48,39 +355,18 @@ class AIQualifier:
         Returns:
             Tuple of (is_wholesale_partner: bool, response_text: str)
         """
-        from utils import format_wholesale_partner_prompt
+        heuristic = self._heuristic_verdict(company_data, scraped_content)
+        if heuristic:
+            return heuristic
         
-        # Format the wholesale partner check prompt
-        prompt = format_wholesale_partner_prompt(
-            company_data=company_data,
-            scraped_content=scraped_content
-        )
+        messages = self._wholesale_messages(company_data, scraped_content)
+        max_tokens, response_format = self._output_options("wholesale", WHOLESALE_MAX_TOKENS)
         
         try:
-            logger.debug(f"Wholesale check: {company_data.get('name', 'Unknown')}")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a wholesale partner type classifier. Determine if a company is a multi-brand retailer/reseller (YES) or a manufacturer who only sells their own products (NO). Respond with ONLY 'YES' or 'NO'."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=5,
-                temperature=0.0
-            )
-            
-            response_text = response.choices[0].message.content.strip().upper()
-            is_wholesale_partner = "YES" in response_text
-            
-            logger.info(f"Wholesale check for {company_data.get('name')}: {response_text}")
-            
-            return is_wholesale_partner, response_text
+            cached = self._cached_verdict(messages, max_tokens, response_format)
+            if cached:
+                return self._wholesale_verdict(company_data, cached['response'], cached=True)
+            return self._request_wholesale_verdict(company_data, messages, max_tokens, response_format)
             
         except Exception as e:
             logger.error(f"Error in wholesale partner check: {e}")
@@ -88,6 +374,175 @@ class AIQualifier:
             # If you see "Error: 401" or "Unauthorized" there, OpenRouter auth failed (check OPENROUTER_API_KEY).
             return False, f"Error: {str(e)}"
     
+    def _request_wholesale_verdict(
+        self,
+        company_data: Dict,
+        messages: List[Dict],
+        max_tokens: int,
+        response_format: Optional[Dict]
+    ) -> Tuple[bool, str]:
+        """Send Check #1 for one company (cache already missed) and cache the verdict."""
+        logger.debug(f"Wholesale check: {company_data.get('name', 'Unknown')}")
+        response_text = self._create_completion(messages, max_tokens, response_format)
+        is_wholesale_partner, response_text = self._wholesale_verdict(company_data, response_text)
+        self._store_verdict(messages, max_tokens, response_text, is_wholesale_partner, response_format)
+        return is_wholesale_partner, response_text
+    
+    def check_wholesale_partner_types(
+        self,
+        companies: List[Dict],
+        scraped_contents: Optional[Dict[str, Optional[str]]] = None,
+        batch_size: int = None
+    ) -> Dict[str, Tuple[bool, str]]:
+        """
+        Batched Check #1: classify many companies with one request per batch.
+        
+        Companies the heuristic pre-classifier decides, or with a cached verdict
+        (single-check or earlier batch), are not sent. Batch verdicts are cached in
+        the "wholesale-batch" namespace of each company's single-check key, so a
+        single check never reuses an answer its own prompt did not produce.
+        Companies a batch response omits (or a failed batch) fall back to
+        check_wholesale_partner_type().
+        
+        Args:
+            companies: Company information dictionaries (each with an 'id')
+            scraped_contents: Optional scraped website content by company ID
+            batch_size: Companies per request (default: WHOLESALE_BATCH_SIZE)
+        
+        Returns:
+            Dictionary of company ID -> (is_wholesale_partner: bool, response_text: str)
+        """
+        from utils import format_wholesale_partner_batch_prompt, parse_wholesale_batch_response
+        
+        batch_size = max(1, batch_size or config.WHOLESALE_BATCH_SIZE)
+        scraped_contents = scraped_contents or {}
+        max_tokens, response_format = self._output_options("wholesale", WHOLESALE_MAX_TOKENS)
+        results = {}
+        pending = []
+        
+        for company_data in companies:
+            company_id = _company_id(company_data)
+            heuristic = self._heuristic_verdict(company_data, scraped_contents.get(company_id))
+            if heuristic:
+                results[company_id] = heuristic
+                continue
+            single_messages = self._wholesale_messages(company_data, scraped_contents.get(company_id))
+            cached = self._cached_verdict(single_messages, max_tokens, response_format, (None, WHOLESALE_BATCH_CACHE_NAMESPACE))
+            if cached:
+                results[company_id] = self._wholesale_verdict(company_data, cached['response'], cached=True)
+            else:
+                pending.append((company_data, single_messages))
+        
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            if len(batch) < 2:
+                break  # A single company goes through the single-call fallback below
+            
+            numbers = [str(number) for number in range(1, len(batch) + 1)]
+            prompt = format_wholesale_partner_batch_prompt([
+                (
+                    number,
+                    company_data,
+                    fit_scraped_content(scraped_contents.get(_company_id(company_data)), content_budget("wholesale"), "wholesale")
+                )
+                for number, (company_data, _) in zip(numbers, batch)
+            ])
+            batch_max_tokens, batch_format = self._output_options(
+                "wholesale_batch",
+                WHOLESALE_BATCH_TOKENS_PER_COMPANY * len(batch) + 10,
+                STRUCTURED_BATCH_TOKENS_PER_COMPANY * len(batch) + 10
+            )
+            try:
+                response_text = self._create_completion(
+                    _chat_messages(WHOLESALE_BATCH_SYSTEM_PROMPT, prompt), batch_max_tokens, batch_format
+                )
+            except Exception as e:
+                logger.error(f"Error in batched wholesale partner check ({len(batch)} companies): {e}")
+                continue
+            
+            verdicts = parse_wholesale_batch_response(response_text, numbers)
+            logger.info(f"Batched wholesale check: {len(verdicts)}/{len(batch)} verdicts in one request")
+            for number, (company_data, single_messages) in zip(numbers, batch):
+                if number not in verdicts:
+                    continue
+                # This company's verdict in the single-check response format, so it parses like one
+                verdict_text = 'YES' if verdicts[number] else 'NO'
+                if response_format:
+                    verdict_text = json.dumps({'verdict': verdict_text})
+                results[_company_id(company_data)] = self._wholesale_verdict(company_data, verdict_text)
+                self._store_verdict(
+                    single_messages, max_tokens, verdict_text, verdicts[number], response_format,
+                    namespace=WHOLESALE_BATCH_CACHE_NAMESPACE
+                )
+        
+        # Single calls for companies the batches did not answer
+        for company_data, single_messages in pending:
+            company_id = _company_id(company_data)
+            if company_id in results:
+                continue
+            try:
+                results[company_id] = self._request_wholesale_verdict(
+                    company_data, single_messages, max_tokens, response_format
+                )
+            except Exception as e:
+                logger.error(f"Error in wholesale partner check: {e}")
+                results[company_id] = (False, f"Error: {str(e)}")
+        
+        return results
+    
+    def _heuristic_verdict(
+        self,
+        company_data: Dict,
+        scraped_content: Optional[str],
+        decide_yes: bool = True
+    ) -> Optional[Tuple[bool, str]]:
+        """
+        Decide Check #1 locally when the scraped signals are clear.
+        
+        Args:
+            company_data: Company information dictionary
+            scraped_content: Formatted scraped website content
+            decide_yes: False to only settle clear NOs (combined mode still needs the call for a YES)
+        
+        Returns:
+            (is_wholesale_partner, response_text) for a high-confidence YES/NO,
+            or None when the pre-classifier is off or the company is ambiguous
+        """
+        if not self.heuristic_preclassifier or not scraped_content:
+            return None
+        result = classify_wholesale_partner(scraped_content)
+        if result['decision'] is None or (result['decision'] and not decide_yes):
+            return None
+        
+        with self._stats_lock:
+            self.heuristic_decisions += 1
+        response_text = format_heuristic_response(result)
+        logger.info(f"Wholesale check for {company_data.get('name')}: {'YES' if result['decision'] else 'NO'} (heuristic, score {result['score']:.1f})")
+        return result['decision'], response_text
+    
+    def _wholesale_messages(self, company_data: Dict, scraped_content: Optional[str]) -> List[Dict]:
+        """Build the chat messages for Check #1."""
+        from utils import format_wholesale_partner_prompt
+        
+        # Format the wholesale partner check prompt
+        prompt = format_wholesale_partner_prompt(
+            company_data=company_data,
+            scraped_content=fit_scraped_content(scraped_content, content_budget("wholesale"), "wholesale")
+        )
+        return _chat_messages(WHOLESALE_SYSTEM_PROMPT, prompt)
+    
+    def _wholesale_verdict(self, company_data: Dict, response_text: str, cached: bool = False) -> Tuple[bool, str]:
+        """Turn the Check #1 response (JSON, or text as a strict fallback) into (is_wholesale_partner, response_text)."""
+        from utils import parse_wholesale_check_response
+        
+        # Only a YES verdict passes ("NO ... YES" in free text no longer counts as YES)
+        is_wholesale_partner = parse_wholesale_check_response(response_text)['is_wholesale_partner']
+        
+        logger.info(f"Wholesale check for {company_data.get('name')}: {'YES' if is_wholesale_partner else 'NO'}{' (cached)' if cached else ''}")
+        logger.debug(f"Full AI response: {response_text}")
+        
+        return is_wholesale_partner, response_text
+    
     def check_keyword_match(
         self,
         company_data: Dict,
@@ -109,70 +564,168 @@ class AIQualifier:
             Tuple of (matches_keywords: bool, response_text: str)
             Note: response_text will contain structured output with PRODUCT_CATEGORIES and MARKET_SEGMENTS
         """
-        from utils import format_keyword_match_prompt, parse_keyword_check_response
+        messages = self._keyword_messages(company_data, keywords, scraped_content, our_company_details)
+        max_tokens, response_format = self._output_options("keyword", KEYWORD_MAX_TOKENS)
+        
+        try:
+            cached = self._cached_verdict(messages, max_tokens, response_format)
+            if cached:
+                return self._keyword_verdict(company_data, keywords, cached['response'], cached=True)
+            
+            logger.debug(f"Keyword check: {company_data.get('name', 'Unknown')} for keywords: {keywords}")
+            response_text = self._create_completion(messages, max_tokens, response_format)
+            matches_keywords, response_text = self._keyword_verdict(company_data, keywords, response_text)
+            self._store_verdict(messages, max_tokens, response_text, matches_keywords, response_format)
+            return matches_keywords, response_text
+            
+        except Exception as e:
+            logger.error(f"Error in keyword match check: {e}")
+            # This string is stored in Supabase as openrouter_response. "Error: 401" there means OpenRouter auth failed.
+            return False, f"Error: {str(e)}"
+    
+    def _keyword_messages(
+        self,
+        company_data: Dict,
+        keywords: list,
+        scraped_content: Optional[str],
+        our_company_details: Optional[str]
+    ) -> List[Dict]:
+        """Build the chat messages for Check #2."""
+        from utils import format_keyword_match_prompt
         
         # Format the keyword match prompt
         prompt = format_keyword_match_prompt(
             company_data=company_data,
             keywords=keywords,
-            scraped_content=scraped_content,
+            scraped_content=fit_scraped_content(scraped_content, content_budget("keyword"), "keyword"),
             our_company_details=our_company_details
         )
+        return _chat_messages(KEYWORD_SYSTEM_PROMPT, prompt)
+    
+    def _keyword_verdict(
+        self,
+        company_data: Dict,
+        keywords: list,
+        response_text: str,
+        cached: bool = False
+    ) -> Tuple[bool, str]:
+        """Turn the Check #2 response into (matches_keywords, response_text)."""
+        from utils import parse_keyword_check_response
+        
+        # Parse structured response
+        parsed_response = parse_keyword_check_response(response_text)
+        matches_keywords = parsed_response['matches_keywords']
+        
+        logger.info(f"Keyword check for {company_data.get('name')}: {matches_keywords} (keywords: {keywords}){' (cached)' if cached else ''}")
+        logger.debug(f"Full AI response: {response_text}")
+        logger.debug(f"Parsed categories: {parsed_response.get('product_categories')}")
+        logger.debug(f"Parsed segments: {parsed_response.get('market_segments')}")
+        
+        return matches_keywords, response_text
+    
+    def check_combined(
+        self,
+        company_data: Dict,
+        keywords: list,
+        scraped_content: Optional[str] = None,
+        our_company_details: str = None
+    ) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        Answer Check #1 and Check #2 with a single AI call.
+        The company context and scraped content are sent once.
+        
+        Args:
+            company_data: Company information dictionary
+            keywords: List of keywords to match against
+            scraped_content: Scraped website content (optional)
+            our_company_details: Description of our company and products (optional)
+        
+        Returns:
+            Tuple of (is_wholesale_partner: bool, wholesale_response: str, parsed_keyword_response: dict or None)
+            where parsed_keyword_response has the same keys as parse_keyword_check_response()
+            (None when the call failed)
+        """
+        messages = self._combined_messages(company_data, keywords, scraped_content, our_company_details)
+        max_tokens, response_format = self._output_options("combined", COMBINED_MAX_TOKENS)
         
         try:
-            logger.debug(f"Keyword check: {company_data.get('name', 'Unknown')} for keywords: {keywords}")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a product/industry fit classifier. Analyze if a company's product categories align with the target keywords/industries. Respond with VERDICT: YES or NO, plus PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING and EVIDENCE as specified in the prompt."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=300,  # Increased for PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING and EVIDENCE
-                temperature=0.0
-            )
+            cached = self._cached_verdict(messages, max_tokens, response_format)
+            if cached:
+                return self._combined_verdict(company_data, keywords, cached['response'], cached=True)
             
-            response_text = response.choices[0].message.content.strip()
-            
-            # Parse structured response
-            parsed_response = parse_keyword_check_response(response_text)
-            matches_keywords = parsed_response['matches_keywords']
-            
-            logger.info(f"Keyword check for {company_data.get('name')}: {matches_keywords} (keywords: {keywords})")
-            logger.debug(f"Full AI response: {response_text}")
-            logger.debug(f"Parsed categories: {parsed_response.get('product_categories')}")
-            logger.debug(f"Parsed segments: {parsed_response.get('market_segments')}")
-            
-            return matches_keywords, response_text
+            logger.debug(f"Combined check: {company_data.get('name', 'Unknown')} for keywords: {keywords}")
+            response_text = self._create_completion(messages, max_tokens, response_format)
+            result = self._combined_verdict(company_data, keywords, response_text)
+            self._store_verdict(messages, max_tokens, response_text, result[2]['matches_keywords'], response_format)
+            return result
             
         except Exception as e:
-            logger.error(f"Error in keyword match check: {e}")
-            # This string is stored in Supabase as openrouter_response. "Error: 401" there means OpenRouter auth failed.
-            return False, f"Error: {str(e)}"
+            logger.error(f"Error in combined qualification check: {e}")
+            # Reported like a failed Check #1 (stored in Supabase as wholesale_response)
+            return False, f"Error: {str(e)}", None
+    
+    def _combined_messages(
+        self,
+        company_data: Dict,
+        keywords: list,
+        scraped_content: Optional[str],
+        our_company_details: Optional[str]
+    ) -> List[Dict]:
+        """Build the chat messages for the combined check."""
+        from utils import format_combined_qualification_prompt
+        
+        prompt = format_combined_qualification_prompt(
+            company_data=company_data,
+            keywords=keywords,
+            scraped_content=fit_scraped_content(scraped_content, content_budget("combined"), "combined"),
+            our_company_details=our_company_details
+        )
+        return _chat_messages(COMBINED_SYSTEM_PROMPT, prompt)
+    
+    def _combined_verdict(
+        self,
+        company_data: Dict,
+        keywords: list,
+        response_text: str,
+        cached: bool = False
+    ) -> Tuple[bool, str, Dict]:
+        """Turn the combined response into (is_wholesale_partner, wholesale_response, parsed_keyword_response)."""
+        from utils import parse_combined_qualification_response
+        
+        parsed_response = parse_combined_qualification_response(response_text)
+        is_wholesale_partner = parsed_response.pop('wholesale_partner')
+        wholesale_response = parsed_response.pop('wholesale_response')
+        
+        logger.info(
+            f"Combined check for {company_data.get('name')}: wholesale {wholesale_response}, "
+            f"keywords {parsed_response['matches_keywords']} (keywords: {keywords}){' (cached)' if cached else ''}"
+        )
+        logger.debug(f"Full AI response: {response_text}")
+        
+        return is_wholesale_partner, wholesale_response, parsed_response
     
     def qualify_person(
         self,
         prospeo_person_response: Dict,
         target_companies: list,
-        qualification_criteria: Dict
+        qualification_criteria: Dict,
+        scraped_content: Optional[str] = None
     ) -> Dict:
         """
         Qualify a person/company using TWO separate AI checks:
         1. Is it a wholesale partner (multi-brand retailer)?
         2. Does it match the keywords?
         
-        Only qualifies if BOTH checks pass.
+        Only qualifies if BOTH checks pass. In combined mode both checks are
+        answered by one call (check_combined); the result has the same shape.
         
         Args:
             prospeo_person_response: Raw person data from Prospeo API (or mock with company data)
             target_companies: List of keywords to match (used for Check #2)
             qualification_criteria: Dictionary of qualification criteria (e.g., our_company_details)
+            scraped_content: Already formatted website content (e.g. from Layer 4 or the
+                             Supabase cache). When omitted, the site is scraped here through
+                             the shared scraper, which fetches each domain at most once per run.
         
         Returns:
             Dictionary with detailed qualification results:
@@ -190,23 +743,30 @@ class AIQualifier:
                 'scraped_content': str or None
             }
         """
-        from utils import parse_keyword_check_response
-        
         # Extract person and company data
         person_data, company_data = extract_person_and_company_data(prospeo_person_response)
         
-        # Scrape website content once (used for both checks)
-        company_website = company_data.get('website') or company_data.get('domain') or None
-        scraped_content = None
+        # Scrape website content once (used for both checks), unless the caller already has it
+        if scraped_content is None:
+            scraped_content = self._scrape_for_company(company_data)
         
-        if company_website:
-            try:
-                scraped_data = self.scraper.scrape_website(company_website)
-                if scraped_data:
-                    scraped_content = self.scraper.format_scraped_content_for_ai(scraped_data)
-                    logger.info(f"Scraped website content for {company_data.get('name')}")
-            except Exception as e:
-                logger.warning(f"Error scraping website {company_website}: {e}")
+        if self.combined_mode and target_companies:
+            # A clear heuristic NO settles the company without the combined call
+            heuristic = self._heuristic_verdict(company_data, scraped_content, decide_yes=False)
+            if heuristic:
+                return self._qualification_result(company_data, False, heuristic[1], None, scraped_content)
+            
+            our_company_details = qualification_criteria.get('our_company_details') if qualification_criteria else None
+            is_wholesale_partner, wholesale_response, parsed_keyword_response = self.check_combined(
+                company_data=company_data,
+                keywords=target_companies,
+                scraped_content=scraped_content,
+                our_company_details=our_company_details
+            )
+            return self._qualification_result(
+                company_data, is_wholesale_partner, wholesale_response, None, scraped_content,
+                parsed_keyword_response=parsed_keyword_response
+            )
         
         # Check #1: Is it a wholesale partner?
         is_wholesale_partner, wholesale_response = self.check_wholesale_partner_type(
@@ -215,30 +775,68 @@ class AIQualifier:
         )
         
         # Check #2: Does it match keywords? (only if Check #1 passed)
-        matches_keywords = False  # Default to False
-        keyword_response_text = "SKIP (not wholesale partner)"
-        parsed_keyword_response = {
-            'matches_keywords': False,
-            'response_text': keyword_response_text,
-            'product_categories': [],
-            'market_segments': [],
-            'reasoning': '',
-            'evidence': ''
-        }
-        
+        keyword_response_text = None
         if is_wholesale_partner and target_companies:
             # Get our company details from qualification_criteria if provided
             our_company_details = qualification_criteria.get('our_company_details') if qualification_criteria else None
             
-            matches_keywords, keyword_response_text = self.check_keyword_match(
+            _, keyword_response_text = self.check_keyword_match(
                 company_data=company_data,
                 keywords=target_companies,
                 scraped_content=scraped_content,
                 our_company_details=our_company_details
             )
-            parsed_keyword_response = parse_keyword_check_response(keyword_response_text)
-            matches_keywords = parsed_keyword_response['matches_keywords']  # Use parsed verdict
-            
+        
+        return self._qualification_result(
+            company_data, is_wholesale_partner, wholesale_response, keyword_response_text, scraped_content
+        )
+    
+    def _scrape_for_company(self, company_data: Dict) -> Optional[str]:
+        """Scrape (through the shared scraper) and format a company's website, or None."""
+        company_website = company_data.get('website') or company_data.get('domain') or None
+        if not company_website:
+            return None
+        try:
+            scrape_result = self.scraper.scrape_formatted(company_website)
+            if scrape_result:
+                logger.info(f"Scraped website content for {company_data.get('name')}")
+                return scrape_result['formatted_content']
+        except Exception as e:
+            logger.warning(f"Error scraping website {company_website}: {e}")
+        return None
+    
+    def _qualification_result(
+        self,
+        company_data: Dict,
+        is_wholesale_partner: bool,
+        wholesale_response: str,
+        keyword_response_text: Optional[str],
+        scraped_content: Optional[str],
+        parsed_keyword_response: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Combine both checks into the qualify_person result (keyword_response_text None = Check #2 skipped).
+        parsed_keyword_response is Check #2 already parsed (combined mode); it is ignored after a wholesale NO.
+        """
+        from utils import parse_keyword_check_response
+        
+        # Check #2 defaults when it was skipped
+        matches_keywords = False
+        keyword_check = {
+            'matches_keywords': False,
+            'response_text': "SKIP (not wholesale partner)",
+            'product_categories': [],
+            'market_segments': [],
+            'reasoning': '',
+            'evidence': ''
+        }
+        
+        if is_wholesale_partner and parsed_keyword_response is not None:
+            keyword_check = parsed_keyword_response  # Combined mode: answered in the same call
+            matches_keywords = keyword_check['matches_keywords']
+        elif keyword_response_text is not None:
+            keyword_check = parse_keyword_check_response(keyword_response_text)
+            matches_keywords = keyword_check['matches_keywords']  # Use parsed verdict
         elif not is_wholesale_partner:
             logger.info(f"Company {company_data.get('name')} failed wholesale check, skipping keyword check")
         
@@ -254,7 +852,7 @@ class AIQualifier:
                 'passed': is_wholesale_partner,
                 'response': wholesale_response
             },
-            'keyword_check': parsed_keyword_response,  # Store parsed details
+            'keyword_check': keyword_check,  # Store parsed details
             'scraped_content': scraped_content  # Pass scraped content for storage
         }
 
@@ -9,20 +9,24 @@ New Company-First Workflow:
 4. Search persons at qualified companies (WITH seniority filter)
 5. Enrich emails for persons found
 
+The phases run as a staged pipeline (discover → lookup → scrape → wholesale →
+qualify → person-search → enrich → persist) connected by bounded queues, with a
+configurable number of worker threads per stage. The wholesale stage takes
+companies in batches and runs Check #1 for a whole batch in one AI request.
+
 Saves ALL leads to Supabase first, then qualifies them.
 Includes kill switch at 500 processed leads.
 """
 import logging
-from typing import List, Dict, Set
+import threading
+from functools import partial
+from typing import List, Dict, Set, Iterator
 import config
 from layer2_prospeo_client import ProspeoClient
 from layer3_ai_judge import AIQualifier
 from layer5_output import OutputManager
-from utils import (
-    extract_person_and_company_data,
-    extract_unique_companies_from_persons,
-    extract_person_seniority_filter
-)
+from pipeline import Pipeline, Stage
+from utils import extract_person_seniority_filter, normalize_domain, parse_keyword_check_response
 from datetime import datetime, timezone, timedelta
 
 logging.basicConfig(level=logging.INFO)
@@ -32,10 +36,19 @@ logger = logging.getLogger(__name__)
 class LeadProcessor:
     """Main processor that orchestrates fetching and qualifying leads."""
     
-    def __init__(self):
+    def __init__(self, stage_workers: Dict = None):
+        """
+        Initialize the processor.
+        
+        Args:
+            stage_workers: Optional worker counts per pipeline stage
+                           (keys: lookup, scrape, wholesale, qualify, person_search, enrich, persist).
+                           Missing stages fall back to config.PIPELINE_WORKERS.
+        """
         self.prospeo_client = ProspeoClient()
         self.ai_qualifier = AIQualifier()
         self.output_manager = OutputManager()
+        self.stage_workers = {**config.PIPELINE_WORKERS, **(stage_workers or {})}
     
     def process_until_qualified(
         self,
@@ -48,13 +61,19 @@ class LeadProcessor:
         parsed_input: Dict = None
     ) -> Dict:
         """
-        Process leads using Company-First Workflow:
+        Process leads using Company-First Workflow, run as a staged pipeline:
+        discover → lookup → scrape → qualify → person-search → enrich → persist
+        
         1. Search companies (persons WITHOUT seniority filter)
         2. Extract unique companies
         3. Qualify companies with AI
         4. Search persons at qualified companies (WITH seniority filter)
         5. Enrich emails for persons found
         
+        Stages are connected by bounded queues and each stage has its own worker
+        threads (see config.PIPELINE_WORKERS), so many companies are in flight at
+        once. The run stops cleanly once target_count qualified persons are found.
+        
         Args:
             target_count: Target number of qualified leads (default from config)
             max_processed: Maximum number of companies to process (kill switch)
@@ -70,24 +89,44 @@ class LeadProcessor:
         target_count = target_count or config.TARGET_QUALIFIED_COUNT
         max_processed = max_processed or config.MAX_PROCESSED_LEADS
         
-        qualified_leads = []  # Final list of qualified persons with emails
-        qualified_companies = []  # List of companies that passed AI qualification
-        total_companies_processed = 0
-        current_page = 1
-        
         # Extract seniority filter for use in Phase 3 (person search)
         seniority_filter = {}
         if parsed_input:
             seniority_filter = extract_person_seniority_filter(parsed_input)
         
+        # Shared state for this run; stage handlers receive it as their first argument
+        run = {
+            'target_count': target_count,
+            'max_processed': max_processed,
+            'filters': filters,
+            'target_companies': target_companies or [],
+            'qualification_criteria': qualification_criteria or {},
+            'output_metadata': output_metadata,
+            'seniority_filter': seniority_filter,
+            'qualified_leads': [],  # Final list of qualified persons with emails
+            'qualified_companies': [],  # List of companies that passed AI qualification
+            'total_companies_processed': 0,
+            'pages_processed': 0,
+            'companies_to_skip_prospeo_search': set(),
+            'no_match_but_wholesale': set(),
+            'company_records': {},  # Existing Supabase record (or None) by company_id, prefetched per page
+            'enrich_reserved': 0,  # Persons being enriched or persisted that hold one of the target_count slots
+            'host_slots': {},  # Per-site semaphores limiting scrape workers fetching from one site
+            'lock': threading.Lock(),
+            'stop_event': threading.Event()
+        }
+        run['slot_released'] = threading.Condition(run['lock'])
+        qualified_leads = run['qualified_leads']
+        
+        # Website fetches are memoized per domain for the run; start with a clean slate
+        self.ai_qualifier.scraper.reset_run_stats()
+        self.ai_qualifier.reset_run_stats()
+        
         logger.info(f"Starting COMPANY-FIRST lead processing: target={target_count} qualified persons")
         
         # ===== PHASE 0: SUPABASE PRE-CHECK FOR EXISTING QUALIFIED COMPANIES =====
         # This will add already qualified persons from existing companies to qualified_leads
         # and return a set of company_ids to skip Prospeo search for.
-        companies_to_skip_prospeo_search = set()
-        no_match_but_wholesale = set()
-        
         if self.output_manager.supabase:  # Only run if Supabase is configured
             logger.info("Phase 0: Checking Supabase for existing qualified companies...")
             pre_check_results = self.output_manager.check_existing_companies_for_new_keywords(
@@ -97,21 +136,116 @@ class LeadProcessor:
                 output_metadata=output_metadata or {},
                 seniority_filter=seniority_filter
             )
-            companies_to_skip_prospeo_search = pre_check_results['skipped_company_ids']
-            no_match_but_wholesale = pre_check_results['no_match_but_wholesale']
-            logger.info(f"Found {len(companies_to_skip_prospeo_search)} companies in Supabase to skip Prospeo search for.")
-            logger.info(f"Found {len(no_match_but_wholesale)} companies marked as no_match but wholesale (will re-check if appear in Prospeo).")
+            run['companies_to_skip_prospeo_search'] = pre_check_results['skipped_company_ids']
+            run['no_match_but_wholesale'] = pre_check_results['no_match_but_wholesale']
+            logger.info(f"Found {len(run['companies_to_skip_prospeo_search'])} companies in Supabase to skip Prospeo search for.")
+            logger.info(f"Found {len(run['no_match_but_wholesale'])} companies marked as no_match but wholesale (will re-check if appear in Prospeo).")
             logger.info(f"Currently have {len(qualified_leads)} qualified persons from Supabase pre-check.")
         
-        # ===== PHASE 1: DISCOVER COMPANIES USING /search-company ONLY =====
-        # We do NOT use /search-person here. Prospeo /search-company accepts company_keywords;
-        # /search-person does not. Discovery is company-only.
+        if len(qualified_leads) >= target_count:
+            run['stop_event'].set()
+        
+        # ===== PHASES 1-4: STAGED PIPELINE =====
+        # Phase 1 (discover) is the pipeline source; the remaining phases are stages.
+        queue_size = config.PIPELINE_QUEUE_SIZE
+        stages = [
+            Stage('lookup', partial(self._lookup_stage, run), self.stage_workers.get('lookup'), queue_size),
+            Stage('scrape', partial(self._scrape_stage, run), self.stage_workers.get('scrape'), queue_size),
+            Stage('qualify', partial(self._qualify_stage, run), self.stage_workers.get('qualify'), queue_size),
+            Stage('person_search', partial(self._person_search_stage, run), self.stage_workers.get('person_search'), queue_size),
+            Stage('enrich', partial(self._enrich_stage, run), self.stage_workers.get('enrich'), queue_size),
+            Stage('persist', partial(self._persist_stage, run), self.stage_workers.get('persist'), queue_size),
+        ]
+        # Batched Check #1 before qualify (combined mode already answers both checks in one call)
+        if config.WHOLESALE_BATCH_SIZE > 1 and not self.ai_qualifier.combined_mode:
+            stages.insert(2, Stage(
+                'wholesale', partial(self._wholesale_stage, run), self.stage_workers.get('wholesale'), queue_size,
+                batch_size=config.WHOLESALE_BATCH_SIZE, batch_wait=config.WHOLESALE_BATCH_WAIT_SECONDS
+            ))
+        pipeline = Pipeline(stages, stop_event=run['stop_event'])
+        logger.info(f"Pipeline workers per stage: { {stage.name: stage.workers for stage in stages} }")
+        
+        try:
+            pipeline.run(self._discover_companies(run))
+        finally:
+            # Supabase writes are buffered; write what is left before the run is reported
+            write_stats = self.output_manager.flush_writes()
+        
+        total_companies_processed = run['total_companies_processed']
+        stats = {
+            'qualified_persons_count': len(qualified_leads),
+            'qualified_companies_count': len(run['qualified_companies']),
+            'total_companies_processed': total_companies_processed,
+            'pages_processed': run['pages_processed'],
+            'target_reached': len(qualified_leads) >= target_count,
+            'kill_switch_activated': total_companies_processed >= max_processed,
+            'pipeline_stages': pipeline.stats(),
+            'supabase_writes': write_stats,
+            # website_fetches + scrape_cache_hits == unique_domains_scraped proves no site was fetched twice
+            **self.ai_qualifier.scraper.get_run_stats(),
+            **self.ai_qualifier.get_run_stats()
+        }
+        
+        logger.info(f"Processing complete: {stats}")
+        
+        return {
+            'qualified_leads': qualified_leads,
+            'qualified_companies': run['qualified_companies'],
+            'stats': stats,
+            'filters': filters,
+            'target_companies': target_companies,
+            'qualification_criteria': qualification_criteria
+        }
+    
+    def _target_reached(self, run: Dict) -> bool:
+        """Check whether the run already has target_count qualified persons."""
+        return len(run['qualified_leads']) >= run['target_count']
+    
+    def _reserve_enrich_slot(self, run: Dict) -> bool:
+        """
+        Reserve one of the target_count slots before spending an enrich credit.
+        
+        Waits while every open slot is held by a person still being enriched or
+        persisted, so concurrent enrich workers never enrich more persons than the
+        target needs.
+        
+        Returns:
+            True if a slot was reserved, False once the target is reached or the run stops
+        """
+        with run['slot_released']:
+            while len(run['qualified_leads']) + run['enrich_reserved'] >= run['target_count']:
+                if self._target_reached(run) or run['stop_event'].is_set():
+                    return False
+                run['slot_released'].wait(timeout=1.0)
+            run['enrich_reserved'] += 1
+            return True
+    
+    def _release_enrich_slot(self, run: Dict) -> None:
+        """Release a reserved slot (the lead did not qualify, or it was counted). Caller holds run['lock']."""
+        run['enrich_reserved'] -= 1
+        run['slot_released'].notify_all()
+    
+    def _discover_companies(self, run: Dict) -> Iterator[Dict]:
+        """
+        Phase 1 (pipeline source): discover companies page by page via /search-company.
+        
+        We do NOT use /search-person here. Prospeo /search-company accepts company_keywords;
+        /search-person does not. Discovery is company-only.
+        
+        Yields:
+            Company context dictionaries for the lookup stage
+        """
+        filters = run['filters']
+        max_processed = run['max_processed']
+        stop_event = run['stop_event']
         seen_company_ids: Set[str] = set()
+        current_page = 1
+        
         logger.info("Phase 1: Discovering companies via /search-company ONLY (no /search-person)")
         if filters:
             logger.info(f"Phase 1 filters (sent to search-company): {list(filters.keys())}")
         
-        while len(qualified_companies) < max_processed:
+        while not stop_event.is_set():
             logger.info(f"Phase 1 - Fetching companies page {current_page}...")
             try:
                 # Use /search-company endpoint which supports company_keywords filter
@@ -120,326 +254,6 @@ class LeadProcessor:
                     limit=config.PROSPEO_BATCH_SIZE,
                     filters=filters  # Company-level filters including company_keywords (from keywords)
                 )
-                companies = result.get('data', [])
-                
-                if not companies:
-                    logger.info(f"No more companies after page {current_page - 1}")
-                    break
-                
-                logger.info(f"Found {len(companies)} companies on page {current_page}")
-                
-                # ===== PHASE 2: QUALIFY COMPANIES =====
-                for company_data in companies:
-                    company_id = company_data.get('id') or company_data.get('company_id')
-                    company_name = company_data.get('name', 'Unknown')
-                    
-                    # Skip if already processed in this run or from Supabase pre-check
-                    if company_id and (company_id in seen_company_ids or company_id in companies_to_skip_prospeo_search):
-                        logger.debug(f"Skipping company {company_name} (ID: {company_id}) - already processed or from Supabase pre-check.")
-                        continue
-                    if company_id:
-                        seen_company_ids.add(company_id)
-                    
-                    if total_companies_processed >= max_processed:
-                        logger.warning(f"Reached max processed companies limit ({max_processed})")
-                        break
-                    
-                    total_companies_processed += 1
-                    
-                    logger.info(f"Processing company {total_companies_processed}: {company_name}")
-                    
-                    # Check if company exists in Supabase (for re-qualification logic)
-                    existing_company_record = None
-                    if self.output_manager.supabase:
-                        existing_company_record = self.output_manager.get_company_from_supabase(
-                            company_id=company_id,
-                            company_name=company_name,
-                            company_domain=company_data.get('domain')
-                        )
-                        if existing_company_record:
-                            logger.info(f"Company {company_name} (ID: {company_id}) found in Supabase. Checking qualification status.")
-                    
-                    # Save ALL companies to Supabase immediately (before qualification)
-                    # This creates a record for every company fetched from Prospeo
-                    company_supabase_id = None
-                    try:
-                        if output_metadata:
-                            company_supabase_id = self.output_manager.save_company_to_supabase(
-                                company_data,
-                                output_metadata,
-                                is_qualified=False,  # Default to unqualified
-                                scraped_content=None,  # Will be updated after scraping
-                                scraped_content_date=None
-                            )
-                            logger.debug(f"Saved company {company_name} to Supabase (ID: {company_supabase_id}) for qualification.")
-                    except Exception as e:
-                        logger.warning(f"Error saving initial company to Supabase: {e}")
-                        # Continue processing even if initial save fails
-                        pass
-                    
-                    # Scrape website content for better analysis (if not already scraped recently)
-                    company_website = company_data.get('website') or company_data.get('domain') or None
-                    scraped_content = None
-                    scraped_content_date = None
-                    
-                    if company_website:
-                        # Check if scraped content exists and is recent in existing_company_record
-                        if existing_company_record and existing_company_record.get('company_scraped_content') and \
-                            existing_company_record.get('scraped_content_date'):
-                            scraped_date_val = existing_company_record.get('scraped_content_date')
-                            try:
-                                if isinstance(scraped_date_val, str):
-                                    scraped_date = datetime.fromisoformat(scraped_date_val.replace('Z', '+00:00'))
-                                elif isinstance(scraped_date_val, datetime):
-                                    scraped_date = scraped_date_val
-                                else:
-                                    scraped_date = None
-                                if scraped_date is not None:
-                                    if scraped_date.tzinfo is None:
-                                        scraped_date = scraped_date.replace(tzinfo=timezone.utc)
-                                    delta = datetime.now(timezone.utc) - scraped_date
-                                    days_old = delta.days if isinstance(delta, timedelta) else 999
-                                else:
-                                    days_old = 999
-                                
-                                if days_old < 180:
-                                    scraped_content = existing_company_record['company_scraped_content']
-                                    scraped_content_date = scraped_date
-                                    logger.info(f"Using cached scraped content for {company_name} (scraped {days_old} days ago).")
-                                else:
-                                    logger.info(f"Scraped content for {company_name} is {days_old} days old (>180). Will re-scrape.")
-                            except Exception as e:
-                                logger.warning(f"Error parsing scraped_content_date: {e}. Will re-scrape.")
-                        
-                        # Scrape if we don't have recent content
-                        if not scraped_content:
-                            logger.info(f"Scraping website: {company_website}")
-                            try:
-                                scraped_data = self.ai_qualifier.scraper.scrape_website(company_website)
-                                if scraped_data:
-                                    scraped_content = self.ai_qualifier.scraper.format_scraped_content_for_ai(scraped_data)
-                                    scraped_content_date = datetime.now(timezone.utc)
-                                    logger.info(f"Scraped content for {company_website}: {scraped_content[:100]}...")
-                            except Exception as e:
-                                logger.error(f"Error scraping website {company_website}: {e}")
-                                scraped_content = None  # Ensure it's None on error
-                    
-                    # Determine if wholesale check needs to be run
-                    run_wholesale_check = True
-                    if existing_company_record and existing_company_record.get('wholesale_partner_check') is False:
-                        # If already determined NOT a wholesale partner, skip both checks
-                        logger.info(f"Company {company_name} previously failed wholesale check. Skipping all AI qualification.")
-                        is_qualified = False
-                        wholesale_check_passed = False
-                        keyword_check_passed = False
-                        wholesale_response_text = existing_company_record.get('wholesale_partner_response', 'Previously failed wholesale check.')
-                        keyword_response_text = "SKIP (not wholesale partner)"
-                        product_categories = []
-                        market_segments = []
-                        run_wholesale_check = False
-                    elif existing_company_record and existing_company_record.get('wholesale_partner_check') is True:
-                        # If already a wholesale partner, skip wholesale check, but re-run keyword check
-                        logger.info(f"Company {company_name} previously passed wholesale check. Skipping wholesale check, re-running keyword check.")
-                        wholesale_check_passed = True
-                        wholesale_response_text = existing_company_record.get('wholesale_partner_response', 'Previously passed wholesale check.')
-                        run_wholesale_check = False  # Don't run wholesale check again
-                    
-                    # Special case: Company was marked no_match but appears in Prospeo - re-run AI Check #2
-                    if company_id in no_match_but_wholesale:
-                        logger.info(f"Company {company_name} was marked no_match in pre-check but appears in Prospeo results. Re-running AI Check #2.")
-                        # Force re-run of keyword check even if wholesale_check_passed
-                        run_wholesale_check = False
-                        wholesale_check_passed = True  # Assume wholesale (it's in the no_match_but_wholesale list)
-                        wholesale_response_text = "Previously determined wholesale partner (from Supabase pre-check)"
-                    
-                    # Qualify the company using AI
-                    try:
-                        if run_wholesale_check:
-                            # Create a mock person record with company data for AI qualification
-                            mock_person = {
-                                'id': None,  # No person ID for company-only search
-                                'company': company_data
-                            }
-                            
-                            # Run full AI qualification (both checks)
-                            ai_qualification_results = self.ai_qualifier.qualify_person(
-                                prospeo_person_response=mock_person,
-                                target_companies=target_companies or [],
-                                qualification_criteria=qualification_criteria or {}
-                            )
-                            
-                            is_qualified = ai_qualification_results['is_qualified']
-                            wholesale_check_passed = ai_qualification_results['wholesale_check']['passed']
-                            wholesale_response_text = ai_qualification_results['wholesale_check']['response']
-                            keyword_check_passed = ai_qualification_results['keyword_check']['matches_keywords']
-                            keyword_response_text = ai_qualification_results['keyword_check']['response_text']
-                            product_categories = ai_qualification_results['keyword_check']['product_categories']
-                            market_segments = ai_qualification_results['keyword_check']['market_segments']
-                            
-                        else:  # If wholesale check was skipped
-                            # Only re-run keyword check if wholesale_check_passed is True (from existing record)
-                            if wholesale_check_passed and target_companies:
-                                # Get our company details from qualification_criteria if provided
-                                our_company_details = qualification_criteria.get('our_company_details') if qualification_criteria else None
-                                
-                                matches_keywords, keyword_response_text = self.ai_qualifier.check_keyword_match(
-                                    company_data=company_data,
-                                    keywords=target_companies,
-                                    scraped_content=scraped_content,
-                                    our_company_details=our_company_details
-                                )
-                                from utils import parse_keyword_check_response
-                                parsed_keyword_response = parse_keyword_check_response(keyword_response_text)
-                                keyword_check_passed = parsed_keyword_response['matches_keywords']
-                                product_categories = parsed_keyword_response['product_categories']
-                                market_segments = parsed_keyword_response['market_segments']
-                                is_qualified = wholesale_check_passed and keyword_check_passed
-                            else:  # If wholesale check was False, or no target_companies
-                                is_qualified = False
-                                keyword_check_passed = False
-                                keyword_response_text = "SKIP (not wholesale partner or no keywords)"
-                                product_categories = []
-                                market_segments = []
-                        
-                        # Update company qualification status in Supabase
-                        if company_supabase_id:
-                            try:
-                                self.output_manager.update_company_qualification_status(
-                                    supabase_id=company_supabase_id,
-                                    is_qualified=is_qualified,
-                                    wholesale_check_passed=wholesale_check_passed,
-                                    wholesale_response=wholesale_response_text,
-                                    keyword_check_passed=keyword_check_passed,
-                                    keyword_response=keyword_response_text,
-                                    product_categories=product_categories,
-                                    market_segments=market_segments,
-                                    scraped_content=scraped_content,
-                                    scraped_content_date=scraped_content_date
-                                )
-                                logger.info(f"Updated company {company_name} (ID: {company_supabase_id}) qualification status: {is_qualified}")
-                            except Exception as e:
-                                logger.error(f"Error updating company qualification status in Supabase for ID {company_supabase_id}: {e}")
-                        
-                        if is_qualified:
-                            qualified_companies.append(company_data)
-                            logger.info(f"✅ Company qualified: {company_name}. Now searching for persons.")
-                            
-                            # ===== PHASE 3: SEARCH PERSONS AT QUALIFIED COMPANY (WITH SENIORITY) =====
-                            logger.info(f"Searching persons at qualified company: {company_name}")
-                            
-                            try:
-                                # Search persons at this company WITH seniority filter
-                                persons_result = self.prospeo_client.fetch_persons_at_company(
-                                    company_id=company_id,
-                                    company_name=company_name if not company_id else None,
-                                    company_domain=company_data.get('domain') or company_data.get('website'),
-                                    page=1,
-                                    limit=100,  # Get all matching persons
-                                    additional_filters=seniority_filter if seniority_filter else {}
-                                )
-                                
-                                company_persons = persons_result.get('data', [])
-                                logger.info(f"Found {len(company_persons)} persons at {company_name} matching seniority filter")
-                                
-                                # ===== PHASE 4: ENRICH EMAILS FOR PERSONS =====
-                                for person in company_persons:
-                                    # Check if we've reached target
-                                    if len(qualified_leads) >= target_count:
-                                        logger.info(f"✅ Reached target count ({target_count}) qualified persons!")
-                                        break
-                                    
-                                    person_id = person.get('id')
-                                    person_name = person.get('name', 'Unknown')
-                                    
-                                    # Add company data to person record
-                                    person['company'] = company_data
-                                    person['_qualified_company'] = True
-                                    person['_openrouter_response'] = keyword_response_text  # Store company's AI response
-                                    
-                                    # Save person to Supabase (initial save)
-                                    person_supabase_id = None
-                                    try:
-                                        if output_metadata:
-                                            person_supabase_id = self.output_manager.save_lead_to_supabase(
-                                                person,
-                                                output_metadata,
-                                                is_qualified=True  # Person is qualified if company is
-                                            )
-                                    except Exception as e:
-                                        logger.warning(f"Error saving person to Supabase: {e}")
-                                    
-                                    # Enrich email for this person
-                                    if person_id:
-                                        try:
-                                            logger.info(f"Enriching person {person_name} at {company_name}...")
-                                            enriched_data = self.prospeo_client.enrich_person(person_id)
-                                            
-                                            if enriched_data:
-                                                enriched_person_data = enriched_data.get('person', {}) or enriched_data
-                                                if enriched_person_data.get('email'):
-                                                    person['person_email'] = enriched_person_data.get('email')
-                                                    person['_email_enriched'] = True
-                                                    
-                                                    # Update Supabase with enriched email
-                                                    if person_supabase_id:
-                                                        try:
-                                                            self.output_manager.update_lead_qualification_status(
-                                                                person_supabase_id,  # Use the ID of the person record
-                                                                is_qualified=True,
-                                                                openrouter_response=person['_openrouter_response'],
-                                                                qualification_criteria=qualification_criteria,
-                                                                enriched_email=person['person_email']
-                                                            )
-                                                        except Exception as e:
-                                                            logger.warning(f"Error updating person email in Supabase for ID {person_supabase_id}: {e}")
-                                                    
-                                                    qualified_leads.append(person)
-                                                    logger.info(f"✅ Qualified lead {len(qualified_leads)}/{target_count}: {person_name} at {company_name} ({enriched_person_data.get('email')})")
-                                                else:
-                                                    logger.warning(f"No email found for {person_name} at {company_name}")
-                                                    person['_email_enriched'] = False
-                                            else:
-                                                logger.warning(f"No enrichment data for {person_name} at {company_name}")
-                                                person['_email_enriched'] = False
-                                        except Exception as e:
-                                            logger.error(f"Error enriching person {person_name}: {e}")
-                                            person['_email_enriched'] = False
-                                    else:
-                                        logger.warning(f"No person_id for {person_name}, skipping email enrichment")
-                                
-                                if len(qualified_leads) >= target_count:
-                                    break
-                                    
-                            except Exception as e:
-                                logger.error(f"Error searching persons at company {company_name}: {e}")
-                                continue
-                        else:
-                            logger.info(f"❌ Company not qualified: {company_name}")
-                            
-                    except Exception as e:
-                        logger.error(f"Error qualifying company {company_name}: {e}")
-                        continue
-                    
-                    if len(qualified_leads) >= target_count:
-                        break
-                
-                # Check if we've reached our goals
-                if len(qualified_leads) >= target_count:
-                    logger.info(f"✅ Reached target count of {target_count} qualified persons!")
-                    break
-                
-                if total_companies_processed >= max_processed:
-                    logger.warning(f"Kill switch activated: processed {total_companies_processed} companies")
-                    break
-                
-                # Check if there are more pages
-                meta = result.get('meta', {})
-                if not meta.get('has_more', True):
-                    logger.info(f"No more pages available for company discovery")
-                    break
-                
-                current_page += 1
-                
             except Exception as e:
                 logger.error(f"Error fetching page {current_page}: {e}")
                 
@@ -455,26 +269,503 @@ class LeadProcessor:
                 if current_page > 100:  # Safety limit
                     break
                 continue
+            
+            companies = result.get('data', [])
+            if not companies:
+                logger.info(f"No more companies after page {current_page - 1}")
+                break
+            
+            run['pages_processed'] += 1
+            logger.info(f"Found {len(companies)} companies on page {current_page}")
+            
+            # One Supabase lookup for the whole page instead of one per company in the lookup stage
+            if self.output_manager.supabase:
+                self._prefetch_company_records(run, companies)
+            
+            for company_data in companies:
+                if stop_event.is_set():
+                    break
+                
+                company_id = company_data.get('id') or company_data.get('company_id')
+                company_name = company_data.get('name', 'Unknown')
+                
+                # Skip if already processed in this run or from Supabase pre-check
+                if company_id and (company_id in seen_company_ids or company_id in run['companies_to_skip_prospeo_search']):
+                    logger.debug(f"Skipping company {company_name} (ID: {company_id}) - already processed or from Supabase pre-check.")
+                    continue
+                if company_id:
+                    seen_company_ids.add(company_id)
+                
+                if run['total_companies_processed'] >= max_processed:
+                    logger.warning(f"Reached max processed companies limit ({max_processed})")
+                    break
+                
+                run['total_companies_processed'] += 1
+                logger.info(f"Processing company {run['total_companies_processed']}: {company_name}")
+                
+                yield {
+                    'company_data': company_data,
+                    'company_id': company_id,
+                    'company_name': company_name
+                }
+            
+            # Check if we've reached our goals
+            if stop_event.is_set():
+                logger.info(f"✅ Reached target count of {run['target_count']} qualified persons!")
+                break
+            
+            if run['total_companies_processed'] >= max_processed:
+                logger.warning(f"Kill switch activated: processed {run['total_companies_processed']} companies")
+                break
+            
+            # Check if there are more pages
+            meta = result.get('meta', {})
+            if not meta.get('has_more', True):
+                logger.info(f"No more pages available for company discovery")
+                break
+            
+            current_page += 1
+    
+    def _prefetch_company_records(self, run: Dict, companies: List[Dict]):
+        """
+        Look up the existing Supabase records for a page of companies in one query
+        and keep them in run['company_records'] for the lookup stage.
         
-        stats = {
-            'qualified_persons_count': len(qualified_leads),
-            'qualified_companies_count': len(qualified_companies),
-            'total_companies_processed': total_companies_processed,
-            'pages_processed': current_page - 1,
-            'target_reached': len(qualified_leads) >= target_count,
-            'kill_switch_activated': total_companies_processed >= max_processed
-        }
+        Companies without an ID (looked up by name) and pages whose lookup fails are
+        left to the lookup stage's per-company query.
+        """
+        company_records = run['company_records']
+        with run['lock']:
+            company_ids = {
+                company_data.get('id') or company_data.get('company_id')
+                for company_data in companies
+            }
+            company_ids = {company_id for company_id in company_ids if company_id and company_id not in company_records}
+        if not company_ids:
+            return
         
-        logger.info(f"Processing complete: {stats}")
+        found = self.output_manager.get_companies_from_supabase(company_ids)
+        if found is None:
+            return
         
-        return {
-            'qualified_leads': qualified_leads,
-            'qualified_companies': qualified_companies,
-            'stats': stats,
-            'filters': filters,
-            'target_companies': target_companies,
-            'qualification_criteria': qualification_criteria
-        }
+        with run['lock']:
+            for company_id in company_ids:
+                company_records[company_id] = found.get(company_id)
+        logger.info(f"Prefetched Supabase records for {len(company_ids)} companies ({len(found)} existing)")
+    
+    def _lookup_stage(self, run: Dict, ctx: Dict) -> List[Dict]:
+        """
+        Lookup stage: find the existing Supabase record for the company. The company
+        row itself is written once, with its results, by the qualify stage.
+        """
+        company_data = ctx['company_data']
+        company_id = ctx['company_id']
+        company_name = ctx['company_name']
+        
+        # Check if company exists in Supabase (for re-qualification logic)
+        existing_company_record = None
+        if self.output_manager.supabase:
+            with run['lock']:
+                prefetched = company_id in run['company_records']
+                existing_company_record = run['company_records'].get(company_id)
+            if not prefetched:
+                existing_company_record = self.output_manager.get_company_from_supabase(
+                    company_id=company_id,
+                    company_name=company_name,
+                    company_domain=company_data.get('domain')
+                )
+            if existing_company_record:
+                logger.info(f"Company {company_name} (ID: {company_id}) found in Supabase. Checking qualification status.")
+        ctx['existing_company_record'] = existing_company_record
+        # The qualify stage upserts onto this row (keeping its ID) instead of adding a new one.
+        # Records found by name may carry a different company_key, so only ID matches are reused.
+        ctx['company_supabase_id'] = None
+        if existing_company_record and company_id:
+            ctx['company_supabase_id'] = existing_company_record.get('id')
+        
+        return [ctx]
+    
+    def _scrape_stage(self, run: Dict, ctx: Dict) -> List[Dict]:
+        """
+        Scrape stage: reuse recent scraped content from the existing record
+        (less than 180 days old), revalidate older content with a conditional GET,
+        or scrape the company website.
+        """
+        company_data = ctx['company_data']
+        company_name = ctx['company_name']
+        existing_company_record = ctx.get('existing_company_record')
+        
+        # Scrape website content for better analysis (if not already scraped recently)
+        company_website = company_data.get('website') or company_data.get('domain') or None
+        scraped_content = None
+        scraped_content_date = None
+        scraped_etag = None
+        scraped_last_modified = None
+        
+        if company_website:
+            # Check if scraped content exists and is recent in existing_company_record
+            if existing_company_record and existing_company_record.get('company_scraped_content') and \
+                existing_company_record.get('scraped_content_date'):
+                scraped_date_val = existing_company_record.get('scraped_content_date')
+                try:
+                    if isinstance(scraped_date_val, str):
+                        scraped_date = datetime.fromisoformat(scraped_date_val.replace('Z', '+00:00'))
+                    elif isinstance(scraped_date_val, datetime):
+                        scraped_date = scraped_date_val
+                    else:
+                        scraped_date = None
+                    if scraped_date is not None:
+                        if scraped_date.tzinfo is None:
+                            scraped_date = scraped_date.replace(tzinfo=timezone.utc)
+                        delta = datetime.now(timezone.utc) - scraped_date
+                        days_old = delta.days if isinstance(delta, timedelta) else 999
+                    else:
+                        days_old = 999
+                    
+                    if days_old < 180:
+                        scraped_content = existing_company_record['company_scraped_content']
+                        scraped_content_date = scraped_date
+                        scraped_etag = existing_company_record.get('scraped_etag')
+                        scraped_last_modified = existing_company_record.get('scraped_last_modified')
+                        logger.info(f"Using cached scraped content for {company_name} (scraped {days_old} days ago).")
+                    else:
+                        # Conditional GET: an unchanged page costs a header-only request and no parse
+                        with self._host_slot(run, company_website):
+                            revalidated_at = self.ai_qualifier.scraper.revalidate(
+                                company_website,
+                                existing_company_record['company_scraped_content'],
+                                etag=existing_company_record.get('scraped_etag'),
+                                last_modified=existing_company_record.get('scraped_last_modified')
+                            )
+                        if revalidated_at:
+                            scraped_content = existing_company_record['company_scraped_content']
+                            scraped_content_date = revalidated_at
+                            scraped_etag = existing_company_record.get('scraped_etag')
+                            scraped_last_modified = existing_company_record.get('scraped_last_modified')
+                            logger.info(f"Website for {company_name} not modified since last scrape ({days_old} days ago). Reusing content.")
+                        else:
+                            logger.info(f"Scraped content for {company_name} is {days_old} days old (>180). Will re-scrape.")
+                except Exception as e:
+                    logger.warning(f"Error parsing scraped_content_date: {e}. Will re-scrape.")
+            
+            # Scrape if we don't have recent content
+            if not scraped_content:
+                logger.info(f"Scraping website: {company_website}")
+                try:
+                    # Memo, then local scrape cache, then network; the date is when the page was fetched
+                    with self._host_slot(run, company_website):
+                        scrape_result = self.ai_qualifier.scraper.scrape_formatted(company_website)
+                    if scrape_result:
+                        scraped_content = scrape_result['formatted_content']
+                        scraped_content_date = scrape_result['scraped_at']
+                        scraped_etag = scrape_result['etag']
+                        scraped_last_modified = scrape_result['last_modified']
+                        logger.info(f"Scraped content for {company_website}: {scraped_content[:100]}...")
+                except Exception as e:
+                    logger.error(f"Error scraping website {company_website}: {e}")
+                    scraped_content = None  # Ensure it's None on error
+        
+        ctx['scraped_content'] = scraped_content
+        ctx['scraped_content_date'] = scraped_content_date
+        ctx['scraped_etag'] = scraped_etag
+        ctx['scraped_last_modified'] = scraped_last_modified
+        return [ctx]
+    
+    def _host_slot(self, run: Dict, website: str) -> threading.BoundedSemaphore:
+        """Get (or create) the semaphore that limits scrape workers on one site to SCRAPER_PER_HOST_LIMIT."""
+        host = normalize_domain(website)
+        with run['lock']:
+            if host not in run['host_slots']:
+                run['host_slots'][host] = threading.BoundedSemaphore(config.SCRAPER_PER_HOST_LIMIT)
+            return run['host_slots'][host]
+    
+    def _wholesale_stage(self, run: Dict, ctxs: List[Dict]) -> List[Dict]:
+        """
+        Wholesale stage: run Check #1 for a batch of companies in as few AI requests
+        as possible and keep each verdict on its ctx for the qualify stage.
+        Companies whose Check #1 is already decided (or that have no ID) pass through.
+        """
+        to_check = [ctx for ctx in ctxs if ctx['company_id'] and self._needs_wholesale_check(run, ctx)]
+        if to_check:
+            verdicts = self.ai_qualifier.check_wholesale_partner_types(
+                [ctx['company_data'] for ctx in to_check],
+                scraped_contents={ctx['company_id']: ctx.get('scraped_content') for ctx in to_check}
+            )
+            for ctx in to_check:
+                ctx['wholesale_check'] = verdicts.get(ctx['company_id'])
+        return ctxs
+    
+    def _needs_wholesale_check(self, run: Dict, ctx: Dict) -> bool:
+        """True unless Check #1 was decided before (existing Supabase record or no-match pre-check)."""
+        existing_company_record = ctx.get('existing_company_record')
+        if existing_company_record and existing_company_record.get('wholesale_partner_check') in (True, False):
+            return False
+        return ctx['company_id'] not in run['no_match_but_wholesale']
+    
+    def _qualify_stage(self, run: Dict, ctx: Dict) -> List[Dict]:
+        """
+        Qualify stage: run the AI checks (skipping those already decided in Supabase),
+        store the result on the company row and pass qualified companies on.
+        """
+        company_data = ctx['company_data']
+        company_id = ctx['company_id']
+        company_name = ctx['company_name']
+        existing_company_record = ctx.get('existing_company_record')
+        company_supabase_id = ctx.get('company_supabase_id')
+        scraped_content = ctx.get('scraped_content')
+        scraped_content_date = ctx.get('scraped_content_date')
+        target_companies = run['target_companies']
+        qualification_criteria = run['qualification_criteria']
+        output_metadata = run['output_metadata']
+        
+        # Determine if wholesale check needs to be run
+        run_wholesale_check = True
+        wholesale_check_passed = False
+        wholesale_response_text = None
+        if existing_company_record and existing_company_record.get('wholesale_partner_check') is False:
+            # If already determined NOT a wholesale partner, skip both checks
+            logger.info(f"Company {company_name} previously failed wholesale check. Skipping all AI qualification.")
+            wholesale_response_text = existing_company_record.get('wholesale_partner_response', 'Previously failed wholesale check.')
+            run_wholesale_check = False
+        elif existing_company_record and existing_company_record.get('wholesale_partner_check') is True:
+            # If already a wholesale partner, skip wholesale check, but re-run keyword check
+            logger.info(f"Company {company_name} previously passed wholesale check. Skipping wholesale check, re-running keyword check.")
+            wholesale_check_passed = True
+            wholesale_response_text = existing_company_record.get('wholesale_partner_response', 'Previously passed wholesale check.')
+            run_wholesale_check = False  # Don't run wholesale check again
+        
+        # Special case: Company was marked no_match but appears in Prospeo - re-run AI Check #2
+        if company_id in run['no_match_but_wholesale']:
+            logger.info(f"Company {company_name} was marked no_match in pre-check but appears in Prospeo results. Re-running AI Check #2.")
+            # Force re-run of keyword check even if wholesale_check_passed
+            run_wholesale_check = False
+            wholesale_check_passed = True  # Assume wholesale (it's in the no_match_but_wholesale list)
+            wholesale_response_text = "Previously determined wholesale partner (from Supabase pre-check)"
+        
+        # Check #1 already answered by the batched wholesale stage
+        if run_wholesale_check and ctx.get('wholesale_check') is not None:
+            wholesale_check_passed, wholesale_response_text = ctx['wholesale_check']
+            run_wholesale_check = False
+        
+        # Qualify the company using AI
+        try:
+            if run_wholesale_check:
+                # Create a mock person record with company data for AI qualification
+                mock_person = {
+                    'id': None,  # No person ID for company-only search
+                    'company': company_data
+                }
+                
+                # Run full AI qualification (both checks)
+                ai_qualification_results = self.ai_qualifier.qualify_person(
+                    prospeo_person_response=mock_person,
+                    target_companies=target_companies,
+                    qualification_criteria=qualification_criteria,
+                    scraped_content=scraped_content  # Reuse the scrape stage result (no second fetch)
+                )
+                
+                is_qualified = ai_qualification_results['is_qualified']
+                wholesale_check_passed = ai_qualification_results['wholesale_check']['passed']
+                wholesale_response_text = ai_qualification_results['wholesale_check']['response']
+                keyword_check_passed = ai_qualification_results['keyword_check']['matches_keywords']
+                keyword_response_text = ai_qualification_results['keyword_check']['response_text']
+                product_categories = ai_qualification_results['keyword_check']['product_categories']
+                market_segments = ai_qualification_results['keyword_check']['market_segments']
+                
+            else:  # If wholesale check was skipped
+                # Only re-run keyword check if wholesale_check_passed is True (from existing record)
+                if wholesale_check_passed and target_companies:
+                    # Get our company details from qualification_criteria if provided
+                    our_company_details = qualification_criteria.get('our_company_details')
+                    
+                    matches_keywords, keyword_response_text = self.ai_qualifier.check_keyword_match(
+                        company_data=company_data,
+                        keywords=target_companies,
+                        scraped_content=scraped_content,
+                        our_company_details=our_company_details
+                    )
+                    parsed_keyword_response = parse_keyword_check_response(keyword_response_text)
+                    keyword_check_passed = parsed_keyword_response['matches_keywords']
+                    product_categories = parsed_keyword_response['product_categories']
+                    market_segments = parsed_keyword_response['market_segments']
+                    is_qualified = wholesale_check_passed and keyword_check_passed
+                else:  # If wholesale check was False, or no target_companies
+                    is_qualified = False
+                    keyword_check_passed = False
+                    keyword_response_text = "SKIP (not wholesale partner or no keywords)"
+                    product_categories = []
+                    market_segments = []
+            
+            # Save the company with its qualification results in Supabase (one upsert per company)
+            if output_metadata:
+                try:
+                    company_supabase_id = self.output_manager.save_company_to_supabase(
+                        company_data,
+                        output_metadata,
+                        is_qualified=is_qualified,
+                        scraped_content=scraped_content,
+                        scraped_content_date=scraped_content_date,
+                        check_results={
+                            'wholesale_check_passed': wholesale_check_passed,
+                            'wholesale_response': wholesale_response_text,
+                            'keyword_check_passed': keyword_check_passed,
+                            'keyword_response': keyword_response_text,
+                            'product_categories': product_categories,
+                            'market_segments': market_segments,
+                            'scraped_etag': ctx.get('scraped_etag'),
+                            'scraped_last_modified': ctx.get('scraped_last_modified')
+                        },
+                        record_id=company_supabase_id
+                    )
+                    logger.info(f"Saved company {company_name} (ID: {company_supabase_id}) qualification status: {is_qualified}")
+                except Exception as e:
+                    logger.error(f"Error saving company qualification status in Supabase for {company_name}: {e}")
+            
+        except Exception as e:
+            logger.error(f"Error qualifying company {company_name}: {e}")
+            return []
+        
+        if not is_qualified:
+            logger.info(f"❌ Company not qualified: {company_name}")
+            return []
+        
+        with run['lock']:
+            run['qualified_companies'].append(company_data)
+        logger.info(f"✅ Company qualified: {company_name}. Now searching for persons.")
+        
+        ctx['keyword_response_text'] = keyword_response_text
+        return [ctx]
+    
+    def _person_search_stage(self, run: Dict, ctx: Dict) -> List[Dict]:
+        """
+        Person-search stage (Phase 3): search persons at a qualified company
+        WITH the seniority filter and emit one item per person.
+        """
+        company_data = ctx['company_data']
+        company_id = ctx['company_id']
+        company_name = ctx['company_name']
+        seniority_filter = run['seniority_filter']
+        
+        # ===== PHASE 3: SEARCH PERSONS AT QUALIFIED COMPANY (WITH SENIORITY) =====
+        logger.info(f"Searching persons at qualified company: {company_name}")
+        
+        try:
+            # Search persons at this company WITH seniority filter
+            persons_result = self.prospeo_client.fetch_persons_at_company(
+                company_id=company_id,
+                company_name=company_name if not company_id else None,
+                company_domain=company_data.get('domain') or company_data.get('website'),
+                page=1,
+                limit=100,  # Get all matching persons
+                additional_filters=seniority_filter if seniority_filter else {}
+            )
+        except Exception as e:
+            logger.error(f"Error searching persons at company {company_name}: {e}")
+            return []
+        
+        company_persons = persons_result.get('data', [])
+        logger.info(f"Found {len(company_persons)} persons at {company_name} matching seniority filter")
+        
+        person_items = []
+        for person in company_persons:
+            # Add company data to person record
+            person['company'] = company_data
+            person['_qualified_company'] = True
+            person['_openrouter_response'] = ctx.get('keyword_response_text')  # Store company's AI response
+            person_items.append({'person': person, 'company_name': company_name})
+        return person_items
+    
+    def _enrich_stage(self, run: Dict, item: Dict) -> List[Dict]:
+        """Enrich stage (Phase 4): look up the verified email for a person."""
+        person = item['person']
+        company_name = item['company_name']
+        person_id = person.get('id')
+        person_name = person.get('name', 'Unknown')
+        
+        # ===== PHASE 4: ENRICH EMAILS FOR PERSONS =====
+        person['_email_enriched'] = False
+        if person_id:
+            # Hold a target slot while enriching (released below if no email is found)
+            if not self._reserve_enrich_slot(run):
+                return []
+            try:
+                logger.info(f"Enriching person {person_name} at {company_name}...")
+                enriched_data = self.prospeo_client.enrich_person(person_id)
+                
+                if enriched_data:
+                    enriched_person_data = enriched_data.get('person', {}) or enriched_data
+                    if enriched_person_data.get('email'):
+                        person['person_email'] = enriched_person_data.get('email')
+                        person['_email_enriched'] = True
+                    else:
+                        logger.warning(f"No email found for {person_name} at {company_name}")
+                else:
+                    logger.warning(f"No enrichment data for {person_name} at {company_name}")
+            except Exception as e:
+                logger.error(f"Error enriching person {person_name}: {e}")
+            if not person['_email_enriched']:
+                with run['lock']:
+                    self._release_enrich_slot(run)
+        else:
+            if self._target_reached(run):
+                return []
+            logger.warning(f"No person_id for {person_name}, skipping email enrichment")
+        
+        return [item]
+    
+    def _persist_stage(self, run: Dict, item: Dict) -> None:
+        """
+        Persist stage: save the person to Supabase and, when the email was
+        enriched, count it as a qualified lead. Stops the pipeline at target_count.
+        """
+        person = item['person']
+        company_name = item['company_name']
+        person_name = person.get('name', 'Unknown')
+        output_metadata = run['output_metadata']
+        target_count = run['target_count']
+        
+        # Save person to Supabase
+        person_supabase_id = None
+        try:
+            if output_metadata:
+                person_supabase_id = self.output_manager.save_lead_to_supabase(
+                    person,
+                    output_metadata,
+                    is_qualified=True  # Person is qualified if company is
+                )
+        except Exception as e:
+            logger.warning(f"Error saving person to Supabase: {e}")
+        
+        if not person.get('_email_enriched'):
+            return None
+        
+        # Update Supabase with enriched email
+        if person_supabase_id:
+            try:
+                self.output_manager.update_lead_qualification_status(
+                    person_supabase_id,  # Use the ID of the person record
+                    is_qualified=True,
+                    openrouter_response=person['_openrouter_response'],
+                    qualification_criteria=run['qualification_criteria'],
+                    enriched_email=person['person_email']
+                )
+            except Exception as e:
+                logger.warning(f"Error updating person email in Supabase for ID {person_supabase_id}: {e}")
+        
+        with run['lock']:
+            # The slot reserved in the enrich stage becomes this qualified lead
+            self._release_enrich_slot(run)
+            if self._target_reached(run):
+                return None
+            run['qualified_leads'].append(person)
+            qualified_count = len(run['qualified_leads'])
+            if qualified_count >= target_count:
+                run['stop_event'].set()
+        
+        logger.info(f"✅ Qualified lead {qualified_count}/{target_count}: {person_name} at {company_name} ({person['person_email']})")
+        if qualified_count >= target_count:
+            logger.info(f"✅ Reached target count ({target_count}) qualified persons!")
+        return None
 
 
 def test_processing_loop():
@@ -1,51 +1,134 @@
 """
 Layer 5: Output
 Saves qualified leads to Supabase and generates CSV file.
+
+Per-company and per-person inserts/updates go through a write-behind buffer
+(write_buffer.py): they return a record ID at once and are written in
+batches in the background. Call flush_writes() when a run ends; it writes
+what is still queued and stops the background flush threads.
+
+Companies and persons are stored in lead_magnet_candidates (company rows have
+person_id NULL), or with SUPABASE_NORMALIZED_TABLES in the separate companies
+and persons tables (persons.company_key references companies).
 """
 import logging
 import csv
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Optional, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 from supabase import create_client, Client
 import config
-from utils import extract_person_and_company_data, sanitize_csv_field, quick_match_keywords_against_categories
+from keyword_index import KeywordIndex, get_keyword_index
+from utils import build_company_key, extract_person_and_company_data, sanitize_csv_field
+from write_buffer import WriteBehindBuffer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns the Phase 0 keyword index needs (id is the keyset pagination cursor)
+KEYWORD_INDEX_COLUMNS = "id, company_id, product_categories, market_segments"
+# Columns Layer 4 reads from an existing company record (scrape reuse, Check #1 reuse)
+COMPANY_LOOKUP_COLUMNS = (
+    "id, company_id, created_at, wholesale_partner_check, wholesale_partner_response, "
+    "company_scraped_content, scraped_content_date, scraped_etag, scraped_last_modified"
+)
+
+
+def _pg_array_values(values) -> List[str]:
+    """Quote values for a PostgREST array literal (categories may contain commas or quotes)."""
+    return ['"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values]
+
 
 class OutputManager:
     """Manages output to Supabase and CSV."""
     
-    def __init__(self):
+    def __init__(self, normalized_tables: Optional[bool] = None):
+        """
+        Initialize the Supabase client and write buffers.
+        
+        Args:
+            normalized_tables: Use the companies/persons tables (default: SUPABASE_NORMALIZED_TABLES)
+        """
         self.supabase: Client = None
+        self.normalized_tables = config.SUPABASE_NORMALIZED_TABLES if normalized_tables is None else normalized_tables
+        self.company_table = "companies" if self.normalized_tables else "lead_magnet_candidates"
+        self.person_table = "persons" if self.normalized_tables else "lead_magnet_candidates"
+        self.company_writes: Optional[WriteBehindBuffer] = None
+        self.person_writes: Optional[WriteBehindBuffer] = None
         if config.SUPABASE_URL and config.SUPABASE_KEY:
             try:
                 self.supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+                self._init_write_buffers()
                 logger.info("Supabase client initialized")
             except Exception as e:
                 logger.warning(f"Could not initialize Supabase client: {e}")
         else:
             logger.warning("Supabase credentials not configured")
     
-    def save_lead_to_supabase(self, lead: Dict, metadata: Dict, is_qualified: bool = False) -> str:
+    def _init_write_buffers(self):
+        """Create the write-behind buffers (one shared buffer when both live in lead_magnet_candidates)."""
+        self.company_writes = WriteBehindBuffer(
+            self.supabase,
+            self.company_table,
+            batch_size=config.SUPABASE_WRITE_BATCH_SIZE,
+            flush_seconds=config.SUPABASE_WRITE_FLUSH_SECONDS
+        )
+        self.person_writes = self.company_writes
+        if self.person_table != self.company_table:
+            # Person rows reference company rows, so queued companies are written first
+            self.person_writes = WriteBehindBuffer(
+                self.supabase,
+                self.person_table,
+                batch_size=config.SUPABASE_WRITE_BATCH_SIZE,
+                flush_seconds=config.SUPABASE_WRITE_FLUSH_SECONDS,
+                depends_on=self.company_writes
+            )
+    
+    def flush_writes(self) -> Dict:
         """
-        Save a single lead to Supabase (called immediately after fetching from Prospeo).
+        Write all queued inserts and updates and stop the background flushers
+        (call at the end of a run; later writes are written inline).
+        
+        Returns:
+            Write-behind statistics (rows written/failed, flushes, pending), summed over tables
+        """
+        if not self.person_writes:
+            return {}
+        # Companies first: person rows reference them
+        buffers = [self.company_writes] if self.person_writes is self.company_writes else [self.company_writes, self.person_writes]
+        for buffer in buffers:
+            buffer.close()
+        
+        totals = {}
+        for buffer in buffers:
+            for name, value in buffer.get_stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+    
+    def company_query(self, columns: str = "*"):
+        """
+        Start a select over company rows: the companies table, or the company-only
+        (person_id IS NULL) rows of lead_magnet_candidates.
         
         Args:
-            lead: Single lead dictionary from Prospeo
-            metadata: Metadata including Slack info, criteria, etc.
-            is_qualified: Whether this lead is qualified (default False, updated later)
+            columns: Columns to select
         
         Returns:
-            ID of inserted record (or None if failed)
+            PostgREST query builder (add filters, then execute())
         """
-        if not self.supabase:
-            return None
+        query = self.supabase.table(self.company_table).select(columns)
+        if not self.normalized_tables:
+            query = query.is_("person_id", "null")
+        return query
+    
+    def _person_record(self, lead: Dict, metadata: Dict, is_qualified: bool, processing_order: Optional[int] = None) -> Dict:
+        """
+        Build the row stored for a person.
         
-        # Extract person and company data
+        In lead_magnet_candidates the row repeats the company columns; in the persons
+        table it references the company by company_key and stores only the person JSON.
+        """
         person_data, company_data = extract_person_and_company_data(lead)
         
         record = {
@@ -56,23 +139,13 @@ class OutputManager:
             "person_title": person_data.get('title'),
             "person_linkedin_url": person_data.get('linkedin_url'),
             
-            # Company Data
-            "company_id": company_data.get('id'),
-            "company_name": company_data.get('name'),
-            "company_description": company_data.get('description'),
-            "company_domain": company_data.get('domain'),
-            "company_website": company_data.get('website'),
-            "company_industry": company_data.get('industry'),
-            "company_size": company_data.get('size'),
-            "company_location": company_data.get('location'),
-            
             # Qualification Metadata
             "is_qualified": is_qualified,
             "qualified_at": datetime.now().isoformat() if is_qualified else None,
             "qualification_criteria": json.dumps(metadata.get('qualification_criteria', {})),
             "search_criteria": metadata.get('search_criteria', ''),
             "prospeo_page_number": lead.get('_prospeo_page'),
-            "processing_order": lead.get('_processing_order'),
+            "processing_order": lead.get('_processing_order', processing_order),
             
             # Slack Metadata
             "slack_user_id": metadata.get('slack_user_id'),
@@ -84,15 +157,44 @@ class OutputManager:
             "openrouter_response": lead.get('_openrouter_response')
         }
         
-        try:
-            response = self.supabase.table("lead_magnet_candidates").insert(record).execute()
-            if response.data:
-                record_id = response.data[0].get('id')
-                return record_id
+        if self.normalized_tables:
+            record["company_key"] = build_company_key(
+                company_data.get('id') or company_data.get('company_id'),
+                company_data.get('domain') or company_data.get('website')
+            )
+            record["raw_prospeo_data"] = {key: value for key, value in lead.items() if key != 'company'}
+        else:
+            record.update({
+                "company_id": company_data.get('id'),
+                "company_name": company_data.get('name'),
+                "company_description": company_data.get('description'),
+                "company_domain": company_data.get('domain'),
+                "company_website": company_data.get('website'),
+                "company_industry": company_data.get('industry'),
+                "company_size": company_data.get('size'),
+                "company_location": company_data.get('location')
+            })
+        return record
+    
+    def save_lead_to_supabase(self, lead: Dict, metadata: Dict, is_qualified: bool = False) -> str:
+        """
+        Save a single lead to Supabase (called immediately after fetching from Prospeo).
+        
+        Args:
+            lead: Single lead dictionary from Prospeo
+            metadata: Metadata including Slack info, criteria, etc.
+            is_qualified: Whether this lead is qualified (default False, updated later)
+        
+        Returns:
+            ID of the queued record (or None if Supabase is not configured)
+        """
+        if not self.supabase:
             return None
-        except Exception as e:
-            logger.error(f"Error inserting lead to Supabase: {e}")
-            raise
+        
+        record = self._person_record(lead, metadata, is_qualified)
+        
+        # Written in the background; the client-generated ID is usable right away
+        return self.person_writes.insert(record)
     
     def update_lead_qualification_status(
         self,
@@ -113,7 +215,7 @@ class OutputManager:
             enriched_email: Enriched email address
         
         Returns:
-            True if updated successfully
+            True if the update was queued
         """
         if not self.supabase:
             return False
@@ -134,16 +236,8 @@ class OutputManager:
         if qualification_criteria:
             update_data["qualification_criteria"] = json.dumps(qualification_criteria)
         
-        try:
-            response = self.supabase.table("lead_magnet_candidates")\
-                .update(update_data)\
-                .eq("id", supabase_id)\
-                .execute()
-            
-            return len(response.data) > 0 if response.data else False
-        except Exception as e:
-            logger.error(f"Error updating qualification status: {e}")
-            return False
+        self.person_writes.update(supabase_id, update_data)
+        return True
     
     def save_to_supabase(self, qualified_leads: List[Dict], metadata: Dict) -> int:
         """
@@ -160,53 +254,24 @@ class OutputManager:
             logger.warning("Supabase not configured, skipping database save")
             return 0
         
-        records = []
+        records = [
+            self._person_record(lead, metadata, lead.get('_qualified', True), processing_order=idx + 1)  # Assume qualified if in this list
+            for idx, lead in enumerate(qualified_leads)
+        ]
         
-        for idx, lead in enumerate(qualified_leads):
-            # Extract person and company data
-            person_data, company_data = extract_person_and_company_data(lead)
-            
-            record = {
-                # Person Data
-                "person_id": person_data.get('id'),
-                "person_name": person_data.get('name'),
-                "person_email": person_data.get('email'),
-                "person_title": person_data.get('title'),
-                "person_linkedin_url": person_data.get('linkedin_url'),
-                
-                # Company Data
-                "company_id": company_data.get('id'),
-                "company_name": company_data.get('name'),
-                "company_description": company_data.get('description'),
-                "company_domain": company_data.get('domain'),
-                "company_website": company_data.get('website'),
-                "company_industry": company_data.get('industry'),
-                "company_size": company_data.get('size'),
-                "company_location": company_data.get('location'),
-                
-                # Qualification Metadata
-                "is_qualified": lead.get('_qualified', True),  # Assume qualified if in this list
-                "qualified_at": datetime.now().isoformat() if lead.get('_qualified', True) else None,
-                "qualification_criteria": json.dumps(metadata.get('qualification_criteria', {})),
-                "search_criteria": metadata.get('search_criteria', ''),
-                "prospeo_page_number": lead.get('_prospeo_page'),
-                "processing_order": lead.get('_processing_order', idx + 1),
-                
-                # Slack Metadata
-                "slack_user_id": metadata.get('slack_user_id'),
-                "slack_channel_id": metadata.get('slack_channel_id'),
-                "slack_trigger_id": metadata.get('slack_trigger_id'),
-                
-                # Full JSON
-                "raw_prospeo_data": lead,
-                "openrouter_response": lead.get('_openrouter_response')
-            }
-            
-            records.append(record)
+        if self.normalized_tables:
+            # Persons reference their company row, so make sure each company has one. Only the
+            # identity columns are sent: the qualification results a run stored stay untouched
+            for lead in qualified_leads:
+                _, company_data = extract_person_and_company_data(lead)
+                company_record = self._company_identity_record(company_data or {})
+                if company_record["company_key"]:
+                    self.company_writes.insert(company_record, on_conflict="company_key")
+            self.company_writes.flush()
         
         try:
             # Bulk insert
-            response = self.supabase.table("lead_magnet_candidates").insert(records).execute()
+            response = self.supabase.table(self.person_table).insert(records).execute()
             inserted_count = len(response.data) if response.data else len(records)
             logger.info(f"Successfully inserted {inserted_count} records to Supabase")
             return inserted_count
@@ -221,46 +286,41 @@ class OutputManager:
         output_metadata: Dict,
         is_qualified: bool = False,
         scraped_content: Optional[str] = None,
-        scraped_content_date: Optional[datetime] = None
+        scraped_content_date: Optional[datetime] = None,
+        check_results: Optional[Dict] = None,
+        record_id: Optional[str] = None
     ) -> Optional[str]:
         """
-        Save a company record to Supabase (company-only, person_id = NULL).
-        Called immediately after fetching company from Prospeo, before AI qualification.
+        Save a company record to Supabase (the companies table, or a company-only
+        lead_magnet_candidates row with person_id = NULL).
+        
+        The row is upserted on company_key (the Prospeo company ID, or the normalized
+        domain when there is no ID), so each company has one row that every run updates.
+        Pass check_results to store the company and its AI results in a single write.
         
         Args:
             company_data: Company dictionary from Prospeo
             output_metadata: Metadata including Slack info, criteria, etc.
-            is_qualified: Initial qualification status (default False, updated after AI check)
-            scraped_content: Scraped website content (optional)
+            is_qualified: Qualification status (default False)
+            scraped_content: Scraped website content (optional; stored content is kept when None)
             scraped_content_date: When content was scraped (optional)
+            check_results: AI results, keyed like the _qualification_columns arguments
+                (wholesale_check_passed, wholesale_response, keyword_check_passed,
+                keyword_response, product_categories, market_segments, optional
+                scraped_etag and scraped_last_modified)
+            record_id: ID of the existing row for this company, if known (keeps its ID)
         
         Returns:
-            ID of inserted record (or None if failed)
+            ID of the queued record (None if Supabase is not configured, or when the row
+            is upserted on company_key without a known ID: the database keeps or assigns it)
         """
         if not self.supabase:
             logger.warning("Supabase not configured, skipping company database save")
             return None
         
-        company_id = company_data.get('id') or company_data.get('company_id')
-        
-        record = {
-            # Person Data (NULL for company-only records)
-            "person_id": None,
-            "person_name": None,
-            "person_email": None,
-            "person_title": None,
-            "person_linkedin_url": None,
-            
-            # Company Data
-            "company_id": company_id,
-            "company_name": company_data.get('name'),
-            "company_description": company_data.get('description'),
-            "company_domain": company_data.get('domain'),
-            "company_website": company_data.get('website'),
-            "company_industry": company_data.get('industry'),
-            "company_size": company_data.get('size'),
-            "company_location": company_data.get('location'),
-            
+        record = self._company_identity_record(company_data)
+        company_key = record["company_key"]
+        record.update({
             # Qualification Metadata
             "is_qualified": is_qualified,
             "qualified_at": datetime.now().isoformat() if is_qualified else None,
@@ -272,25 +332,39 @@ class OutputManager:
             "slack_channel_id": output_metadata.get('slack_channel_id'),
             "slack_trigger_id": output_metadata.get('slack_trigger_id'),
             
-            # Scraped Content
-            "company_scraped_content": scraped_content,
-            "scraped_content_date": scraped_content_date.isoformat() if scraped_content_date else None,
-            "last_scraped_at": datetime.now().isoformat() if scraped_content else None,
-            
             # Full JSON
             "raw_prospeo_data": company_data
-        }
-        
-        try:
-            response = self.supabase.table("lead_magnet_candidates").insert(record).execute()
-            if response.data:
-                record_id = response.data[0].get('id')
-                logger.info(f"Saved company {company_data.get('name')} to Supabase (ID: {record_id})")
-                return record_id
-            return None
-        except Exception as e:
-            logger.error(f"Error inserting company to Supabase: {e}")
-            raise
+        })
+        if record_id:
+            record["id"] = record_id
+        if not self.normalized_tables:
+            # Person Data (NULL for company-only records)
+            record.update({
+                "person_id": None,
+                "person_name": None,
+                "person_email": None,
+                "person_title": None,
+                "person_linkedin_url": None
+            })
+        
+        # Scraped content and AI results (an upsert must not blank what an earlier run stored)
+        if check_results is not None:
+            record.update(self._qualification_columns(is_qualified, scraped_content, scraped_content_date, **check_results))
+        elif scraped_content:
+            record.update({
+                "company_scraped_content": scraped_content,
+                "scraped_content_date": scraped_content_date.isoformat() if scraped_content_date else None,
+                "last_scraped_at": datetime.now().isoformat()
+            })
+        
+        # Written in the background. Upserts on company_key send no 'id' unless record_id
+        # is known, so an existing row keeps its primary key.
+        # Rows without a key (no ID and no domain) cannot be matched and are inserted.
+        record_id = self.company_writes.insert(record, on_conflict="company_key" if company_key else "id")
+        logger.info(f"Queued company {company_data.get('name')} for Supabase (key: {company_key or record_id})")
+        if check_results is not None:
+            self._update_keyword_index(record)
+        return record_id
     
     def get_company_from_supabase(
         self,
@@ -313,7 +387,7 @@ class OutputManager:
             return None
         
         try:
-            query = self.supabase.table("lead_magnet_candidates").select("*")
+            query = self.company_query("*")
             
             # Query by company_id first (most reliable), then name, then domain
             if company_id:
@@ -325,9 +399,6 @@ class OutputManager:
             else:
                 return None
             
-            # Filter for company-only records (person_id IS NULL)
-            query = query.is_("person_id", "null")
-            
             # Get the most recent record for this company
             query = query.order("created_at", desc=True).limit(1)
             
@@ -341,39 +412,78 @@ class OutputManager:
             logger.error(f"Error getting company from Supabase: {e}")
             return None
     
-    def update_company_qualification_status(
-        self,
-        supabase_id: str,
+    def get_companies_from_supabase(self, company_ids: Iterable[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Get the most recent company-only record for many company IDs at once.
+        
+        Uses one in_() query with only the columns Layer 4 reads, instead of one
+        select("*") round trip per company through get_company_from_supabase.
+        
+        Args:
+            company_ids: Company IDs from Prospeo
+        
+        Returns:
+            Records by company_id (IDs without a record are missing), or None if the
+            lookup failed
+        """
+        if not self.supabase:
+            return None
+        
+        remaining = {company_id for company_id in company_ids if company_id}
+        records = {}
+        try:
+            while remaining:
+                response = self.company_query(COMPANY_LOOKUP_COLUMNS)\
+                    .in_("company_id", sorted(remaining))\
+                    .order("created_at", desc=True)\
+                    .limit(config.SUPABASE_PAGE_SIZE)\
+                    .execute()
+                rows = response.data or []
+                # Newest first, so the first row per company is its most recent record
+                for record in rows:
+                    if record.get('company_id') in remaining:
+                        records.setdefault(record['company_id'], record)
+                remaining -= set(records)
+                # A full page may have cut off older companies; ask again for those only
+                if len(rows) < config.SUPABASE_PAGE_SIZE:
+                    break
+            return records
+        except Exception as e:
+            logger.error(f"Error getting {len(remaining)} companies from Supabase: {e}")
+            return None
+    
+    @staticmethod
+    def _company_identity_record(company_data: Dict) -> Dict:
+        """Company row columns from the Prospeo company itself (company_key and company data)."""
+        company_id = company_data.get('id') or company_data.get('company_id')
+        return {
+            "company_key": build_company_key(company_id, company_data.get('domain') or company_data.get('website')),
+            "company_id": company_id,
+            "company_name": company_data.get('name'),
+            "company_description": company_data.get('description'),
+            "company_domain": company_data.get('domain'),
+            "company_website": company_data.get('website'),
+            "company_industry": company_data.get('industry'),
+            "company_size": company_data.get('size'),
+            "company_location": company_data.get('location')
+        }
+    
+    @staticmethod
+    def _qualification_columns(
         is_qualified: bool,
+        scraped_content: Optional[str],
+        scraped_content_date: Optional[datetime],
         wholesale_check_passed: bool,
         wholesale_response: str,
         keyword_check_passed: bool,
         keyword_response: str,
         product_categories: List[str],
         market_segments: List[str],
-        scraped_content: Optional[str],
-        scraped_content_date: Optional[datetime]
-    ):
-        """
-        Update the qualification status and AI results for an existing company in Supabase.
-        
-        Args:
-            supabase_id: UUID of the company record in Supabase
-            is_qualified: Final qualification status (both checks passed)
-            wholesale_check_passed: Result of Check #1
-            wholesale_response: AI response text from Check #1
-            keyword_check_passed: Result of Check #2
-            keyword_response: Full AI response from Check #2
-            product_categories: Array of product categories from Check #2
-            market_segments: Array of market segments from Check #2
-            scraped_content: Scraped website content
-            scraped_content_date: When content was scraped
-        """
-        if not self.supabase:
-            logger.warning("Supabase not configured, skipping company database update")
-            return
-        
-        update_data = {
+        scraped_etag: Optional[str] = None,
+        scraped_last_modified: Optional[str] = None
+    ) -> Dict:
+        """Company row columns for the AI results and the scraped content they were based on."""
+        return {
             "is_qualified": is_qualified,
             "qualified_at": datetime.now().isoformat() if is_qualified else None,
             "wholesale_partner_check": wholesale_check_passed,
@@ -384,18 +494,10 @@ class OutputManager:
             "market_segments": market_segments,
             "company_scraped_content": scraped_content,
             "scraped_content_date": scraped_content_date.isoformat() if scraped_content_date else None,
+            "scraped_etag": scraped_etag,
+            "scraped_last_modified": scraped_last_modified,
             "last_scraped_at": datetime.now().isoformat()  # Update last scraped date
         }
-        
-        try:
-            response = self.supabase.table("lead_magnet_candidates").update(update_data).eq("id", supabase_id).execute()
-            if response.data:
-                logger.info(f"Updated company qualification status for ID {supabase_id}.")
-            else:
-                logger.warning(f"No company record found to update for ID {supabase_id}.")
-        except Exception as e:
-            logger.error(f"Error updating company qualification status for ID {supabase_id}: {e}")
-            raise
     
     def check_existing_companies_for_new_keywords(
         self,
@@ -421,8 +523,6 @@ class OutputManager:
             - skipped_company_ids: Set of company_ids to skip in Prospeo search
             - no_match_but_wholesale: Set of company_ids that were no_match but are wholesale partners
         """
-        from datetime import timezone
-        
         if not self.supabase:
             logger.warning("Supabase not configured, skipping pre-check")
             return {'skipped_company_ids': set(), 'no_match_but_wholesale': set()}
@@ -431,52 +531,46 @@ class OutputManager:
         no_match_but_wholesale = set()
         
         try:
-            # Query for companies where wholesale_partner_check = TRUE
-            response = self.supabase.table("lead_magnet_candidates")\
-                .select("*")\
-                .eq("wholesale_partner_check", True)\
-                .is_("person_id", "null")\
-                .execute()
+            keyword_index = get_keyword_index()
+            if keyword_index.is_stale():
+                self._reload_keyword_index(keyword_index)
+                overlap_values = set()
+            else:
+                # Companies another process qualified since the index was loaded: Postgres array overlap (GIN index
+                # on product_categories) with the keywords and the stored spellings the index already matches
+                overlap_values = {
+                    variant
+                    for keyword in current_keywords
+                    for variant in (keyword.strip(), keyword.strip().lower(), keyword.strip().title())
+                    if variant
+                } | keyword_index.matched_labels(current_keywords)
+            if overlap_values:
+                recent_count = 0
+                for company_record in self._iter_wholesale_companies(KEYWORD_INDEX_COLUMNS, overlap_values):
+                    if company_record.get('company_id') and company_record.get('product_categories'):
+                        keyword_index.add_company(
+                            company_record['company_id'],
+                            company_record['product_categories'] + (company_record.get('market_segments') or [])
+                        )
+                        recent_count += 1
+                logger.info(f"Array-overlap pre-filter: {recent_count} wholesale-fit companies share a category with the keywords")
             
-            companies = response.data if response.data else []
-            logger.info(f"Found {len(companies)} existing wholesale-fit companies in Supabase")
+            # Quick match: new keywords vs stored categories/segments, resolved to company ID sets
+            resolved = keyword_index.resolve(current_keywords)
             
-            for company_record in companies:
-                company_id = company_record.get('company_id')
-                if not company_id:
-                    continue
-                
-                stored_categories = company_record.get('product_categories', []) or []
-                
-                # Quick match: new keywords vs stored categories
-                if stored_categories:
-                    match_result = quick_match_keywords_against_categories(
-                        new_keywords=current_keywords,
-                        stored_categories=stored_categories
-                    )
-                    
-                    if match_result['confidence'] == 'strong_match' and match_result['matched']:
-                        # Strong match - company is qualified for this search
-                        logger.info(f"Company {company_record.get('company_name')} has strong keyword match. Checking for persons...")
-                        
-                        # TODO: Search for persons at this company and add to qualified_leads
-                        # For now, just mark to skip Prospeo search
-                        skipped_company_ids.add(company_id)
-                        
-                    elif match_result['confidence'] == 'no_match':
-                        # No match - mark for potential re-check if appears in Prospeo
-                        logger.info(f"Company {company_record.get('company_name')} has no keyword match. Will re-check if appears in Prospeo.")
-                        no_match_but_wholesale.add(company_id)
-                        
-                    else:  # uncertain
-                        # Uncertain - will need AI re-run later
-                        logger.info(f"Company {company_record.get('company_name')} has uncertain keyword match. Will re-run AI check.")
-                        # Don't skip - will process normally and re-run AI
-                
-                else:
-                    # No stored categories - will need AI check
-                    logger.info(f"Company {company_record.get('company_name')} has no stored categories. Will run AI check.")
-                    # Don't skip - will process normally
+            # Strong match - companies are qualified for this search
+            # TODO: Search for persons at these companies and add to qualified_leads
+            # For now, just mark to skip Prospeo search
+            skipped_company_ids = resolved['strong_match']
+            
+            # No match - mark for potential re-check if they appear in Prospeo
+            no_match_but_wholesale = resolved['no_match']
+            
+            # Uncertain - not skipped; processed normally with an AI re-run
+            logger.info(
+                f"Keyword quick match over {len(keyword_index)} companies: {len(skipped_company_ids)} strong, "
+                f"{len(resolved['uncertain'])} uncertain (will re-run AI check), {len(no_match_but_wholesale)} no match"
+            )
             
             logger.info(f"Pre-check complete: {len(skipped_company_ids)} companies to skip, {len(no_match_but_wholesale)} no-match companies to re-check")
             
@@ -488,6 +582,65 @@ class OutputManager:
             'no_match_but_wholesale': no_match_but_wholesale
         }
     
+    def _reload_keyword_index(self, keyword_index: KeywordIndex) -> None:
+        """
+        Load every wholesale-fit company's categories/segments into the shared keyword index.
+        Called when it was never loaded or is older than KEYWORD_INDEX_REFRESH_SECONDS; between
+        loads it is kept current by save_company_to_supabase.
+        """
+        # Companies where wholesale_partner_check = TRUE, only the indexed columns, page by page
+        counts = {'companies': 0, 'categorized': 0}
+        
+        def categorized_companies():
+            for record in self._iter_wholesale_companies(KEYWORD_INDEX_COLUMNS):
+                counts['companies'] += 1
+                if record.get('company_id') and record.get('product_categories'):
+                    counts['categorized'] += 1
+                    yield record['company_id'], record['product_categories'] + (record.get('market_segments') or [])
+        
+        keyword_index.rebuild(categorized_companies())
+        logger.info(
+            f"Found {counts['companies']} existing wholesale-fit companies in Supabase "
+            f"({counts['companies'] - counts['categorized']} without stored categories will run the AI check)"
+        )
+    
+    def _iter_wholesale_companies(self, columns: str, categories_overlap: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """
+        Yield wholesale-fit company rows (wholesale_partner_check = TRUE) with keyset pagination on id, so each request reads one SUPABASE_PAGE_SIZE page
+        and no OFFSET scan grows with the table.
+        
+        Args:
+            columns: Columns to select (must include id)
+            categories_overlap: Only rows whose product_categories share an element with these values
+        """
+        last_id = None
+        while True:
+            query = self.company_query(columns).eq("wholesale_partner_check", True)
+            if categories_overlap:
+                query = query.ov("product_categories", _pg_array_values(sorted(categories_overlap)))
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(config.SUPABASE_PAGE_SIZE).execute().data or []
+            
+            yield from rows
+            if len(rows) < config.SUPABASE_PAGE_SIZE:
+                return
+            last_id = rows[-1]['id']
+    
+    def _update_keyword_index(self, company_record: Dict) -> None:
+        """Apply a company row's new qualification results to the shared keyword index (if loaded)."""
+        keyword_index = get_keyword_index()
+        company_id = company_record.get('company_id')
+        if keyword_index.loaded_at is None or not company_id:
+            return
+        if company_record.get('wholesale_partner_check') and company_record.get('product_categories'):
+            keyword_index.add_company(
+                company_id,
+                company_record['product_categories'] + (company_record.get('market_segments') or [])
+            )
+        else:
+            keyword_index.remove_company(company_id)
+    
     def generate_csv(self, qualified_leads: List[Dict], metadata: Dict = None) -> str:
         """
         Generate CSV file from qualified leads.
@@ -0,0 +1,177 @@
+"""
+Staged Pipeline Module
+Runs work through a chain of stages connected by bounded queues, with a
+configurable number of worker threads per stage.
+
+Used by Layer 4 so a run keeps many network requests in flight
+(Supabase, website scraping, OpenRouter, Prospeo) instead of handling
+one company at a time. A stage can also take items in batches, for
+handlers that send several items in one request.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marker put on a queue to tell a worker that upstream is finished
+_END = object()
+
+
+class Stage:
+    """A single pipeline stage: a handler plus the worker threads that run it."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable,
+        workers: int = 1,
+        queue_size: int = 50,
+        batch_size: int = 1,
+        batch_wait: float = 0.0
+    ):
+        """
+        Initialize a pipeline stage.
+
+        Args:
+            name: Stage name (used for logging and thread names)
+            handler: Called with one item (or a list of items when batch_size > 1);
+                     returns an iterable of items for the next stage (or None)
+            workers: Number of worker threads for this stage
+            queue_size: Maximum number of items waiting in this stage's input queue
+            batch_size: Maximum items per handler call; above 1 the handler gets a list
+            batch_wait: Seconds a worker waits for a batch to fill before running a partial one
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers or 1))
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size or 1)))
+        self.batch_size = max(1, int(batch_size or 1))
+        self.batch_wait = max(0.0, float(batch_wait or 0.0))
+        self.processed = 0
+        self.errors = 0
+        self._active_workers = self.workers
+        self._lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues.
+
+    Items produced by the source are handed to the first stage; whatever a
+    stage handler returns is fed to the next stage. Setting stop_event makes
+    the source stop producing and every stage drain its queue without calling
+    its handler, so the pipeline shuts down cleanly once a goal is reached.
+    """
+
+    def __init__(self, stages: List[Stage], stop_event: Optional[threading.Event] = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.stop_event = stop_event or threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def run(self, source: Iterable) -> None:
+        """
+        Feed items from source through all stages and block until every stage is done.
+
+        The source is consumed in the calling thread. If it raises, the pipeline is
+        stopped and drained before the exception is re-raised.
+
+        Args:
+            source: Iterable (usually a generator) of items for the first stage
+        """
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for worker_number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage, next_stage),
+                    name=f"pipeline-{stage.name}-{worker_number + 1}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        first_stage = self.stages[0]
+        try:
+            for item in source:
+                if self.stop_event.is_set():
+                    break
+                first_stage.queue.put(item)
+        except BaseException:
+            self.stop_event.set()
+            raise
+        finally:
+            for _ in range(first_stage.workers):
+                first_stage.queue.put(_END)
+            for thread in self._threads:
+                thread.join()
+
+    def stop(self) -> None:
+        """Ask the source and all stages to stop; queued items are drained, not processed."""
+        self.stop_event.set()
+
+    def _worker(self, stage: Stage, next_stage: Optional[Stage]) -> None:
+        """Worker loop: take items (or batches) from the stage queue, run the handler, pass results on."""
+        ended = False
+        while not ended:
+            item = stage.queue.get()
+            if item is _END:
+                break
+
+            batch = [item]
+            if stage.batch_size > 1:
+                batch, ended = self._fill_batch(stage, batch)
+
+            if self.stop_event.is_set():
+                continue  # Drain without processing so upstream never blocks
+
+            try:
+                results = stage.handler(batch if stage.batch_size > 1 else item)
+                with stage._lock:
+                    stage.processed += len(batch)
+                if results and next_stage is not None:
+                    for result in results:
+                        next_stage.queue.put(result)
+            except Exception as e:
+                with stage._lock:
+                    stage.errors += len(batch)
+                logger.error(f"Error in pipeline stage '{stage.name}': {e}", exc_info=True)
+
+        # The last worker of a stage to finish tells the next stage that no more items are coming
+        with stage._lock:
+            stage._active_workers -= 1
+            last_worker = stage._active_workers == 0
+        if last_worker and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_END)
+
+    def _fill_batch(self, stage: Stage, batch: List) -> Tuple[List, bool]:
+        """
+        Add queued items to batch until it is full or batch_wait has passed.
+
+        Returns:
+            Tuple of (batch, ended) where ended means this worker's end marker was taken
+        """
+        deadline = time.monotonic() + stage.batch_wait
+        while len(batch) < stage.batch_size and not self.stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            try:
+                item = stage.queue.get(timeout=remaining) if remaining > 0 else stage.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def stats(self) -> dict:
+        """Return processed/error counts per stage."""
+        return {
+            stage.name: {'processed': stage.processed, 'errors': stage.errors, 'workers': stage.workers}
+            for stage in self.stages
+        }
@@ -0,0 +1,194 @@
+"""
+Prompt Builder Module
+Fits scraped website content into a per-check token budget before it is
+embedded in an AI prompt.
+
+The content from WebsiteScraper.format_scraped_content_for_ai (or the same
+text cached in Supabase) is split into its sections, repeated lines and
+" | " items are removed, and sections are kept in order of value for the
+check (brand indicators and navigation first) until the budget is spent.
+The last section that does not fit whole is trimmed. Sections keep their
+original order in the output, so the prompt reads the same as before.
+
+Token counts use tiktoken when it is installed, else a ~4 characters per
+token estimate.
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # Optional: fall back to a character-based estimate
+    _encoding = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Section headers written by WebsiteScraper.format_scraped_content_for_ai
+HEADER_SECTION = "HEADER"  # URL and page title (always kept)
+BRAND_SECTION = "BRAND INDICATORS"
+NAVIGATION_SECTION = "NAVIGATION MENU ITEMS"
+PRODUCTS_SECTION = "PRODUCT LISTINGS"
+META_SECTION = "META DESCRIPTION"
+MAIN_SECTION = "MAIN CONTENT (excerpt)"
+FOOTER_SECTION = "FOOTER CONTENT"
+SECTION_HEADERS = (BRAND_SECTION, NAVIGATION_SECTION, PRODUCTS_SECTION, META_SECTION, MAIN_SECTION, FOOTER_SECTION)
+
+# Sections in order of value per check (earlier sections get the budget first)
+SECTION_PRIORITY = {
+    "wholesale": [BRAND_SECTION, NAVIGATION_SECTION, META_SECTION, PRODUCTS_SECTION, FOOTER_SECTION, MAIN_SECTION],
+    "keyword": [BRAND_SECTION, NAVIGATION_SECTION, PRODUCTS_SECTION, META_SECTION, MAIN_SECTION, FOOTER_SECTION],
+}
+SECTION_PRIORITY["combined"] = SECTION_PRIORITY["keyword"]
+
+# Sections below this many tokens of remaining budget are dropped rather than cut to a stub
+MIN_TRIMMED_SECTION_TOKENS = 16
+
+_SECTION_HEADER_PATTERN = re.compile(
+    r"^(" + "|".join(re.escape(header) for header in SECTION_HEADERS) + r"):\s*$",
+    re.MULTILINE
+)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count (or estimate) the tokens in text.
+
+    Args:
+        text: Any prompt text
+
+    Returns:
+        Token count from tiktoken's o200k_base encoding, or len(text) / 4 without tiktoken
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Estimate the prompt tokens of a chat message list (content plus a few tokens per message)."""
+    return sum(count_tokens(message.get("content") or "") + 4 for message in messages)
+
+
+def split_sections(scraped_content: str) -> List[Tuple[str, str]]:
+    """
+    Split formatted scraped content into (section, body) pairs in their original order.
+
+    Text before the first known header is returned as the HEADER section. Content
+    without any known header comes back as a single HEADER section.
+    """
+    sections = []
+    matches = list(_SECTION_HEADER_PATTERN.finditer(scraped_content))
+    preamble = scraped_content[:matches[0].start()] if matches else scraped_content
+    if preamble.strip():
+        sections.append((HEADER_SECTION, preamble.strip()))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(scraped_content)
+        sections.append((match.group(1), scraped_content[match.end():end].strip()))
+    return sections
+
+
+def dedupe_section(body: str) -> str:
+    """Remove repeated lines and repeated " | " items (case-insensitive, first occurrence kept)."""
+    seen = set()
+    lines = []
+    for line in body.split("\n"):
+        items = []
+        for item in line.split(" | "):
+            key = item.strip().lower()
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            items.append(item)
+        if any(item.strip() for item in items):
+            lines.append(" | ".join(items))
+    return "\n".join(lines)
+
+
+def trim_to_tokens(body: str, max_tokens: int) -> str:
+    """
+    Cut a section to at most max_tokens: whole " | " items for lists, whole words otherwise.
+
+    Returns:
+        The trimmed text ("" if nothing fits)
+    """
+    if count_tokens(body) <= max_tokens:
+        return body
+    separator = " | " if " | " in body else " "
+    parts = body.replace("\n", separator).split(separator)
+
+    # Binary search for the longest prefix of parts that fits (with the trailing marker)
+    low, high = 0, len(parts)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(separator.join(parts[:middle]) + "...") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return separator.join(parts[:low]) + "..." if low else ""
+
+
+def fit_scraped_content(scraped_content: Optional[str], budget_tokens: int, check: str = "keyword") -> Optional[str]:
+    """
+    Fit formatted scraped content into a token budget.
+
+    Args:
+        scraped_content: Text from format_scraped_content_for_ai (or cached in Supabase); None passes through
+        budget_tokens: Maximum tokens for the content (0 or less = no limit, only dedupe)
+        check: Which check the content is for ('wholesale', 'keyword', 'combined'); picks the section order
+
+    Returns:
+        The deduplicated content, trimmed to the budget with the most valuable sections kept
+    """
+    if not scraped_content:
+        return scraped_content
+
+    sections = [(name, dedupe_section(body)) for name, body in split_sections(scraped_content)]
+    sections = [(name, body) for name, body in sections if body]
+
+    if budget_tokens and budget_tokens > 0:
+        priority = SECTION_PRIORITY.get(check, SECTION_PRIORITY["keyword"])
+        ranked = sorted(
+            range(len(sections)),
+            key=lambda i: -1 if sections[i][0] == HEADER_SECTION else (
+                priority.index(sections[i][0]) if sections[i][0] in priority else len(priority)
+            )
+        )
+        remaining = budget_tokens
+        kept = {}
+        for index in ranked:
+            name, body = sections[index]
+            cost = count_tokens(_render_section(name, body))
+            if cost <= remaining:
+                kept[index] = body
+                remaining -= cost
+                continue
+            # Trim a section that does not fit whole while enough budget is left for a useful part
+            available = remaining - count_tokens(_render_section(name, ""))
+            if available >= MIN_TRIMMED_SECTION_TOKENS or name == HEADER_SECTION:
+                trimmed = trim_to_tokens(body, max(available, 0))
+                if trimmed:
+                    kept[index] = trimmed
+                    remaining -= count_tokens(_render_section(name, trimmed))
+        sections = [(name, kept[index]) for index, (name, _) in enumerate(sections) if index in kept]
+
+    return "\n\n".join(_render_section(name, body) for name, body in sections)
+
+
+def content_budget(check: str) -> int:
+    """Token budget for scraped content in a check's prompt (config.PROMPT_CONTENT_TOKEN_BUDGETS)."""
+    return config.PROMPT_CONTENT_TOKEN_BUDGETS.get(check, 0)
+
+
+def _render_section(name: str, body: str) -> str:
+    """Render a section the way format_scraped_content_for_ai writes it."""
+    if name == HEADER_SECTION:
+        return body
+    return f"{name}:\n{body}"
@@ -0,0 +1,206 @@
+"""
+Rate Limiter Module
+Token-bucket rate limiting and retry backoff shared by the API clients.
+
+A bucket is shared per API (see get_rate_limiter), so every client instance
+and thread talking to the same API draws from the same quota.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Headers that report how many requests are left in the current window,
+# paired with the header that says when that window resets (in seconds)
+RATE_LIMIT_HEADER_PAIRS = [
+    ("x-ratelimit-remaining", "x-ratelimit-reset"),
+    ("ratelimit-remaining", "ratelimit-reset"),
+    ("x-minute-request-left", "x-minute-reset-seconds"),
+    ("x-daily-request-left", "x-daily-reset-seconds"),
+]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. reserve()
+    hands out tokens in order and returns how long the caller must wait for
+    its token, so callers run at exactly the configured rate instead of
+    hitting the API limit and sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Initialize a token bucket.
+
+        Args:
+            rate: Tokens added per second (requests per second)
+            capacity: Maximum burst size (default: max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before using the reserved tokens
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until the requested tokens are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all new requests for the given number of seconds (e.g. after a 429)."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Spent quota: start refilling from empty once the pause ends
+            self._tokens = min(self._tokens, 0.0)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Pause the bucket when the API reports an exhausted rate-limit window.
+
+        Args:
+            headers: Response headers (case-insensitive mapping)
+
+        Returns:
+            Seconds paused, or None if the headers did not require a pause
+        """
+        lowered = {str(key).lower(): value for key, value in headers.items()}
+        for remaining_header, reset_header in RATE_LIMIT_HEADER_PAIRS:
+            remaining = _parse_float(lowered.get(remaining_header))
+            if remaining is None or remaining > 0:
+                continue
+            reset_seconds = _parse_reset_seconds(lowered.get(reset_header))
+            if reset_seconds:
+                self.pause(reset_seconds)
+                return reset_seconds
+        return None
+
+
+def _parse_float(value) -> Optional[float]:
+    """Parse a numeric header value, returning None if it is missing or malformed."""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset_seconds(value) -> Optional[float]:
+    """
+    Parse a rate-limit reset header.
+    Accepts seconds until reset or a Unix timestamp (values far larger than a day).
+    """
+    seconds = _parse_float(value)
+    if seconds is None:
+        return None
+    if seconds > 86400 * 365:  # Unix timestamp
+        seconds = seconds - time.time()
+    return max(0.0, seconds)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Read the Retry-After header (seconds or HTTP-date), falling back to rate-limit reset headers.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+
+    Returns:
+        Seconds to wait, or None if the response gave no hint
+    """
+    lowered = {str(key).lower(): value for key, value in headers.items()}
+    retry_after = lowered.get("retry-after")
+    if retry_after is not None:
+        seconds = _parse_float(retry_after)
+        if seconds is not None:
+            return max(0.0, seconds)
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            pass
+
+    for _, reset_header in RATE_LIMIT_HEADER_PAIRS:
+        seconds = _parse_reset_seconds(lowered.get(reset_header))
+        if seconds is not None:
+            return seconds
+    return None
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 60.0,
+    retry_after: Optional[float] = None
+) -> float:
+    """
+    Compute how long to wait before retry number `attempt` (0-indexed).
+
+    Uses the server's Retry-After hint when there is one (plus a little jitter so
+    waiting callers don't all retry at once); otherwise capped exponential
+    backoff with full jitter.
+
+    Args:
+        attempt: Retry attempt number (0 for the first retry)
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+        retry_after: Seconds requested by the server, if any
+
+    Returns:
+        Delay in seconds
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, base))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: float = None) -> TokenBucket:
+    """
+    Get the shared token bucket for an API, creating it on first use.
+
+    Args:
+        name: API name (e.g. "prospeo")
+        rate: Requests per second (used only when the bucket is created)
+        capacity: Burst size (used only when the bucket is created)
+
+    Returns:
+        The process-wide TokenBucket for this API
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(rate, capacity)
+        return _limiters[name]
@@ -0,0 +1,311 @@
+"""
+Scrape Cache Module
+Local, content-addressed cache of website scrape results, keyed by normalized domain.
+
+Lets repeated runs (different Slack searches) skip both the fetch and the
+parse for recently seen domains without a Supabase round-trip. Raw HTML and
+AI-formatted content are stored once per distinct content hash (zlib-compressed);
+entries expire after a TTL and the least recently used ones are evicted when
+the cache grows past its size limit. Expired entries that carry an ETag or
+Last-Modified header can be revalidated with a conditional GET and refreshed.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    domain TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    raw_hash TEXT NOT NULL,
+    formatted_hash TEXT NOT NULL,
+    scraped_data TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_scraped_at ON entries (scraped_at);
+"""
+
+# Columns added after the first release, created on open if missing
+ADDED_COLUMNS = {'etag': 'TEXT', 'last_modified': 'TEXT'}
+
+# Expired entries with an ETag/Last-Modified are kept this many extra TTLs so
+# they can be revalidated with a conditional GET instead of re-downloaded
+STALE_RETENTION_TTLS = 1
+
+# Run a prune (TTL + size eviction) after this many writes
+PRUNE_EVERY_WRITES = 100
+# Size eviction frees space down to this fraction of the limit
+EVICTION_LOW_WATER = 0.9
+
+
+def content_hash(data: bytes) -> str:
+    """Return the sha256 hex digest used as a blob key."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScrapeCache:
+    """SQLite-backed scrape cache, safe to share between threads and processes."""
+
+    def __init__(self, path: str = None, ttl_days: float = None, max_mb: float = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path (default: config.SCRAPE_CACHE_PATH)
+            ttl_days: Entries older than this are treated as misses (default: config.SCRAPE_CACHE_TTL_DAYS)
+            max_mb: Size limit for stored content before LRU eviction (default: config.SCRAPE_CACHE_MAX_MB)
+        """
+        self.path = path or config.SCRAPE_CACHE_PATH
+        self.ttl_seconds = (ttl_days if ttl_days is not None else config.SCRAPE_CACHE_TTL_DAYS) * 86400
+        self.max_bytes = int((max_mb if max_mb is not None else config.SCRAPE_CACHE_MAX_MB) * 1024 * 1024)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {column_type}")
+        self.prune()
+
+    def get(self, domain: str, include_stale: bool = False) -> Optional[Dict]:
+        """
+        Look up the entry for a domain.
+
+        Args:
+            domain: Normalized domain (see utils.normalize_domain)
+            include_stale: Also return expired entries that have validators
+                           (ETag/Last-Modified), flagged stale, for revalidation
+
+        Returns:
+            Dictionary with url, scraped_data, formatted_content, raw_hash,
+            scraped_at (datetime), etag, last_modified and stale, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.url, e.raw_hash, e.scraped_data, e.scraped_at, e.etag, e.last_modified, b.data "
+                "FROM entries e JOIN blobs b ON b.hash = e.formatted_hash WHERE e.domain = ?",
+                (domain,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, raw_hash, scraped_data, scraped_at, etag, last_modified, formatted_blob = row
+            stale = now - scraped_at > self.ttl_seconds
+            if stale and not (include_stale and (etag or last_modified)):
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE domain = ?", (now, domain))
+
+        return {
+            'url': url,
+            'scraped_data': json.loads(scraped_data),
+            'formatted_content': zlib.decompress(formatted_blob).decode('utf-8'),
+            'raw_hash': raw_hash,
+            'scraped_at': datetime.fromtimestamp(scraped_at, tz=timezone.utc),
+            'etag': etag,
+            'last_modified': last_modified,
+            'stale': stale
+        }
+
+    def get_raw(self, raw_hash: str) -> Optional[bytes]:
+        """Return the raw HTML stored under a content hash, or None if it has been evicted."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE hash = ?", (raw_hash,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def put(
+        self,
+        domain: str,
+        url: str,
+        raw_html: bytes,
+        scraped_data: Dict,
+        formatted_content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """
+        Store a scrape result for a domain (replacing any previous entry).
+
+        Args:
+            domain: Normalized domain
+            url: URL that was fetched
+            raw_html: Downloaded HTML bytes
+            scraped_data: Extracted fields from WebsiteScraper
+            formatted_content: Output of format_scraped_content_for_ai
+            etag: ETag response header, for later conditional requests
+            last_modified: Last-Modified response header, for later conditional requests
+        """
+        now = time.time()
+        formatted_bytes = formatted_content.encode('utf-8')
+        raw_hash = content_hash(raw_html)
+        formatted_hash = content_hash(formatted_bytes)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for blob_hash, data in ((raw_hash, raw_html), (formatted_hash, formatted_bytes)):
+                    exists = self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+                    if not exists:
+                        compressed = zlib.compress(data)
+                        self._conn.execute(
+                            "INSERT INTO blobs (hash, data, size) VALUES (?, ?, ?)",
+                            (blob_hash, compressed, len(compressed))
+                        )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(domain, url, raw_hash, formatted_hash, scraped_data, scraped_at, last_access, etag, last_modified) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (domain, url, raw_hash, formatted_hash, json.dumps(scraped_data), now, now, etag, last_modified)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            prune_due = self._writes % PRUNE_EVERY_WRITES == 0
+
+        if prune_due:
+            self.prune()
+
+    def refresh(self, domain: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """
+        Mark an entry as freshly scraped after the server answered 304 Not Modified.
+
+        Args:
+            domain: Normalized domain
+            etag: ETag from the 304 response (keeps the stored one when None)
+            last_modified: Last-Modified from the 304 response (keeps the stored one when None)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET scraped_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE domain = ?",
+                (now, now, etag, last_modified, domain)
+            )
+
+    def prune(self) -> Dict[str, int]:
+        """
+        Delete expired entries (keeping revalidatable ones for STALE_RETENTION_TTLS
+        more TTLs), evict least recently used entries while over the
+        size limit, then drop blobs no entry references.
+
+        Returns:
+            Dictionary with expired, evicted and blobs_removed counts
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._conn.execute(
+                    "DELETE FROM entries WHERE scraped_at < ? "
+                    "AND ((etag IS NULL AND last_modified IS NULL) OR scraped_at < ?)",
+                    (now - self.ttl_seconds, now - self.ttl_seconds * (1 + STALE_RETENTION_TTLS))
+                ).rowcount
+                blobs_removed = self._delete_orphan_blobs()
+
+                evicted = 0
+                total = self._total_size()
+                if total > self.max_bytes:
+                    # Evict down to the low-water mark so we don't prune again on the next write
+                    target = self.max_bytes * EVICTION_LOW_WATER
+                    victims = []
+                    rows = self._conn.execute(
+                        "SELECT e.domain, LENGTH(e.scraped_data) + COALESCE(r.size, 0) + COALESCE(f.size, 0) "
+                        "FROM entries e LEFT JOIN blobs r ON r.hash = e.raw_hash "
+                        "LEFT JOIN blobs f ON f.hash = e.formatted_hash ORDER BY e.last_access"
+                    ).fetchall()
+                    for domain, size in rows:
+                        if total <= target:
+                            break
+                        victims.append((domain,))
+                        total -= size  # Approximate when blobs are shared; orphans are counted exactly below
+                    self._conn.executemany("DELETE FROM entries WHERE domain = ?", victims)
+                    evicted = len(victims)
+                    blobs_removed += self._delete_orphan_blobs()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if expired or evicted:
+            logger.info(f"🧹 Scrape cache pruned: {expired} expired, {evicted} evicted, {blobs_removed} blobs removed")
+        return {'expired': expired, 'evicted': evicted, 'blobs_removed': blobs_removed}
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count and stored size in bytes."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {'entries': entries, 'bytes': self._total_size()}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _total_size(self) -> int:
+        """Stored bytes: compressed blobs plus the scraped_data JSON of each entry."""
+        blob_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        entry_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(scraped_data)), 0) FROM entries").fetchone()[0]
+        return blob_bytes + entry_bytes
+
+    def _delete_orphan_blobs(self) -> int:
+        """Delete blobs that no entry references (a blob may be shared by several domains)."""
+        return self._conn.execute(
+            "DELETE FROM blobs WHERE hash NOT IN (SELECT raw_hash FROM entries) "
+            "AND hash NOT IN (SELECT formatted_hash FROM entries)"
+        ).rowcount
+
+
+_shared_cache: Optional[ScrapeCache] = None
+_shared_cache_lock = threading.Lock()
+_shared_cache_failed = False
+
+
+def get_scrape_cache() -> Optional[ScrapeCache]:
+    """
+    Get the process-wide scrape cache.
+
+    Returns:
+        The shared ScrapeCache, or None if it is disabled (SCRAPE_CACHE_ENABLED)
+        or the database could not be opened
+    """
+    global _shared_cache, _shared_cache_failed
+    if not config.SCRAPE_CACHE_ENABLED:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None and not _shared_cache_failed:
+            try:
+                _shared_cache = ScrapeCache()
+                logger.info(f"✅ Scrape cache opened at {_shared_cache.path}")
+            except (sqlite3.Error, OSError) as e:
+                _shared_cache_failed = True
+                logger.warning(f"⚠️  Scrape cache unavailable ({e}); scraping without it")
+        return _shared_cache
@@ -0,0 +1,50 @@
+-- Hot lead_magnet_candidates queries, as PostgREST sends them for OutputManager.
+-- Included twice by hot_query_indexes.sql (before and after the new indexes).
+
+\echo '--- get_company_from_supabase: one company, newest company row'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT *
+FROM lead_magnet_candidates
+WHERE company_id = 'company-4242' AND person_id IS NULL
+ORDER BY created_at DESC
+LIMIT 1;
+
+\echo '--- get_company_from_supabase by name (company without a Prospeo ID)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT *
+FROM lead_magnet_candidates
+WHERE company_name = 'Company 4242' AND person_id IS NULL
+ORDER BY created_at DESC
+LIMIT 1;
+
+\echo '--- get_companies_from_supabase: one Prospeo page (25 companies)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, company_id, created_at, wholesale_partner_check, wholesale_partner_response, company_scraped_content, scraped_content_date
+FROM lead_magnet_candidates
+WHERE company_id = ANY ('{company-1000,company-1001,company-1002,company-1003,company-1004,company-1005,company-1006,company-1007,company-1008,company-1009,company-1010,company-1011,company-1012,company-1013,company-1014,company-1015,company-1016,company-1017,company-1018,company-1019,company-1020,company-1021,company-1022,company-1023,company-1024}') AND person_id IS NULL
+ORDER BY created_at DESC
+LIMIT 1000;
+
+\echo '--- Phase 0 keyword index load: first keyset page of wholesale-fit companies'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, company_id, product_categories, market_segments
+FROM lead_magnet_candidates
+WHERE wholesale_partner_check = 'true' AND person_id IS NULL
+ORDER BY id
+LIMIT 1000;
+
+\echo '--- Phase 0 keyword index load: a later keyset page'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, company_id, product_categories, market_segments
+FROM lead_magnet_candidates
+WHERE wholesale_partner_check = 'true' AND person_id IS NULL AND id > '80000000-0000-0000-0000-000000000000'
+ORDER BY id
+LIMIT 1000;
+
+\echo '--- Phase 0 array-overlap pre-filter'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, company_id, product_categories, market_segments
+FROM lead_magnet_candidates
+WHERE wholesale_partner_check = 'true' AND person_id IS NULL AND product_categories && '{"golf","Golf"}'
+ORDER BY id
+LIMIT 1000;
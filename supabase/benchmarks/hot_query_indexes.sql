@@ -0,0 +1,96 @@
+-- Benchmark: hot lead_magnet_candidates queries before and after
+-- 20261017150000_add_hot_query_partial_indexes.sql
+--
+-- Seeds 1,000,000 rows into a scratch schema (index_benchmark) of a LOCAL
+-- Postgres 13+ database, prints EXPLAIN ANALYZE plans and execution times of
+-- the hot queries (hot_queries.sql) with the original single-column indexes,
+-- applies the migration's indexes and prints them again. Compare the plan
+-- nodes and "Execution Time" lines of the two passes. The schema is dropped
+-- at the end; nothing outside it is touched.
+--
+-- Usage (from the repository root):
+--     createdb lead_magnet_bench
+--     psql -d lead_magnet_bench -f supabase/benchmarks/hot_query_indexes.sql > bench.txt
+--
+-- Data shape: 100,000 companies, each with 2 company rows (person_id NULL, one
+-- per run) and 8 person rows; a third of the companies passed the wholesale
+-- check and have product categories. Rows carry ~256 bytes of scraped content
+-- so the table is not unrealistically narrow.
+
+\set ON_ERROR_STOP on
+\pset pager off
+
+DROP SCHEMA IF EXISTS index_benchmark CASCADE;
+CREATE SCHEMA index_benchmark;
+SET search_path = index_benchmark, public;
+
+-- The columns the hot queries read or filter on (same types as the real table)
+CREATE TABLE lead_magnet_candidates (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    person_id TEXT,
+    company_id TEXT,
+    company_name TEXT,
+    wholesale_partner_check BOOLEAN,
+    wholesale_partner_response TEXT,
+    product_categories TEXT[],
+    market_segments TEXT[],
+    company_scraped_content TEXT,
+    scraped_content_date TIMESTAMP WITH TIME ZONE
+);
+
+\echo '=== Seeding 1,000,000 rows ==='
+\timing on
+INSERT INTO lead_magnet_candidates (
+    created_at, person_id, company_id, company_name,
+    wholesale_partner_check, wholesale_partner_response, product_categories, market_segments,
+    company_scraped_content, scraped_content_date
+)
+SELECT
+    NOW() - (g % 365) * INTERVAL '1 day' - g * INTERVAL '1 second',
+    CASE WHEN g % 5 = 0 THEN NULL ELSE 'person-' || g END,
+    'company-' || (g / 5) % 100000,
+    'Company ' || (g / 5) % 100000,
+    CASE WHEN g % 5 = 0 THEN ((g / 5) % 100000) % 3 = 0 END,
+    CASE WHEN g % 5 = 0 THEN 'VERDICT: ' || CASE WHEN ((g / 5) % 100000) % 3 = 0 THEN 'YES' ELSE 'NO' END END,
+    CASE WHEN g % 5 = 0 AND ((g / 5) % 100000) % 3 = 0
+        THEN ARRAY[(ARRAY['Golf', 'Tennis', 'Outdoor', 'Apparel', 'Footwear', 'Fitness'])[1 + (g / 5) % 6], 'Accessories']
+    END,
+    CASE WHEN g % 5 = 0 AND ((g / 5) % 100000) % 3 = 0 THEN ARRAY['Retail'] END,
+    repeat(md5(g::text), 8),
+    CASE WHEN g % 5 = 0 THEN NOW() - (g % 200) * INTERVAL '1 day' END
+FROM generate_series(1, 1000000) AS g;
+\timing off
+
+-- Indexes from 20260123140000_create_lead_magnet_candidates.sql that these queries can use
+CREATE INDEX idx_lead_magnet_created_at ON lead_magnet_candidates(created_at);
+CREATE INDEX idx_company_id ON lead_magnet_candidates(company_id);
+CREATE INDEX idx_company_name ON lead_magnet_candidates(company_name);
+CREATE INDEX idx_wholesale_partner_check ON lead_magnet_candidates(wholesale_partner_check);
+CREATE INDEX idx_person_id ON lead_magnet_candidates(person_id);
+CREATE INDEX idx_product_categories ON lead_magnet_candidates USING GIN(product_categories);
+VACUUM ANALYZE lead_magnet_candidates;
+
+\echo ''
+\echo '=== BEFORE: original single-column indexes ==='
+\ir hot_queries.sql
+
+\echo ''
+\echo '=== Applying 20261017150000_add_hot_query_partial_indexes.sql ==='
+\timing on
+\ir ../migrations/20261017150000_add_hot_query_partial_indexes.sql
+\timing off
+VACUUM ANALYZE lead_magnet_candidates;
+
+\echo ''
+\echo '=== AFTER: partial composite indexes ==='
+\ir hot_queries.sql
+
+\echo ''
+\echo '=== Index sizes ==='
+SELECT indexrelname AS index, pg_size_pretty(pg_relation_size(indexrelid)) AS size
+FROM pg_stat_user_indexes
+WHERE schemaname = 'index_benchmark'
+ORDER BY pg_relation_size(indexrelid) DESC;
+
+DROP SCHEMA index_benchmark CASCADE;
@@ -0,0 +1,18 @@
+-- Migration: Store HTTP validators for scraped website content
+-- Lets re-scrapes use conditional GETs (If-None-Match / If-Modified-Since):
+-- when the site answers 304 Not Modified, the stored company_scraped_content is
+-- reused and only scraped_content_date is refreshed.
+-- Created: 2026-10-17
+
+ALTER TABLE lead_magnet_candidates
+    ADD COLUMN IF NOT EXISTS scraped_etag TEXT,
+    ADD COLUMN IF NOT EXISTS scraped_last_modified TEXT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- scraped_etag holds the ETag response header and scraped_last_modified the
+-- Last-Modified header (kept verbatim, HTTP-date format) of the page that
+-- produced company_scraped_content. Both are NULL when the site sent neither.
+--
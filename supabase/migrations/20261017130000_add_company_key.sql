@@ -0,0 +1,88 @@
+-- Migration: One company row per company, upserted on company_key
+-- Company-only rows (person_id IS NULL) used to be inserted on every run, so a
+-- company seen in N runs had N rows and lookups had to sort them by created_at.
+-- The app now upserts company rows on company_key: the Prospeo company_id, or
+-- 'domain:' || normalized domain when the ID is missing (utils.build_company_key).
+-- Created: 2026-10-17
+
+-- ============================================================================
+-- COLUMN
+-- ============================================================================
+
+ALTER TABLE lead_magnet_candidates
+    ADD COLUMN IF NOT EXISTS company_key TEXT;
+
+-- ============================================================================
+-- BACKFILL (company rows only; person rows keep company_key NULL)
+-- ============================================================================
+
+-- Same key as utils.build_company_key: the company ID, else the domain (or the
+-- website when there is no domain; 'N/A' counts as unknown) with the same
+-- normalization as utils.normalize_domain: lowercase, no scheme, path,
+-- credentials, port, leading "www." or surrounding dots
+UPDATE lead_magnet_candidates
+SET company_key = COALESCE(
+    NULLIF(btrim(company_id), ''),
+    'domain:' || NULLIF(
+        btrim(
+            regexp_replace(
+                regexp_replace(
+                    regexp_replace(
+                        regexp_replace(
+                            regexp_replace(lower(btrim(NULLIF(COALESCE(NULLIF(company_domain, ''), company_website), 'N/A'))), '^.*://', ''),
+                            '[/?#].*$', ''
+                        ),
+                        '^.*@', ''
+                    ),
+                    ':.*$', ''
+                ),
+                '^www\.', ''
+            ),
+            '.'
+        ),
+        ''
+    )
+)
+WHERE person_id IS NULL
+  AND company_key IS NULL;
+
+-- ============================================================================
+-- DEDUPLICATE
+-- ============================================================================
+
+-- Keep one row per company_key: the newest row that has a wholesale check
+-- result (so stored AI results and scraped content survive), else the newest row
+DELETE FROM lead_magnet_candidates
+WHERE id IN (
+    SELECT id
+    FROM (
+        SELECT
+            id,
+            ROW_NUMBER() OVER (
+                PARTITION BY company_key
+                ORDER BY (wholesale_partner_check IS NOT NULL) DESC, created_at DESC, id
+            ) AS row_rank
+        FROM lead_magnet_candidates
+        WHERE company_key IS NOT NULL
+    ) ranked
+    WHERE row_rank > 1
+);
+
+-- ============================================================================
+-- INDEXES
+-- ============================================================================
+
+-- Not partial: PostgREST upserts (on_conflict=company_key) need a plain unique
+-- index to infer the conflict target. Person rows are NULL, and NULLs never conflict.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lead_magnet_company_key
+    ON lead_magnet_candidates(company_key);
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Company rows without an ID and without a usable domain have company_key NULL;
+-- the app still inserts those as new rows.
+-- A company first stored by domain and later seen with a Prospeo ID gets a second
+-- row keyed on the ID.
+--
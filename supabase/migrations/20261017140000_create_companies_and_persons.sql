@@ -0,0 +1,121 @@
+-- Migration: Normalized companies and persons tables
+-- lead_magnet_candidates keeps company rows (person_id NULL) and person rows in
+-- one wide table: every person row repeats the company columns, the company
+-- JSON inside raw_prospeo_data and the AI responses, and every company query
+-- has to filter person_id IS NULL. These tables store each company once (with
+-- its scrape and AI results) and persons with a foreign key to their company.
+--
+-- The app writes here when SUPABASE_NORMALIZED_TABLES=true. Copy existing rows
+-- first with: python backfill_normalized_tables.py
+-- lead_magnet_candidates is left in place (read-only once the switch is made).
+-- Created: 2026-10-17
+
+-- ============================================================================
+-- COMPANIES
+-- ============================================================================
+
+-- Column names match lead_magnet_candidates, so the same queries work on both
+CREATE TABLE IF NOT EXISTS companies (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Prospeo company_id, or 'domain:' || normalized domain (utils.build_company_key)
+    company_key TEXT UNIQUE,
+
+    -- Company Data
+    company_id TEXT,
+    company_name TEXT,
+    company_description TEXT,
+    company_domain TEXT,
+    company_website TEXT,
+    company_industry TEXT,
+    company_size TEXT,
+    company_location TEXT,
+
+    -- Qualification Metadata (latest run that qualified this company)
+    is_qualified BOOLEAN DEFAULT FALSE,
+    qualified_at TIMESTAMP WITH TIME ZONE,
+    qualification_criteria TEXT,
+    search_criteria TEXT,
+
+    -- Slack Metadata
+    slack_user_id TEXT,
+    slack_channel_id TEXT,
+    slack_trigger_id TEXT,
+
+    -- AI Check Results
+    wholesale_partner_check BOOLEAN,
+    wholesale_partner_response TEXT,
+    keyword_match_check BOOLEAN,
+    keyword_match_response TEXT,
+    product_categories TEXT[],
+    market_segments TEXT[],
+
+    -- Scraped content
+    company_scraped_content TEXT,
+    scraped_content_date TIMESTAMP WITH TIME ZONE,
+    scraped_etag TEXT,
+    scraped_last_modified TEXT,
+    last_scraped_at TIMESTAMP WITH TIME ZONE,
+
+    -- Full company JSON from Prospeo
+    raw_prospeo_data JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_companies_company_id ON companies(company_id);
+CREATE INDEX IF NOT EXISTS idx_companies_company_domain ON companies(company_domain);
+CREATE INDEX IF NOT EXISTS idx_companies_company_name ON companies(company_name);
+CREATE INDEX IF NOT EXISTS idx_companies_product_categories ON companies USING GIN(product_categories);
+-- Phase 0 pages through wholesale-fit companies in id order
+CREATE INDEX IF NOT EXISTS idx_companies_wholesale_id ON companies(id) WHERE wholesale_partner_check = TRUE;
+
+-- ============================================================================
+-- PERSONS
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS persons (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Company this person works at (NULL when the company has neither ID nor domain)
+    company_key TEXT REFERENCES companies(company_key) ON UPDATE CASCADE ON DELETE CASCADE,
+
+    -- Person Data (from Prospeo)
+    person_id TEXT,
+    person_name TEXT,
+    person_email TEXT,
+    person_title TEXT,
+    person_linkedin_url TEXT,
+
+    -- Qualification Metadata
+    is_qualified BOOLEAN DEFAULT FALSE,
+    qualified_at TIMESTAMP WITH TIME ZONE,
+    qualification_criteria TEXT,
+    search_criteria TEXT,
+    prospeo_page_number INTEGER,
+    processing_order INTEGER,
+
+    -- Slack Metadata
+    slack_user_id TEXT,
+    slack_channel_id TEXT,
+    slack_trigger_id TEXT,
+
+    -- Person JSON from Prospeo (without the embedded company) and the company's AI response
+    raw_prospeo_data JSONB,
+    openrouter_response TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_persons_company_key ON persons(company_key);
+CREATE INDEX IF NOT EXISTS idx_persons_person_id ON persons(person_id);
+CREATE INDEX IF NOT EXISTS idx_persons_slack_trigger ON persons(slack_trigger_id);
+CREATE INDEX IF NOT EXISTS idx_persons_is_qualified ON persons(is_qualified);
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- persons.company_key references companies.company_key (unique) rather than
+-- companies.id: the app and the backfill both derive it from the Prospeo company,
+-- so a person can be written without first reading back the company's row ID.
+-- The app flushes queued company writes before person writes.
+--
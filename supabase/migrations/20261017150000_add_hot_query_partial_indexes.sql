@@ -0,0 +1,55 @@
+-- Migration: Partial composite indexes for the hot lead_magnet_candidates queries
+-- The initial schema only has single-column indexes (company_id, person_id,
+-- wholesale_partner_check). The queries the app runs on every company combine
+-- those columns, so Postgres either picks one index and filters the rest row by
+-- row, or sorts all of a company's rows to find the newest one.
+-- These indexes match the exact predicates (person_id IS NULL = company rows).
+-- Measure them with supabase/benchmarks/hot_query_indexes.sql.
+-- Created: 2026-10-17
+
+-- ============================================================================
+-- COMPANY LOOKUPS (Layer 4 lookup stage)
+-- ============================================================================
+
+-- get_company_from_supabase / get_companies_from_supabase:
+--   company_id = ? (or IN (...)) AND person_id IS NULL ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_lead_magnet_company_lookup
+    ON lead_magnet_candidates(company_id, created_at DESC)
+    WHERE person_id IS NULL;
+
+-- Fallback for companies without a Prospeo ID: company_name = ? AND person_id IS NULL
+CREATE INDEX IF NOT EXISTS idx_lead_magnet_company_name_lookup
+    ON lead_magnet_candidates(company_name, created_at DESC)
+    WHERE person_id IS NULL;
+
+-- ============================================================================
+-- PHASE 0 (wholesale-fit companies)
+-- ============================================================================
+
+-- Keyword index load: wholesale_partner_check = TRUE AND person_id IS NULL,
+-- keyset-paginated (id > ? ORDER BY id LIMIT page_size)
+CREATE INDEX IF NOT EXISTS idx_lead_magnet_wholesale_companies
+    ON lead_magnet_candidates(id)
+    WHERE wholesale_partner_check = TRUE AND person_id IS NULL;
+
+-- Array-overlap pre-filter: the same predicate plus product_categories && ARRAY[...]
+CREATE INDEX IF NOT EXISTS idx_lead_magnet_wholesale_categories
+    ON lead_magnet_candidates USING GIN(product_categories)
+    WHERE wholesale_partner_check = TRUE AND person_id IS NULL;
+
+-- idx_wholesale_partner_check is kept: the benchmark shows the planner using it
+-- for the array-overlap query when these partial indexes are absent, and other
+-- queries filtering on the boolean alone are not measured
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- PostgREST sends is_("person_id", "null") as person_id IS NULL and
+-- eq("wholesale_partner_check", True) as wholesale_partner_check = 'true', which
+-- the planner matches against these partial index predicates.
+-- On a large live table, create the indexes by hand with CREATE INDEX
+-- CONCURRENTLY first (migrations run in a transaction, which CONCURRENTLY cannot).
+-- The normalized companies table (20261017140000) needs no person_id predicate;
+-- it already has idx_companies_wholesale_id.
+--
@@ -0,0 +1,151 @@
+"""
+Parser backend parity test.
+Checks that every HTML parser backend produces the same format_scraped_content_for_ai
+output on the fixture pages in fixtures/scraper_pages, and that the single-pass
+extractor reproduces the scraped_data of the legacy per-field extractor
+(benchmark_scraper.legacy_extract_content) except for the differences pinned in
+INTENDED_LEGACY_DIFFERENCES.
+
+Run with: python test_parser_backends.py   (or: pytest test_parser_backends.py)
+"""
+import difflib
+import glob
+import os
+
+from benchmark_scraper import legacy_extract_content
+from website_scraper import PARSER_BACKENDS, WebsiteScraper, lxml_etree
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scraper_pages")
+REFERENCE_BACKEND = "html.parser"
+
+# (page, field) -> what the single-pass extractor produces instead of the legacy value
+INTENDED_LEGACY_DIFFERENCES = {
+    # Nav items are listed once, in document order (legacy appended every matching
+    # selector's links, so the same menu appeared up to three times)
+    ("manufacturer.html", "navigation"): "Packs | Accessories | Our Story | Where to Buy | Warranty | Stockists",
+    ("retailer.html", "navigation"): "Camping | Climbing | Hiking | Brands | Sale",
+    # An unclosed <a> ends at the next <a> (legacy merged the following links into its text)
+    ("messy.html", "navigation"): "Bikes | Skate | Repairs",
+    # <noscript> fallback text is not page content
+    ("messy.html", "main_content"): (
+        "Open 7 days a week. Walk-in repairs welcome! We stock brands like Trek, Santa Cruz and Element. "
+        "Trek Marlin 5 Trail-ready hardtail Element Section Deck Find us on the map"
+    ),
+    # Brand and manufacturer indicators are also read from nav and footer links (legacy
+    # scanned after the main-content pass had removed them, losing "Brands"/"Stockists" menus)
+    ("manufacturer.html", "brand_mentions"): {
+        "positive": "",
+        "negative": (
+            "Where to Buy | Interested in stocking our packs? Become a distributor or find our "
+            "retail partners near you. | Dealer sign up | Stockists"
+        ),
+    },
+    ("retailer.html", "brand_mentions"): {
+        "positive": "Brands | Brand filter with 5 options | Shop by Brand | All Brands",
+        "negative": "",
+    },
+}
+
+
+def load_fixture_pages():
+    """Load fixture pages as {file name: HTML bytes}."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def available_backends():
+    """Backends that can run here (lxml is optional)."""
+    return [name for name in PARSER_BACKENDS if name != "lxml" or lxml_etree is not None]
+
+
+def compare_backends():
+    """
+    Compare every available backend against the reference backend.
+    
+    Returns:
+        List of (page, backend, diff text) for each mismatch
+    """
+    pages = load_fixture_pages()
+    reference = WebsiteScraper(parser_backend=REFERENCE_BACKEND)
+    mismatches = []
+    
+    for backend in available_backends():
+        if backend == REFERENCE_BACKEND:
+            continue
+        scraper = WebsiteScraper(parser_backend=backend)
+        for name, html in pages.items():
+            expected = reference.format_scraped_content_for_ai(reference.extract_content(html, name))
+            actual = scraper.format_scraped_content_for_ai(scraper.extract_content(html, name))
+            if actual != expected:
+                diff = "\n".join(difflib.unified_diff(
+                    expected.splitlines(), actual.splitlines(),
+                    fromfile=REFERENCE_BACKEND, tofile=backend, lineterm=""
+                ))
+                mismatches.append((name, backend, diff))
+    
+    return mismatches
+
+
+def compare_with_legacy():
+    """
+    Compare the reference backend's scraped_data with the legacy extractor's.
+    
+    Returns:
+        List of (page, field, expected, actual) for each field that differs from the
+        legacy value (or from its pinned value in INTENDED_LEGACY_DIFFERENCES)
+    """
+    scraper = WebsiteScraper(parser_backend=REFERENCE_BACKEND)
+    mismatches = []
+    
+    for name, html in load_fixture_pages().items():
+        actual = scraper.extract_content(html, name)
+        for field, legacy_value in legacy_extract_content(html, name).items():
+            expected = INTENDED_LEGACY_DIFFERENCES.get((name, field), legacy_value)
+            if actual[field] != expected:
+                mismatches.append((name, field, expected, actual[field]))
+    
+    return mismatches
+
+
+def test_fixture_pages_exist():
+    assert load_fixture_pages(), f"No fixture pages found in {FIXTURES_DIR}"
+
+
+def test_backends_match_reference():
+    mismatches = compare_backends()
+    assert not mismatches, "\n\n".join(f"{name} [{backend}]\n{diff}" for name, backend, diff in mismatches)
+
+
+def test_matches_legacy_extractor():
+    mismatches = compare_with_legacy()
+    assert not mismatches, "\n".join(
+        f"{name} {field}: expected {expected!r}, got {actual!r}" for name, field, expected, actual in mismatches
+    )
+
+
+if __name__ == "__main__":
+    pages = load_fixture_pages()
+    backends = available_backends()
+    print(f"Comparing {len(backends)} backends ({', '.join(backends)}) on {len(pages)} fixture pages")
+    print("=" * 60)
+    
+    mismatches = compare_backends()
+    for name, backend, diff in mismatches:
+        print(f"❌ {name} [{backend}] differs from {REFERENCE_BACKEND}:")
+        print(diff)
+        print()
+    
+    legacy_mismatches = compare_with_legacy()
+    for name, field, expected, actual in legacy_mismatches:
+        print(f"❌ {name} {field} differs from the legacy extractor:")
+        print(f"   expected: {expected!r}")
+        print(f"   actual:   {actual!r}")
+    
+    if mismatches or legacy_mismatches:
+        print(f"❌ {len(mismatches)} backend mismatches, {len(legacy_mismatches)} legacy mismatches")
+        raise SystemExit(1)
+    print("✅ All backends produce identical AI-formatted content")
+    print(f"✅ Legacy scraped_data reproduced ({len(INTENDED_LEGACY_DIFFERENCES)} pinned differences)")
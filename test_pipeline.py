@@ -0,0 +1,186 @@
+"""
+Staged pipeline tests.
+Covers normal completion, a failing source, stopping mid-run, handler errors and
+batched stages. Every run is guarded by a timeout so a deadlock fails the test
+instead of hanging it.
+
+Run with: pytest test_pipeline.py
+"""
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+RUN_TIMEOUT = 10
+
+
+def run_pipeline(pipeline, source):
+    """
+    Run the pipeline in a thread and wait for it.
+
+    Returns:
+        The exception raised by Pipeline.run, or None
+    """
+    outcome = {}
+
+    def target():
+        try:
+            pipeline.run(source)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(RUN_TIMEOUT)
+    assert not thread.is_alive(), "Pipeline did not finish (deadlock or lost end marker)"
+    assert not any(t.is_alive() for t in pipeline._threads), "Pipeline worker threads still running"
+    return outcome.get('error')
+
+
+def test_needs_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
+
+
+def test_normal_completion_passes_every_item_through():
+    collected = []
+    lock = threading.Lock()
+
+    def collect(item):
+        with lock:
+            collected.append(item)
+
+    pipeline = Pipeline([
+        Stage("double", lambda item: [item * 2], workers=3, queue_size=2),
+        Stage("fan_out", lambda item: [item, item + 1], workers=2, queue_size=2),
+        Stage("collect", collect, workers=4, queue_size=2),
+    ])
+
+    assert run_pipeline(pipeline, range(100)) is None
+    assert sorted(collected) == sorted(x for i in range(100) for x in (i * 2, i * 2 + 1))
+    stats = pipeline.stats()
+    assert stats["double"] == {'processed': 100, 'errors': 0, 'workers': 3}
+    assert stats["fan_out"]["processed"] == 100
+    assert stats["collect"]["processed"] == 200
+
+
+def test_handler_error_is_counted_and_run_continues():
+    collected = []
+
+    def maybe_fail(item):
+        if item % 10 == 0:
+            raise RuntimeError("boom")
+        return [item]
+
+    pipeline = Pipeline([
+        Stage("maybe_fail", maybe_fail, workers=2),
+        Stage("collect", collected.append),
+    ])
+
+    assert run_pipeline(pipeline, range(50)) is None
+    assert sorted(collected) == [i for i in range(50) if i % 10]
+    assert pipeline.stats()["maybe_fail"] == {'processed': 45, 'errors': 5, 'workers': 2}
+
+
+def test_source_exception_stops_drains_and_reraises():
+    handled = []
+
+    def source():
+        for i in range(20):
+            yield i
+        raise ValueError("source failed")
+
+    pipeline = Pipeline([
+        Stage("first", lambda item: [item], workers=2, queue_size=1),
+        Stage("last", handled.append, workers=2, queue_size=1),
+    ])
+
+    error = run_pipeline(pipeline, source())
+    assert isinstance(error, ValueError)
+    assert pipeline.stop_event.is_set()
+    assert len(handled) <= 20
+
+
+def test_stop_mid_run_ends_an_endless_source():
+    stop_event = threading.Event()
+    handled = []
+    lock = threading.Lock()
+
+    def handle(item):
+        with lock:
+            handled.append(item)
+            if len(handled) >= 10:
+                stop_event.set()
+
+    def endless():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    pipeline = Pipeline([
+        Stage("slow", lambda item: time.sleep(0.001) or [item], workers=2, queue_size=3),
+        Stage("handle", handle, workers=2, queue_size=3),
+    ], stop_event=stop_event)
+
+    assert run_pipeline(pipeline, endless()) is None
+    # Items already queued when the goal was reached are drained, not handled
+    assert 10 <= len(handled) <= 12
+
+
+def test_stop_drains_without_calling_handlers():
+    handled = []
+    pipeline = Pipeline([Stage("never", handled.append)])
+    pipeline.stop()
+
+    assert run_pipeline(pipeline, range(5)) is None
+    assert handled == []
+    assert pipeline.stats()["never"]["processed"] == 0
+
+
+def test_batched_stage_gets_lists_and_every_item():
+    batches = []
+    collected = []
+    lock = threading.Lock()
+
+    def batch_handler(items):
+        with lock:
+            batches.append(list(items))
+        return items
+
+    def collect(item):
+        with lock:
+            collected.append(item)
+
+    pipeline = Pipeline([
+        Stage("single", lambda item: [item], workers=2),
+        Stage("batched", batch_handler, workers=3, batch_size=4, batch_wait=0.05),
+        Stage("collect", collect, workers=2),
+    ])
+
+    assert run_pipeline(pipeline, range(37)) is None
+    assert all(isinstance(batch, list) and 1 <= len(batch) <= 4 for batch in batches)
+    assert sorted(item for batch in batches for item in batch) == list(range(37))
+    assert sorted(collected) == list(range(37))
+    assert pipeline.stats()["batched"]["processed"] == 37
+
+
+def test_batch_fills_before_running():
+    batches = []
+    pipeline = Pipeline([Stage("batched", batches.append, batch_size=5, batch_wait=1.0)])
+
+    assert run_pipeline(pipeline, range(10)) is None
+    assert batches == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+
+
+def test_partial_batch_runs_when_source_ends():
+    batches = []
+    pipeline = Pipeline([Stage("batched", batches.append, batch_size=10, batch_wait=5.0)])
+
+    started = time.monotonic()
+    assert run_pipeline(pipeline, range(3)) is None
+    # The end marker finishes the batch; the worker does not sit out batch_wait
+    assert batches == [[0, 1, 2]]
+    assert time.monotonic() - started < 5.0
@@ -0,0 +1,105 @@
+"""
+Rate limiter tests.
+Checks token-bucket reservations, pauses and rate-limit header handling,
+Retry-After parsing and backoff delays without sleeping through real waits.
+
+Run with: pytest test_rate_limiter.py
+"""
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from rate_limiter import TokenBucket, backoff_delay, get_rate_limiter, parse_retry_after
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_burst_then_wait_at_rate():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Tokens are handed out in order: each further caller waits one more interval
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_tokens_refill_up_to_capacity():
+    bucket = TokenBucket(rate=100, capacity=2)
+    bucket.reserve(2)
+    time.sleep(0.1)  # Would refill 10 tokens without the cap
+
+    assert bucket.reserve(2) == 0.0
+    assert bucket.reserve() > 0
+
+
+def test_reservations_from_many_threads_are_spaced_at_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    waits = []
+    lock = threading.Lock()
+
+    def reserve():
+        wait = bucket.reserve()
+        with lock:
+            waits.append(wait)
+
+    threads = [threading.Thread(target=reserve) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 requests at 50/s with a burst of 1: the last one waits about 19 intervals
+    assert max(waits) == pytest.approx(19 / 50, abs=0.02)
+    assert sorted(waits)[0] == 0.0
+
+
+def test_pause_holds_back_requests_and_empties_the_bucket():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(2)
+
+    assert bucket.reserve() == pytest.approx(2, abs=0.05)
+    bucket.pause(0)  # No-op
+    assert bucket._tokens <= 0
+
+
+def test_exhausted_window_header_pauses():
+    bucket = TokenBucket(rate=10)
+
+    assert bucket.update_from_headers({'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '30'}) is None
+    assert bucket.update_from_headers({'X-Minute-Request-Left': '0', 'X-Minute-Reset-Seconds': '3'}) == 3.0
+    assert bucket.reserve() == pytest.approx(3, abs=0.05)
+
+
+def test_reset_header_as_unix_timestamp():
+    bucket = TokenBucket(rate=10)
+    paused = bucket.update_from_headers({'ratelimit-remaining': '0', 'ratelimit-reset': str(time.time() + 10)})
+
+    assert paused == pytest.approx(10, abs=1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({'Retry-After': '7'}) == 7.0
+    assert parse_retry_after({'retry-after': '-1'}) == 0.0
+    assert parse_retry_after({'Retry-After': formatdate(time.time() + 20, usegmt=True)}) == pytest.approx(20, abs=2)
+    # Falls back to the rate-limit reset headers
+    assert parse_retry_after({'Retry-After': 'soon', 'x-ratelimit-reset': '4'}) == 4.0
+    assert parse_retry_after({}) is None
+
+
+def test_backoff_delay():
+    for attempt in range(6):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=10.0) <= min(10.0, 2 ** attempt)
+    assert 5.0 <= backoff_delay(3, base=1.0, retry_after=5.0) <= 6.0
+
+
+def test_shared_limiter_per_api():
+    first = get_rate_limiter("test-rate-limiter-api", rate=5)
+    second = get_rate_limiter("test-rate-limiter-api", rate=100)
+
+    assert first is second
+    assert first.rate == 5
@@ -0,0 +1,124 @@
+"""
+Scrape cache tests.
+Checks storage and lookup by domain, content-addressed blobs shared between
+domains, TTL expiry with revalidation of entries that have validators, LRU
+eviction and the upgrade of cache files created before the validator columns,
+on SQLite files in a temporary directory.
+
+Run with: pytest test_scrape_cache.py
+"""
+import os
+import sqlite3
+import time
+
+from scrape_cache import ScrapeCache, content_hash
+
+HTML = b"<html><head><title>Acme Golf</title></head><body>Shop by brand</body></html>"
+SCRAPED = {'url': "https://acme.com", 'title': "Acme Golf"}
+FORMATTED = "WEBSITE CONTENT ANALYSIS:\n\nURL: https://acme.com\nPage Title: Acme Golf\n"
+
+
+def open_cache(tmp_path, **kwargs):
+    kwargs.setdefault('ttl_days', 30)
+    kwargs.setdefault('max_mb', 10)
+    return ScrapeCache(path=str(tmp_path / "scrapes.sqlite3"), **kwargs)
+
+
+def blob_count(cache):
+    return cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+
+def test_put_and_get(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.get("acme.com") is None
+
+    cache.put("acme.com", "https://acme.com", HTML, SCRAPED, FORMATTED, etag='"v1"')
+    entry = cache.get("acme.com")
+
+    assert entry['url'] == "https://acme.com"
+    assert entry['scraped_data'] == SCRAPED
+    assert entry['formatted_content'] == FORMATTED
+    assert entry['raw_hash'] == content_hash(HTML)
+    assert entry['etag'] == '"v1"' and entry['last_modified'] is None
+    assert entry['stale'] is False
+    assert cache.get_raw(entry['raw_hash']) == HTML
+    cache.close()
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put("acme.com", "https://acme.com", HTML, SCRAPED, FORMATTED)
+    cache.put("www-acme.com", "https://www.acme.com", HTML, SCRAPED, FORMATTED)
+    assert blob_count(cache) == 2  # One raw HTML blob, one formatted blob
+
+    # Replacing one domain's content keeps the blobs the other still references
+    cache.put("acme.com", "https://acme.com", b"<html>new</html>", SCRAPED, "new")
+    cache.prune()
+    assert cache.get("www-acme.com")['formatted_content'] == FORMATTED
+    assert cache.get_raw(content_hash(HTML)) == HTML
+    assert blob_count(cache) == 4
+    cache.close()
+
+
+def test_expired_entries_are_revalidated_or_dropped(tmp_path):
+    # TTL of 0.3 s: stale after 0.3 s, entries with validators are kept until 0.6 s
+    cache = open_cache(tmp_path, ttl_days=0.3 / 86400)
+    cache.put("plain.com", "https://plain.com", b"<html>plain</html>", SCRAPED, "plain")
+    cache.put("etag.com", "https://etag.com", HTML, SCRAPED, FORMATTED, etag='"v1"')
+
+    time.sleep(0.4)
+    assert cache.get("etag.com") is None
+    assert cache.get("plain.com", include_stale=True) is None  # Nothing to revalidate with
+    stale = cache.get("etag.com", include_stale=True)
+    assert stale['stale'] is True and stale['etag'] == '"v1"'
+
+    assert cache.prune()['expired'] == 1
+    assert cache.get("etag.com", include_stale=True) is not None
+
+    # A 304 Not Modified makes the entry fresh again and keeps the stored ETag
+    cache.refresh("etag.com", last_modified="Sat, 17 Oct 2026 00:00:00 GMT")
+    entry = cache.get("etag.com")
+    assert entry['stale'] is False
+    assert entry['etag'] == '"v1"' and entry['last_modified'] == "Sat, 17 Oct 2026 00:00:00 GMT"
+
+    time.sleep(0.7)
+    assert cache.prune()['expired'] == 1
+    assert cache.stats()['entries'] == 0
+    assert blob_count(cache) == 0
+    cache.close()
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    # Random bytes do not compress: each entry stores a little over 700 bytes
+    cache = open_cache(tmp_path, max_mb=2000 / (1024 * 1024))
+    pages = {domain: os.urandom(700) for domain in ("a.com", "b.com", "c.com")}
+    for domain, html in pages.items():
+        cache.put(domain, f"https://{domain}", html, {}, domain)
+        time.sleep(0.01)
+    cache.get("a.com")  # Now the most recently used
+
+    result = cache.prune()
+    assert result['evicted'] == 1 and result['blobs_removed'] == 2
+    assert cache.get("b.com") is None
+    assert cache.get_raw(content_hash(pages["b.com"])) is None
+    assert cache.get("a.com") is not None and cache.get("c.com") is not None
+    cache.close()
+
+
+def test_cache_files_without_validator_columns_are_upgraded(tmp_path):
+    path = tmp_path / "scrapes.sqlite3"
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL);
+        CREATE TABLE entries (
+            domain TEXT PRIMARY KEY, url TEXT NOT NULL, raw_hash TEXT NOT NULL,
+            formatted_hash TEXT NOT NULL, scraped_data TEXT NOT NULL,
+            scraped_at REAL NOT NULL, last_access REAL NOT NULL
+        );
+    """)
+    conn.close()
+
+    cache = open_cache(tmp_path)
+    cache.put("acme.com", "https://acme.com", HTML, SCRAPED, FORMATTED, last_modified="yesterday")
+    assert cache.get("acme.com")['last_modified'] == "yesterday"
+    cache.close()
@@ -0,0 +1,102 @@
+"""
+Verdict cache tests.
+Checks prompt keys, hits and misses, TTL expiry, LRU eviction and the shared
+cache switch, on SQLite files in a temporary directory.
+
+Run with: pytest test_verdict_cache.py
+"""
+import time
+
+import config
+import verdict_cache
+from verdict_cache import VerdictCache, prompt_key
+
+MESSAGES = [
+    {"role": "system", "content": "You judge wholesale fit."},
+    {"role": "user", "content": "Company: Acme Golf"},
+]
+
+
+def open_cache(tmp_path, **kwargs):
+    kwargs.setdefault('ttl_days', 30)
+    kwargs.setdefault('max_mb', 10)
+    return VerdictCache(path=str(tmp_path / "verdicts.sqlite3"), **kwargs)
+
+
+def test_prompt_key_covers_the_whole_request():
+    key = prompt_key("model-a", MESSAGES, 100)
+
+    assert key == prompt_key("model-a", [dict(reversed(list(m.items()))) for m in MESSAGES], 100)
+    assert key != prompt_key("model-b", MESSAGES, 100)
+    assert key != prompt_key("model-a", MESSAGES, 200)
+    assert key != prompt_key("model-a", MESSAGES[:1], 100)
+    assert key != prompt_key("model-a", MESSAGES, 100, response_format={"type": "json_object"})
+    assert key != prompt_key("model-a", MESSAGES, 100, namespace="wholesale-batch")
+    # Unset options leave existing keys unchanged
+    assert key == prompt_key("model-a", MESSAGES, 100, response_format=None, namespace=None)
+
+
+def test_put_get_and_hit_counts(tmp_path):
+    cache = open_cache(tmp_path)
+    key = prompt_key("model-a", MESSAGES, 100)
+
+    assert cache.get(key) is None
+    cache.put(key, "model-a", "VERDICT: YES", {'passed': True})
+    assert cache.get(key) == {'response': "VERDICT: YES", 'verdict': {'passed': True}}
+    assert cache.stats()['entries'] == 1
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+    cache.close()
+
+
+def test_entries_persist_across_instances(tmp_path):
+    key = prompt_key("model-a", MESSAGES, 100)
+    cache = open_cache(tmp_path)
+    cache.put(key, "model-a", "VERDICT: NO", {'passed': False})
+    cache.close()
+
+    reopened = open_cache(tmp_path)
+    assert reopened.get(key)['verdict'] == {'passed': False}
+    reopened.close()
+
+
+def test_expired_entries_are_misses_and_pruned(tmp_path):
+    cache = open_cache(tmp_path, ttl_days=0.3 / 86400)
+    cache.put("key", "model-a", "VERDICT: YES", {'passed': True})
+    assert cache.get("key") is not None
+
+    time.sleep(0.4)
+    assert cache.get("key") is None
+    assert cache.prune() == {'expired': 1, 'evicted': 0}
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    # Each entry stores 316 bytes; four exceed a 1,100-byte limit, three fit under its low-water mark
+    cache = open_cache(tmp_path, max_mb=1100 / (1024 * 1024))
+    for key in "abcd":
+        cache.put(key, "model-a", key * 300, {'passed': True})
+        time.sleep(0.01)
+    cache.get("a")  # Now the most recently used
+
+    assert cache.prune() == {'expired': 0, 'evicted': 1}
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    cache.close()
+
+
+def test_shared_cache_is_off_when_disabled(monkeypatch):
+    monkeypatch.setattr(config, "VERDICT_CACHE_ENABLED", False)
+    assert verdict_cache.get_verdict_cache() is None
+
+
+def test_shared_cache_is_opened_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "VERDICT_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "VERDICT_CACHE_PATH", str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(verdict_cache, "_shared_cache", None)
+    monkeypatch.setattr(verdict_cache, "_shared_cache_failed", False)
+
+    cache = verdict_cache.get_verdict_cache()
+    assert cache is not None and cache is verdict_cache.get_verdict_cache()
+    assert cache.path == str(tmp_path / "shared.sqlite3")
+    cache.close()
@@ -0,0 +1,105 @@
+"""
+Website scraper run-stats tests.
+Serves pages from a local HTTP server and checks that every domain is resolved
+once per run (by one request, a 304 included, or one scrape-cache hit), so
+website_fetches + scrape_cache_hits == unique_domains_scraped.
+
+Run with: pytest test_website_scraper.py
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scrape_cache import ScrapeCache
+from website_scraper import WebsiteScraper
+
+PAGE = b"<html><head><title>Acme Golf</title></head><body><main>Golf clubs and bags</main></body></html>"
+ETAG = '"v1"'
+STORED_CONTENT = "WEBSITE CONTENT ANALYSIS:\n\nPage Title: Acme Golf\n"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves PAGE with an ETag and answers 304 when the request carries it."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def site_url(server, path="/"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def assert_each_domain_resolved_once(stats):
+    assert stats['website_fetches'] + stats['scrape_cache_hits'] == stats['unique_domains_scraped']
+
+
+def test_two_companies_on_a_not_modified_domain_share_one_request(server, tmp_path):
+    scraper = WebsiteScraper(cache=ScrapeCache(path=str(tmp_path / "scrapes.sqlite3")))
+
+    # Two companies with stale stored content on the same domain
+    first = scraper.revalidate(site_url(server, "/"), STORED_CONTENT, etag=ETAG)
+    second = scraper.revalidate(site_url(server, "/about"), STORED_CONTENT, etag=ETAG)
+    # A third company on the domain without stored content
+    result = scraper.scrape_formatted(site_url(server, "/shop"))
+
+    assert first is not None and second == first
+    assert result['formatted_content'] == STORED_CONTENT
+    assert server.requests == ["/"]
+    stats = scraper.get_run_stats()
+    assert stats == {
+        'website_fetches': 1, 'scrape_cache_hits': 0, 'scrape_not_modified': 1, 'unique_domains_scraped': 1
+    }
+    assert_each_domain_resolved_once(stats)
+
+
+def test_changed_page_is_memoized_after_revalidate(server, tmp_path):
+    scraper = WebsiteScraper(cache=ScrapeCache(path=str(tmp_path / "scrapes.sqlite3")))
+
+    assert scraper.revalidate(site_url(server), STORED_CONTENT, etag='"old"') is None
+    result = scraper.scrape_formatted(site_url(server, "/shop"))
+
+    assert "Golf clubs and bags" in result['formatted_content']
+    assert len(server.requests) == 1
+    assert_each_domain_resolved_once(scraper.get_run_stats())
+
+
+def test_cache_hits_count_towards_resolved_domains(server, tmp_path):
+    cache = ScrapeCache(path=str(tmp_path / "scrapes.sqlite3"))
+    WebsiteScraper(cache=cache).scrape_formatted(site_url(server))
+
+    scraper = WebsiteScraper(cache=cache)
+    result = scraper.scrape_formatted(site_url(server, "/shop"))
+    # A cached domain is resolved: revalidating it does not send a request
+    assert scraper.revalidate(site_url(server), STORED_CONTENT, etag=ETAG) is None
+
+    assert "Golf clubs and bags" in result['formatted_content']
+    assert len(server.requests) == 1
+    stats = scraper.get_run_stats()
+    assert stats['website_fetches'] == 0 and stats['scrape_cache_hits'] == 1
+    assert_each_domain_resolved_once(stats)
@@ -0,0 +1,206 @@
+"""
+Write-behind buffer tests.
+Runs WriteBehindBuffer against a recording client that stands in for the
+supabase-py table API and checks coalescing, flush order between dependent
+buffers, row-by-row retry of failed batches and shutdown.
+
+Run with: pytest test_write_buffer.py
+"""
+import threading
+import time
+
+from write_buffer import WriteBehindBuffer
+
+
+class RecordingClient:
+    """Records every upsert/update request (table, operation, payload, options) in order."""
+
+    def __init__(self, fail_when=None):
+        """
+        Args:
+            fail_when: Optional callable(table, operation, payload) -> True to make the request raise
+        """
+        self.requests = []
+        self.fail_when = fail_when
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return RecordingQuery(self, name)
+
+    def writes(self, operation=None):
+        """Recorded requests, optionally only one operation ("upsert" or "update")."""
+        return [r for r in self.requests if operation is None or r['operation'] == operation]
+
+
+class RecordingQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.request = {'table': table}
+
+    def upsert(self, rows, on_conflict=None, **options):
+        self.request.update(operation="upsert", payload=rows, on_conflict=on_conflict)
+        return self
+
+    def update(self, data, **options):
+        self.request.update(operation="update", payload=data)
+        return self
+
+    def eq(self, column, value):
+        self.request['eq'] = (column, value)
+        return self
+
+    def execute(self):
+        client = self.client
+        if client.fail_when and client.fail_when(self.request['table'], self.request['operation'], self.request['payload']):
+            raise RuntimeError("request rejected")
+        with client._lock:
+            client.requests.append(self.request)
+
+
+def test_batch_size_one_writes_inline():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "persons", batch_size=1)
+
+    record_id = buffer.insert({'name': 'Ada'})
+
+    assert client.writes() == [{
+        'table': 'persons', 'operation': 'upsert', 'on_conflict': 'id',
+        'payload': [{'id': record_id, 'name': 'Ada'}],
+    }]
+    assert buffer._thread is None
+    assert buffer.get_stats() == {'rows_written': 1, 'rows_failed': 0, 'flushes': 1, 'pending': 0}
+
+
+def test_update_is_merged_into_pending_insert():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60)
+
+    record_id = buffer.insert({'name': 'Ada', 'email': None})
+    buffer.update(record_id, {'email': 'ada@example.com'})
+    assert buffer.pending() == 1
+    buffer.close()
+
+    assert client.writes("update") == []
+    assert client.writes("upsert")[0]['payload'] == [{'id': record_id, 'name': 'Ada', 'email': 'ada@example.com'}]
+
+
+def test_updates_to_one_row_become_one_update():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60)
+
+    buffer.update("existing-id", {'email': 'a@example.com'})
+    buffer.update("existing-id", {'phone': '123'})
+    buffer.close()
+
+    # An update to a row that is not pending is a real UPDATE, never an upsert
+    assert client.writes("upsert") == []
+    assert client.writes("update") == [{
+        'table': 'persons', 'operation': 'update', 'eq': ('id', 'existing-id'),
+        'payload': {'email': 'a@example.com', 'phone': '123'},
+    }]
+
+
+def test_rows_on_another_conflict_column_are_coalesced_without_an_id():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "companies", batch_size=100, flush_seconds=60)
+
+    first = buffer.insert({'company_key': 'acme.com', 'name': 'Acme'}, on_conflict="company_key")
+    second = buffer.insert({'company_key': 'acme.com', 'industry': 'Golf'}, on_conflict="company_key")
+    buffer.close()
+
+    assert first is None and second is None
+    upserts = client.writes("upsert")
+    assert len(upserts) == 1
+    assert upserts[0]['on_conflict'] == "company_key"
+    # No client-generated id: the existing row keeps its primary key
+    assert upserts[0]['payload'] == [{'company_key': 'acme.com', 'name': 'Acme', 'industry': 'Golf'}]
+
+
+def test_rows_are_grouped_by_conflict_column_and_column_set():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "companies", batch_size=100, flush_seconds=60)
+
+    buffer.insert({'id': 'a', 'name': 'A'})
+    buffer.insert({'id': 'b', 'name': 'B'})
+    buffer.insert({'id': 'c', 'name': 'C', 'industry': 'Golf'})
+    buffer.insert({'company_key': 'd.com'}, on_conflict="company_key")
+    assert buffer.flush() == 4
+
+    groups = sorted((r['on_conflict'], [row.get('id') or row['company_key'] for row in r['payload']]) for r in client.writes())
+    assert groups == [("company_key", ['d.com']), ("id", ['a', 'b']), ("id", ['c'])]
+    buffer.close()
+
+
+def test_dependent_buffer_flushes_parent_first():
+    client = RecordingClient()
+    companies = WriteBehindBuffer(client, "companies", batch_size=100, flush_seconds=60)
+    persons = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60, depends_on=companies)
+
+    persons.insert({'id': 'p1', 'company_id': 'c1'})
+    companies.insert({'id': 'c1', 'name': 'Acme'})
+    persons.flush()
+
+    assert [r['table'] for r in client.writes()] == ["companies", "persons"]
+    companies.close()
+    persons.close()
+
+
+def test_failed_batch_is_retried_row_by_row():
+    def reject_bad_rows(table, operation, payload):
+        return operation == "upsert" and any(row.get('bad') for row in payload)
+
+    client = RecordingClient(fail_when=reject_bad_rows)
+    buffer = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60)
+
+    for i in range(5):
+        buffer.insert({'id': f"p{i}", 'bad': i == 2})
+    assert buffer.flush() == 4
+
+    assert [r['payload'][0]['id'] for r in client.writes()] == ["p0", "p1", "p3", "p4"]
+    assert buffer.get_stats() == {'rows_written': 4, 'rows_failed': 1, 'flushes': 1, 'pending': 0}
+    buffer.close()
+
+
+def test_failed_update_is_counted():
+    client = RecordingClient(fail_when=lambda table, operation, payload: operation == "update")
+    buffer = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60)
+
+    buffer.update("p1", {'email': 'a@example.com'})
+    assert buffer.flush() == 0
+    assert buffer.get_stats()['rows_failed'] == 1
+    buffer.close()
+
+
+def test_full_batch_is_flushed_by_background_thread():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "persons", batch_size=3, flush_seconds=60)
+
+    for i in range(3):
+        buffer.insert({'id': f"p{i}"})
+    thread = buffer._thread
+    assert thread is not None
+
+    for _ in range(100):
+        if buffer.get_stats()['rows_written'] == 3:
+            break
+        time.sleep(0.05)
+    assert buffer.get_stats()['rows_written'] == 3
+    buffer.close()
+    assert not thread.is_alive()
+
+
+def test_close_writes_pending_rows_and_later_writes_inline():
+    client = RecordingClient()
+    buffer = WriteBehindBuffer(client, "persons", batch_size=100, flush_seconds=60)
+
+    buffer.insert({'id': 'p1'})
+    thread = buffer._thread
+    buffer.close()
+
+    assert not thread.is_alive()
+    assert len(client.writes()) == 1
+
+    buffer.insert({'id': 'p2'})
+    assert len(client.writes()) == 2
+    assert buffer._thread is thread  # No new flusher thread after close
+    assert buffer.pending() == 0
@@ -149,29 +149,8 @@ def build_prospeo_filters(parsed_input: Dict, include_seniority: bool = False) -
     return filters
 
 
-def format_wholesale_partner_prompt(
-    company_data: Dict,
-    scraped_content: Optional[str] = None
-) -> str:
-    """
-    Format the wholesale partner check prompt (Check #1).
-    Focuses ONLY on whether company is a multi-brand retailer/reseller.
-    
-    Args:
-        company_data: Company information dictionary
-        scraped_content: Scraped website content (optional)
-    
-    Returns:
-        Formatted prompt string for wholesale partner check
-    """
-    company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
-    
-    if company_website and company_website != 'N/A' and not company_website.startswith('http'):
-        company_website = f"https://{company_website}"
-    
-    prompt = f"""Determine if this company is a MULTI-BRAND RETAILER/RESELLER (wholesale partner type).
-
-MULTI-BRAND RETAILER/RESELLER = A company that sells products from multiple brands/manufacturers to end customers (B2C or B2B2C).
+# Criteria text shared by the separate checks and the combined single-call prompt
+WHOLESALE_PARTNER_CRITERIA = """MULTI-BRAND RETAILER/RESELLER = A company that sells products from multiple brands/manufacturers to end customers (B2C or B2B2C).
 
 Why we want these companies: They already have distribution channels and can stock our products alongside other brands. They're ideal partners because they're set up to carry multiple product lines.
 
@@ -186,57 +165,9 @@ NOT a multi-brand retailer:
 - Manufacturer selling only their own products
 - Single-brand store (only one brand's products)
 - Service provider with no product retail component (unless they have a pro shop/retail section)
-- B2B manufacturer that doesn't resell products to end customers
-
-Respond with ONLY:
-VERDICT: YES (if multi-brand retailer/reseller) or NO (if not)
-
-REASONING: [1-2 sentences explaining your verdict]
-
----
-
-Company Website: {company_website}
-Company Description: {company_data.get('description', 'N/A')}
-Company Name: {company_data.get('name', 'N/A')}
-Company Industry: {company_data.get('industry', 'N/A')}
-
-{chr(10) + '='*80 + chr(10) + 'SCRAPED WEBSITE CONTENT:' + chr(10) + '='*80 + chr(10) + scraped_content + chr(10) + '='*80 if scraped_content else ''}"""
-    
-    return prompt
+- B2B manufacturer that doesn't resell products to end customers"""
 
-
-def format_keyword_match_prompt(
-    company_data: Dict,
-    keywords: list,
-    scraped_content: Optional[str] = None,
-    our_company_details: str = None
-) -> str:
-    """
-    Format the keyword match check prompt (Check #2).
-    Focuses ONLY on whether company matches the specified keywords/product categories.
-    
-    Args:
-        company_data: Company information dictionary
-        keywords: List of keywords to match against
-        scraped_content: Scraped website content (optional)
-        our_company_details: Description of our company and products (optional)
-    
-    Returns:
-        Formatted prompt string for keyword match check
-    """
-    company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
-    
-    if company_website and company_website != 'N/A' and not company_website.startswith('http'):
-        company_website = f"https://{company_website}"
-    
-    keywords_list = ', '.join(keywords) if keywords else 'N/A'
-    our_company_info = our_company_details or 'Multi-brand retailer/reseller looking for partners to stock our products'
-    
-    prompt = f"""Determine if this company is a GOOD PRODUCT/INDUSTRY FIT based on whether the products they sell align with our company's products and target market.
-
-CONTEXT: This company has already been identified as a multi-brand retailer/reseller. Now we need to determine if they sell products in categories that align with ours.
-
-GOOD FIT = Their product categories align with our products and target market
+KEYWORD_FIT_CRITERIA = """GOOD FIT = Their product categories align with our products and target market
 
 Why we want these companies: They already sell products similar to or complementary with ours, meaning our products would fit naturally into their existing catalog and customer base.
 
@@ -312,7 +243,123 @@ MAKING JUDGMENT CALLS:
   
 - If you're uncertain whether a category aligns, err on the side of GOOD FIT - we can refine later
   
-- The core question: "Would their existing customers be interested in our products, and do they have a retail channel to sell them?"
+- The core question: "Would their existing customers be interested in our products, and do they have a retail channel to sell them?\""""
+
+
+def format_wholesale_partner_prompt(
+    company_data: Dict,
+    scraped_content: Optional[str] = None
+) -> str:
+    """
+    Format the wholesale partner check prompt (Check #1).
+    Focuses ONLY on whether company is a multi-brand retailer/reseller.
+    
+    Args:
+        company_data: Company information dictionary
+        scraped_content: Scraped website content (optional)
+    
+    Returns:
+        Formatted prompt string for wholesale partner check
+    """
+    company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
+    
+    if company_website and company_website != 'N/A' and not company_website.startswith('http'):
+        company_website = f"https://{company_website}"
+    
+    prompt = f"""Determine if this company is a MULTI-BRAND RETAILER/RESELLER (wholesale partner type).
+
+{WHOLESALE_PARTNER_CRITERIA}
+
+Respond with ONLY:
+VERDICT: YES (if multi-brand retailer/reseller) or NO (if not)
+
+REASONING: [1-2 sentences explaining your verdict]
+
+---
+
+Company Website: {company_website}
+Company Description: {company_data.get('description', 'N/A')}
+Company Name: {company_data.get('name', 'N/A')}
+Company Industry: {company_data.get('industry', 'N/A')}
+
+{chr(10) + '='*80 + chr(10) + 'SCRAPED WEBSITE CONTENT:' + chr(10) + '='*80 + chr(10) + scraped_content + chr(10) + '='*80 if scraped_content else ''}"""
+    
+    return prompt
+
+
+def format_wholesale_partner_batch_prompt(
+    companies: List[Tuple[str, Dict, Optional[str]]]
+) -> str:
+    """
+    Format a Check #1 prompt that classifies several companies in one request.
+    The instructions are sent once; each company is labelled with a short number.
+    
+    Args:
+        companies: List of (number, company_data, scraped_content) tuples
+    
+    Returns:
+        Formatted prompt string for the batched wholesale partner check
+    """
+    blocks = []
+    for number, company_data, scraped_content in companies:
+        company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
+        
+        if company_website and company_website != 'N/A' and not company_website.startswith('http'):
+            company_website = f"https://{company_website}"
+        
+        blocks.append(f"""COMPANY {number}
+Company Website: {company_website}
+Company Description: {company_data.get('description', 'N/A')}
+Company Name: {company_data.get('name', 'N/A')}
+Company Industry: {company_data.get('industry', 'N/A')}
+{chr(10) + '='*80 + chr(10) + 'SCRAPED WEBSITE CONTENT:' + chr(10) + '='*80 + chr(10) + scraped_content + chr(10) + '='*80 + chr(10) if scraped_content else ''}""")
+    
+    prompt = f"""Determine for EACH company below if it is a MULTI-BRAND RETAILER/RESELLER (wholesale partner type).
+
+{WHOLESALE_PARTNER_CRITERIA}
+
+Respond with ONLY one line per company, in the order given:
+<company number>: YES (if multi-brand retailer/reseller) or NO (if not)
+
+---
+
+{chr(10).join(blocks)}"""
+    
+    return prompt
+
+
+def format_keyword_match_prompt(
+    company_data: Dict,
+    keywords: list,
+    scraped_content: Optional[str] = None,
+    our_company_details: str = None
+) -> str:
+    """
+    Format the keyword match check prompt (Check #2).
+    Focuses ONLY on whether company matches the specified keywords/product categories.
+    
+    Args:
+        company_data: Company information dictionary
+        keywords: List of keywords to match against
+        scraped_content: Scraped website content (optional)
+        our_company_details: Description of our company and products (optional)
+    
+    Returns:
+        Formatted prompt string for keyword match check
+    """
+    company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
+    
+    if company_website and company_website != 'N/A' and not company_website.startswith('http'):
+        company_website = f"https://{company_website}"
+    
+    keywords_list = ', '.join(keywords) if keywords else 'N/A'
+    our_company_info = our_company_details or 'Multi-brand retailer/reseller looking for partners to stock our products'
+    
+    prompt = f"""Determine if this company is a GOOD PRODUCT/INDUSTRY FIT based on whether the products they sell align with our company's products and target market.
+
+CONTEXT: This company has already been identified as a multi-brand retailer/reseller. Now we need to determine if they sell products in categories that align with ours.
+
+{KEYWORD_FIT_CRITERIA}
 
 Respond with:
 
@@ -347,6 +394,78 @@ Company Industry: {company_data.get('industry', 'N/A')}
     return prompt
 
 
+def format_combined_qualification_prompt(
+    company_data: Dict,
+    keywords: list,
+    scraped_content: Optional[str] = None,
+    our_company_details: str = None
+) -> str:
+    """
+    Format the single-call prompt that answers Check #1 and Check #2 together.
+    The company context and scraped content are sent once instead of twice.
+    
+    Args:
+        company_data: Company information dictionary
+        keywords: List of keywords to match against
+        scraped_content: Scraped website content (optional)
+        our_company_details: Description of our company and products (optional)
+    
+    Returns:
+        Formatted prompt string for the combined check
+    """
+    company_website = company_data.get('website') or company_data.get('domain') or 'N/A'
+    
+    if company_website and company_website != 'N/A' and not company_website.startswith('http'):
+        company_website = f"https://{company_website}"
+    
+    keywords_list = ', '.join(keywords) if keywords else 'N/A'
+    our_company_info = our_company_details or 'Multi-brand retailer/reseller looking for partners to stock our products'
+    
+    prompt = f"""Answer TWO questions about this company.
+
+QUESTION 1 (WHOLESALE_VERDICT): Is this company a MULTI-BRAND RETAILER/RESELLER (wholesale partner type)?
+
+{WHOLESALE_PARTNER_CRITERIA}
+
+QUESTION 2 (KEYWORD_VERDICT): Is this company a GOOD PRODUCT/INDUSTRY FIT based on whether the products they sell align with our company's products and target market?
+
+{KEYWORD_FIT_CRITERIA}
+
+Respond with:
+
+WHOLESALE_VERDICT: YES (if multi-brand retailer/reseller) or NO (if not)
+
+KEYWORD_VERDICT: Only respond with YES if they are a good fit, or NO if they are not a good fit or you are not sure. Answer NO if WHOLESALE_VERDICT is NO.
+
+PRODUCT_CATEGORIES: [List of specific product categories they sell, comma-separated. Examples: Golf Equipment, Athletic Apparel, Pro Shop Items, Sporting Goods. Be specific and comprehensive - these will be used for future keyword matching.]
+
+MARKET_SEGMENTS: [List of market segments they serve, comma-separated. Examples: Golf Courses, Pro Shops, Athletic Retailers, Sporting Goods Stores. Describe their target customer base.]
+
+REASONING: [1-2 sentences covering both verdicts]
+
+EVIDENCE: [Top 2-3 specific categories, products, or website elements that support your verdicts]
+
+---
+
+Now analyze this company:
+
+Our Company: {our_company_info}
+
+Target Keywords/Industries: {keywords_list}
+
+Company Website: {company_website}
+
+Company Description: {company_data.get('description', 'N/A')}
+
+Company Name: {company_data.get('name', 'N/A')}
+
+Company Industry: {company_data.get('industry', 'N/A')}
+
+{chr(10) + '='*80 + chr(10) + 'SCRAPED WEBSITE CONTENT:' + chr(10) + '='*80 + chr(10) + scraped_content + chr(10) + '='*80 if scraped_content else ''}"""
+    
+    return prompt
+
+
 def extract_person_and_company_data(prospeo_response: Dict) -> Tuple[Dict, Dict]:
     """
     Extract person and company data from Prospeo API response.
@@ -377,6 +496,53 @@ def extract_person_and_company_data(prospeo_response: Dict) -> Tuple[Dict, Dict]
     return person_data, company_data
 
 
+def normalize_domain(url: Optional[str]) -> Optional[str]:
+    """
+    Normalize a website URL or domain to a bare lowercase host.
+    
+    "https://www.Example.com/shop?x=1" and "example.com" both become "example.com".
+    
+    Args:
+        url: Website URL or domain
+    
+    Returns:
+        Normalized domain, or None if url is empty/'N/A'
+    """
+    if not url or url == 'N/A':
+        return None
+    
+    value = str(url).strip().lower()
+    if '://' in value:
+        value = value.split('://', 1)[1]
+    # Drop path, query, fragment, credentials and port
+    value = re.split(r'[/?#]', value, maxsplit=1)[0]
+    value = value.rsplit('@', 1)[-1].split(':', 1)[0]
+    if value.startswith('www.'):
+        value = value[4:]
+    value = value.strip('.')
+    
+    return value or None
+
+
+def build_company_key(company_id: Optional[str], company_domain: Optional[str]) -> Optional[str]:
+    """
+    Build the unique key a company row is upserted on (lead_magnet_candidates.company_key).
+    
+    Must stay in sync with the backfill in supabase/migrations/20261017130000_add_company_key.sql.
+    
+    Args:
+        company_id: Company ID from Prospeo
+        company_domain: Company domain or website (used when there is no ID)
+    
+    Returns:
+        The company ID, "domain:<normalized domain>" without an ID, or None when neither is known
+    """
+    if company_id:
+        return str(company_id)
+    domain = normalize_domain(company_domain)
+    return f"domain:{domain}" if domain else None
+
+
 def sanitize_csv_field(value: Any) -> str:
     """
     Sanitize a field value for CSV output.
@@ -455,78 +621,207 @@ def extract_person_seniority_filter(parsed_input: Dict) -> Dict:
     return {}
 
 
+# Section headers of the text response format (one per line, **bold** markers tolerated)
+RESPONSE_SECTION_PATTERN = re.compile(
+    r'^\s*[*#]*\s*(WHOLESALE_VERDICT|KEYWORD_VERDICT|VERDICT|PRODUCT_CATEGORIES|MARKET_SEGMENTS|REASONING|EVIDENCE)\s*\**\s*:\s*\**\s*(.*)$',
+    re.IGNORECASE
+)
+
+
+# One "<number>: YES/NO" line of the batched Check #1 text response ("COMPANY 3: YES", "**3** - NO", ...)
+WHOLESALE_BATCH_LINE_PATTERN = re.compile(r'^\s*[*#-]*\s*(?:COMPANY\s*)?#?(\d+)\s*\**\s*[:.)=-]\s*\**\s*(.*)$', re.IGNORECASE)
+
+
+def _load_json_response(response_text: str) -> Optional[Dict[str, Any]]:
+    """Decode a JSON-object response (optionally wrapped in a ``` fence) with lower-cased keys, or None."""
+    text = response_text.strip()
+    if text.startswith('```'):
+        text = text.strip('`').strip()
+        if text.lower().startswith('json'):
+            text = text[4:].strip()
+    if not text.startswith('{'):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {str(key).lower(): value for key, value in data.items()}
+
+
+def _split_response_sections(response_text: str) -> Dict[str, str]:
+    """
+    Split a text response into its sections in one pass over the lines.
+    Lines without a header continue the current section; the first occurrence of a header wins.
+    """
+    sections = {}
+    current = None
+    for line in response_text.split('\n'):
+        match = RESPONSE_SECTION_PATTERN.match(line)
+        if match:
+            name = match.group(1).upper()
+            current = name if name not in sections else None
+            if current:
+                sections[current] = [match.group(2)]
+        elif current:
+            sections[current].append(line)
+    return {name: '\n'.join(lines).strip() for name, lines in sections.items()}
+
+
+def _is_yes(value: Any) -> bool:
+    """Strict verdict check: True, or text whose first word is YES ("NO, ... YES" is NO)."""
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return False
+    words = re.findall(r'[A-Za-z]+', value)
+    return bool(words) and words[0].upper() == 'YES'
+
+
+def _as_list(value: Any) -> List[str]:
+    """Normalize a JSON array or a comma/line-separated text list (brackets removed)."""
+    if isinstance(value, list):
+        items = [str(item) for item in value]
+    elif isinstance(value, str):
+        items = re.split(r'[,\n]', value)
+    else:
+        return []
+    items = [re.sub(r'^\[|\]$', '', item.strip()).strip() for item in items]
+    return [item for item in items if item]
+
+
+def _as_text(value: Any) -> str:
+    """Normalize a text field that a model may return as a JSON array."""
+    if isinstance(value, list):
+        return '; '.join(str(item) for item in value)
+    return str(value or '')
+
+
+def parse_wholesale_check_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse the AI response from Check #1 (JSON-schema output, or VERDICT text as a strict fallback).
+    
+    Args:
+        response_text: Full AI response text
+    
+    Returns:
+        Dictionary with is_wholesale_partner, reasoning and response_text
+    """
+    data = _load_json_response(response_text)
+    if data is not None:
+        verdict, reasoning = data.get('verdict'), data.get('reasoning') or ''
+    else:
+        sections = _split_response_sections(response_text)
+        # A bare "YES"/"NO" reply has no VERDICT header
+        verdict = sections.get('VERDICT', response_text.strip().split('\n')[0])
+        reasoning = sections.get('REASONING', '')
+    
+    return {
+        'is_wholesale_partner': _is_yes(verdict),
+        'reasoning': str(reasoning),
+        'response_text': response_text
+    }
+
+
+def parse_wholesale_batch_response(response_text: str, numbers: List[str]) -> Dict[str, bool]:
+    """
+    Parse the AI response from the batched Check #1 (JSON-schema output, or "<number>: YES/NO" lines).
+    
+    Args:
+        response_text: Full AI response text
+        numbers: Company numbers used in the prompt
+    
+    Returns:
+        Dictionary of company number -> is_wholesale_partner, for the companies the
+        response covers (omitted or unreadable companies are left out)
+    """
+    expected = set(numbers)
+    verdicts = {}
+    
+    data = _load_json_response(response_text)
+    if data is not None:
+        for entry in data.get('verdicts') or []:
+            if isinstance(entry, dict):
+                number = str(entry.get('company', '')).strip()
+                if number in expected and number not in verdicts:
+                    verdicts[number] = _is_yes(entry.get('verdict'))
+        return verdicts
+    
+    for line in response_text.split('\n'):
+        match = WHOLESALE_BATCH_LINE_PATTERN.match(line)
+        if match and match.group(1) in expected and match.group(1) not in verdicts:
+            verdicts[match.group(1)] = _is_yes(match.group(2))
+    return verdicts
+
+
 def parse_keyword_check_response(response_text: str) -> Dict[str, Any]:
     """
-    Parse structured AI response from Check #2 to extract:
+    Parse the AI response from Check #2 to extract:
     - VERDICT (YES/NO)
     - PRODUCT_CATEGORIES (list)
     - MARKET_SEGMENTS (list)
     - REASONING (text)
     - EVIDENCE (text)
     
+    JSON-schema output is decoded directly; otherwise the text sections are read
+    in a single pass, and anything but a leading YES verdict counts as NO.
+    
     Args:
         response_text: Full AI response text
     
     Returns:
         Dictionary with parsed components
     """
-    result = {
-        'matches_keywords': False,
+    data = _load_json_response(response_text)
+    if data is None:
+        sections = _split_response_sections(response_text)
+        data = {name.lower(): value for name, value in sections.items()}
+        if 'verdict' not in data:
+            # No VERDICT header: fall back to the first line
+            data['verdict'] = response_text.strip().split('\n')[0]
+    
+    return {
+        'matches_keywords': _is_yes(data.get('verdict')),
         'response_text': response_text,
-        'product_categories': [],
-        'market_segments': [],
-        'reasoning': '',
-        'evidence': ''
+        'product_categories': _as_list(data.get('product_categories')),
+        'market_segments': _as_list(data.get('market_segments')),
+        'reasoning': str(data.get('reasoning') or ''),
+        'evidence': _as_text(data.get('evidence'))
     }
+
+
+def parse_combined_qualification_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse the structured AI response from the combined single-call check:
+    - WHOLESALE_VERDICT (YES/NO)
+    - KEYWORD_VERDICT (YES/NO, only counted when WHOLESALE_VERDICT is YES)
+    - PRODUCT_CATEGORIES, MARKET_SEGMENTS, REASONING, EVIDENCE (as in Check #2)
     
-    response_upper = response_text.upper()
-    
-    # Extract VERDICT
-    if 'VERDICT:' in response_upper:
-        verdict_line = [line for line in response_text.split('\n') if 'VERDICT:' in line.upper()]
-        if verdict_line:
-            verdict_text = verdict_line[0].upper()
-            result['matches_keywords'] = 'YES' in verdict_text and 'NO' not in verdict_text.split(':')[1]
-    else:
-        # Fallback: check first line or entire response for YES/NO
-        first_line = response_text.split('\n')[0].upper()
-        result['matches_keywords'] = 'YES' in first_line or ('VERDICT' not in response_upper and 'YES' in response_upper.split('\n')[0])
-    
-    # Extract PRODUCT_CATEGORIES
-    if 'PRODUCT_CATEGORIES:' in response_upper:
-        categories_match = re.search(r'PRODUCT_CATEGORIES:\s*(.*?)(?=\n(?:MARKET_SEGMENTS|REASONING|EVIDENCE|$))', response_text, re.IGNORECASE | re.DOTALL)
-        if categories_match:
-            categories_str = categories_match.group(1).strip()
-            # Parse comma-separated or line-separated categories
-            categories = [cat.strip() for cat in re.split(r'[,\n]', categories_str) if cat.strip()]
-            # Remove brackets if present
-            categories = [re.sub(r'^\[|\]$', '', cat).strip() for cat in categories]
-            result['product_categories'] = categories
-    
-    # Extract MARKET_SEGMENTS
-    if 'MARKET_SEGMENTS:' in response_upper:
-        segments_match = re.search(r'MARKET_SEGMENTS:\s*(.*?)(?=\n(?:REASONING|EVIDENCE|$))', response_text, re.IGNORECASE | re.DOTALL)
-        if segments_match:
-            segments_str = segments_match.group(1).strip()
-            # Parse comma-separated or line-separated segments
-            segments = [seg.strip() for seg in re.split(r'[,\n]', segments_str) if seg.strip()]
-            # Remove brackets if present
-            segments = [re.sub(r'^\[|\]$', '', seg).strip() for seg in segments]
-            result['market_segments'] = segments
-    
-    # Extract REASONING
-    if 'REASONING:' in response_upper:
-        reasoning_match = re.search(r'REASONING:\s*(.*?)(?=\n(?:EVIDENCE|$))', response_text, re.IGNORECASE | re.DOTALL)
-        if reasoning_match:
-            result['reasoning'] = reasoning_match.group(1).strip()
-    
-    # Extract EVIDENCE
-    if 'EVIDENCE:' in response_upper:
-        evidence_match = re.search(r'EVIDENCE:\s*(.*?)(?=\n|$)', response_text, re.IGNORECASE | re.DOTALL)
-        if evidence_match:
-            result['evidence'] = evidence_match.group(1).strip()
+    Args:
+        response_text: Full AI response text
     
-    return result
+    Returns:
+        Dictionary shaped like parse_keyword_check_response() plus
+        wholesale_partner (bool) and wholesale_response ('YES' or 'NO')
+    """
+    data = _load_json_response(response_text)
+    if data is None:
+        sections = _split_response_sections(response_text)
+        data = {name.lower(): value for name, value in sections.items()}
+    
+    wholesale_partner = _is_yes(data.get('wholesale_verdict'))
+    return {
+        # Both checks must pass, same as the two-call path (which skips Check #2 after a NO)
+        'matches_keywords': wholesale_partner and _is_yes(data.get('keyword_verdict')),
+        'response_text': response_text,
+        'product_categories': _as_list(data.get('product_categories')),
+        'market_segments': _as_list(data.get('market_segments')),
+        'reasoning': str(data.get('reasoning') or ''),
+        'evidence': _as_text(data.get('evidence')),
+        'wholesale_partner': wholesale_partner,
+        'wholesale_response': 'YES' if wholesale_partner else 'NO'
+    }
 
 
 def quick_match_keywords_against_categories(
@@ -0,0 +1,231 @@
+"""
+Verdict Cache Module
+Persistent cache of AI check responses, keyed by model plus a hash of the rendered prompt.
+
+The checks run at temperature 0 on deterministic prompts, so an identical
+request (same company, scraped content, keywords and our-company details)
+gets the same answer. Caching the raw response and parsed verdict lets a
+repeated search skip the OpenRouter call entirely. Entries expire after a TTL
+and the least recently used ones are evicted past a size limit.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_verdicts_last_access ON verdicts (last_access);
+CREATE INDEX IF NOT EXISTS idx_verdicts_created_at ON verdicts (created_at);
+"""
+
+# Run a prune (TTL + size eviction) after this many writes
+PRUNE_EVERY_WRITES = 200
+# Size eviction frees space down to this fraction of the limit
+EVICTION_LOW_WATER = 0.9
+
+
+def prompt_key(
+    model: str,
+    messages: List[Dict],
+    max_tokens: int,
+    response_format: Optional[Dict] = None,
+    namespace: Optional[str] = None
+) -> str:
+    """
+    Hash everything that determines a temperature-0 response.
+
+    Args:
+        model: Model name
+        messages: Chat messages (system + user prompt)
+        max_tokens: Completion token limit
+        response_format: Structured output format, if one was requested
+        namespace: Keeps verdicts that did not come from these exact messages apart
+                   (e.g. "wholesale-batch" for a company's answer within a batched prompt)
+
+    Returns:
+        sha256 hex digest
+    """
+    request = {'model': model, 'messages': messages, 'max_tokens': max_tokens}
+    # Only added when set, so keys of plain single-check requests are unchanged
+    if response_format is not None:
+        request['response_format'] = response_format
+    if namespace is not None:
+        request['namespace'] = namespace
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class VerdictCache:
+    """SQLite-backed verdict cache, safe to share between threads and processes."""
+
+    def __init__(self, path: str = None, ttl_days: float = None, max_mb: float = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path (default: config.VERDICT_CACHE_PATH)
+            ttl_days: Entries older than this are treated as misses (default: config.VERDICT_CACHE_TTL_DAYS)
+            max_mb: Size limit before LRU eviction (default: config.VERDICT_CACHE_MAX_MB)
+        """
+        self.path = path or config.VERDICT_CACHE_PATH
+        self.ttl_seconds = (ttl_days if ttl_days is not None else config.VERDICT_CACHE_TTL_DAYS) * 86400
+        self.max_bytes = int((max_mb if max_mb is not None else config.VERDICT_CACHE_MAX_MB) * 1024 * 1024)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.prune()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached verdict.
+
+        Args:
+            key: Key from prompt_key()
+
+        Returns:
+            Dictionary with response (raw text) and verdict (parsed), or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, verdict, created_at FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE verdicts SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return {'response': row[0], 'verdict': json.loads(row[1])}
+
+    def put(self, key: str, model: str, response: str, verdict: Dict) -> None:
+        """
+        Store a response and its parsed verdict.
+
+        Args:
+            key: Key from prompt_key()
+            model: Model that produced the response
+            response: Raw response text
+            verdict: Parsed verdict (JSON-serializable)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, model, response, verdict, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, json.dumps(verdict), now, now)
+            )
+            self._writes += 1
+            prune_due = self._writes % PRUNE_EVERY_WRITES == 0
+
+        if prune_due:
+            self.prune()
+
+    def prune(self) -> Dict[str, int]:
+        """
+        Delete expired entries, then evict least recently used entries while over the size limit.
+
+        Returns:
+            Dictionary with expired and evicted counts
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._conn.execute(
+                    "DELETE FROM verdicts WHERE created_at < ?", (now - self.ttl_seconds,)
+                ).rowcount
+
+                evicted = 0
+                total = self._total_size()
+                if total > self.max_bytes:
+                    # Evict down to the low-water mark so we don't prune again on the next write
+                    target = self.max_bytes * EVICTION_LOW_WATER
+                    victims = []
+                    rows = self._conn.execute(
+                        "SELECT key, LENGTH(response) + LENGTH(verdict) FROM verdicts ORDER BY last_access"
+                    ).fetchall()
+                    for key, size in rows:
+                        if total <= target:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    self._conn.executemany("DELETE FROM verdicts WHERE key = ?", victims)
+                    evicted = len(victims)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if expired or evicted:
+            logger.info(f"🧹 Verdict cache pruned: {expired} expired, {evicted} evicted")
+        return {'expired': expired, 'evicted': evicted}
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count, stored size in bytes and lifetime hit/miss counts for this process."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+            return {'entries': entries, 'bytes': self._total_size(), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _total_size(self) -> int:
+        """Stored bytes (response and verdict text)."""
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(response) + LENGTH(verdict)), 0) FROM verdicts"
+        ).fetchone()[0]
+
+
+_shared_cache: Optional[VerdictCache] = None
+_shared_cache_lock = threading.Lock()
+_shared_cache_failed = False
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """
+    Get the process-wide verdict cache.
+
+    Returns:
+        The shared VerdictCache, or None if it is disabled (VERDICT_CACHE_ENABLED)
+        or the database could not be opened
+    """
+    global _shared_cache, _shared_cache_failed
+    if not config.VERDICT_CACHE_ENABLED:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None and not _shared_cache_failed:
+            try:
+                _shared_cache = VerdictCache()
+                logger.info(f"✅ Verdict cache opened at {_shared_cache.path}")
+            except (sqlite3.Error, OSError) as e:
+                _shared_cache_failed = True
+                logger.warning(f"⚠️  Verdict cache unavailable ({e}); calling OpenRouter for every check")
+        return _shared_cache
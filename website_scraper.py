@@ -3,29 +3,414 @@ Website Scraper Module
 Scrapes company websites to extract content for AI qualification.
 """
 import logging
+import threading
+from html.parser import HTMLParser
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, Optional
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.dammit import UnicodeDammit
+from typing import Dict, List, Optional
 import time
+from datetime import datetime, timezone
 from urllib.parse import urljoin, urlparse
+import config
+from scrape_cache import ScrapeCache, get_scrape_cache
+from utils import normalize_domain
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # Optional fast parser backend
+    lxml_etree = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Content types we parse; anything else (PDFs, images, octet-stream, ...) is rejected unread
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+DOWNLOAD_CHUNK_SIZE = 16 * 1024
+
+# Tags whose text is never page content
+NON_TEXT_TAGS = {'script', 'style', 'template', 'noscript'}
+# Page chrome left out of the main content
+MAIN_CONTENT_EXCLUDED_TAGS = {'script', 'style', 'nav', 'footer', 'header'}
+NAV_CONTAINER_CLASSES = {'navigation', 'menu', 'navbar'}
+PRODUCT_TITLE_TAGS = {'h1', 'h2', 'h3', 'h4', 'a'}
+BRAND_LINK_KEYWORDS = ['brands', 'companies we carry', 'shop by brand', 'all brands']
+MANUFACTURER_KEYWORDS = ['dealer sign up', 'become a distributor', 'where to buy', 'stockists', 'retail partners']
+
+# Elements that never have a closing tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+MAX_NAV_ITEMS = 20
+MAX_FOOTER_CHARS = 1000
+MAX_PRODUCT_ITEMS = 20
+MAX_BRAND_INDICATORS = 10
+
+
+class PageExtractor:
+    """
+    Single-pass content extractor.
+    
+    Receives start/end/text events in document order and collects the title,
+    meta description, navigation links, footer, product titles, brand indicators,
+    manufacturer indicators and main text in one traversal. Any HTML parser
+    backend can drive it; see _walk_soup for the BeautifulSoup tree walk.
+    """
+    
+    def __init__(self, max_content_length: int = 50000):
+        self.max_content_length = max_content_length
+        
+        self.title = None
+        self.meta_description = None
+        self.nav_items = []
+        self.footer_parts = []
+        self.footer_length = 0
+        self.main_parts = []
+        self.main_length = 0
+        self.product_items = []
+        self.brand_indicators = []
+        self.negative_indicators = []
+        
+        # Open elements: (tag, state changes to undo when the element closes)
+        self._stack = []
+        self._non_text_depth = 0
+        self._head_depth = 0
+        self._nav_depth = 0
+        self._excluded_depth = 0
+        self._footer_depth = 0
+        self._footer_seen = False
+        self._title_parts = None
+        self._links = []  # Open <a href> elements: {'href', 'nav_class', 'parts'}
+        self._brand_select = None  # Option count for an open brand-filter <select>
+        self._product_frames = []  # Open product containers still waiting for a title
+        self._product_titles = []  # Open title elements being captured: [parts]
+    
+    def start(self, tag: str, attrs: Dict) -> None:
+        """Handle an opening tag. attrs values may be strings or lists (BeautifulSoup classes)."""
+        tag = tag.lower()
+        css_class = attrs.get('class') or ''
+        if isinstance(css_class, (list, tuple)):
+            css_class = ' '.join(css_class)
+        css_class = css_class.lower()
+        element_id = (attrs.get('id') or '').lower()
+        changes = []
+        
+        # Links cannot nest: a new <a> closes an unclosed one (as browsers and lxml do)
+        if tag == 'a' and self._links:
+            self.end('a')
+        
+        if tag in NON_TEXT_TAGS:
+            self._non_text_depth += 1
+            changes.append('non_text')
+        if tag == 'head':
+            self._head_depth += 1
+            changes.append('head')
+        if tag in MAIN_CONTENT_EXCLUDED_TAGS:
+            self._excluded_depth += 1
+            changes.append('excluded')
+        if tag == 'nav' or element_id == 'menu' or NAV_CONTAINER_CLASSES.intersection(css_class.split()):
+            self._nav_depth += 1
+            changes.append('nav')
+        if tag == 'footer' and not self._footer_seen:
+            self._footer_seen = True
+            self._footer_depth += 1
+            changes.append('footer')
+        
+        if tag == 'title' and self.title is None:
+            self._title_parts = []
+            changes.append('title')
+        elif tag == 'meta' and self.meta_description is None:
+            if (attrs.get('name') or '').lower() == 'description':
+                self.meta_description = attrs.get('content') or ''
+        elif tag == 'a' and attrs.get('href') is not None:
+            self._links.append({
+                'href': (attrs.get('href') or '').lower(),
+                'nav_class': 'menu' in css_class or 'nav' in css_class,
+                'parts': []
+            })
+            changes.append('link')
+        elif tag == 'select':
+            name = (attrs.get('name') or '').lower()
+            if 'brand' in name or element_id.find('brand') >= 0:
+                self._brand_select = 0
+                changes.append('brand_select')
+        elif tag == 'option' and self._brand_select is not None:
+            self._brand_select += 1
+        
+        # Product titles: first h1-h4/<a> inside an element whose class mentions product/item
+        # (page chrome is skipped, so "menu-item" navigation links are not counted as products)
+        if tag in PRODUCT_TITLE_TAGS and self._excluded_depth == 0:
+            waiting = [frame for frame in self._product_frames if not frame['found']]
+            if waiting:
+                for frame in waiting:
+                    frame['found'] = True
+                self._product_titles.append([])
+                changes.append('product_title')
+        if ('product' in css_class or 'item' in css_class) and self._excluded_depth == 0:
+            self._product_frames.append({'found': False})
+            changes.append('product_frame')
+        
+        self._stack.append((tag, changes))
+    
+    def end(self, tag: str) -> None:
+        """Handle a closing tag (unmatched closing tags are ignored)."""
+        tag = tag.lower()
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, changes = self._stack.pop()
+            self._undo(changes)
+            if open_tag == tag:
+                break
+    
+    def text(self, value: str) -> None:
+        """Handle one text node."""
+        if self._non_text_depth:
+            return
+        value = value.strip()
+        if not value:
+            return
+        
+        if self._title_parts is not None:
+            self._title_parts.append(value)
+        for link in self._links:
+            link['parts'].append(value)
+        for parts in self._product_titles:
+            parts.append(value)
+        
+        if self._footer_depth and self.footer_length <= MAX_FOOTER_CHARS:
+            self.footer_parts.append(value)
+            self.footer_length += len(value) + 3
+        
+        if self._head_depth == 0 and self._excluded_depth == 0 and self.main_length <= self.max_content_length:
+            self.main_parts.append(value)
+            self.main_length += len(value) + 1
+        
+        if len(self.negative_indicators) < MAX_BRAND_INDICATORS:
+            lowered = value.lower()
+            if any(keyword in lowered for keyword in MANUFACTURER_KEYWORDS):
+                self.negative_indicators.append(value[:100])  # First 100 chars
+    
+    def _undo(self, changes: List[str]) -> None:
+        """Revert the state changes made when an element was opened."""
+        for change in reversed(changes):
+            if change == 'non_text':
+                self._non_text_depth -= 1
+            elif change == 'head':
+                self._head_depth -= 1
+            elif change == 'excluded':
+                self._excluded_depth -= 1
+            elif change == 'nav':
+                self._nav_depth -= 1
+            elif change == 'footer':
+                self._footer_depth -= 1
+            elif change == 'title':
+                self.title = ''.join(self._title_parts)
+                self._title_parts = None
+            elif change == 'link':
+                self._close_link(self._links.pop())
+            elif change == 'brand_select':
+                if self._brand_select > 1:  # Multiple brands
+                    self.brand_indicators.append(f"Brand filter with {self._brand_select} options")
+                self._brand_select = None
+            elif change == 'product_title':
+                title = ''.join(self._product_titles.pop())
+                if title and title not in self.product_items and len(self.product_items) < MAX_PRODUCT_ITEMS:
+                    self.product_items.append(title)
+            elif change == 'product_frame':
+                self._product_frames.pop()
+    
+    def _close_link(self, link: Dict) -> None:
+        """Classify a finished <a href> as a navigation item and/or brand indicator."""
+        text = ''.join(link['parts'])
+        if not text:
+            return
+        
+        # Links inside nav containers, or links whose class mentions menu/nav
+        if (self._nav_depth > 0 or link['nav_class']) and text not in self.nav_items:
+            self.nav_items.append(text)
+        
+        # "Brands" (plural) etc. in link text or URL
+        lowered = text.lower()
+        if any(keyword in lowered or keyword in link['href'] for keyword in BRAND_LINK_KEYWORDS):
+            self.brand_indicators.append(text)
+    
+    def result(self, url: str) -> Dict:
+        """Close any open elements and return the scraped_data dictionary."""
+        while self._stack:
+            _, changes = self._stack.pop()
+            self._undo(changes)
+        
+        footer_text = ' | '.join(self.footer_parts)
+        main_content = ' '.join(self.main_parts)
+        if len(main_content) > self.max_content_length:
+            main_content = main_content[:self.max_content_length] + "..."
+        
+        return {
+            'url': url,
+            'title': self.title or "",
+            'navigation': " | ".join(self.nav_items[:MAX_NAV_ITEMS]),
+            'footer': footer_text[:MAX_FOOTER_CHARS],
+            'main_content': main_content,
+            'product_listings': " | ".join(self.product_items[:MAX_PRODUCT_ITEMS]),
+            'brand_mentions': {
+                'positive': " | ".join(self.brand_indicators[:MAX_BRAND_INDICATORS]),
+                'negative': " | ".join(self.negative_indicators[:MAX_BRAND_INDICATORS])
+            },
+            'meta_description': self.meta_description or ""
+        }
+
+
+def _walk_soup(soup: BeautifulSoup, extractor: PageExtractor) -> None:
+    """Feed a parsed BeautifulSoup tree to the extractor in document order (iterative, one pass)."""
+    iterators = [iter(soup.contents)]
+    open_tags = [None]
+    while iterators:
+        node = next(iterators[-1], None)
+        if node is None:
+            iterators.pop()
+            tag = open_tags.pop()
+            if tag is not None:
+                extractor.end(tag)
+            continue
+        if isinstance(node, Tag):
+            extractor.start(node.name, node.attrs)
+            open_tags.append(node.name)
+            iterators.append(iter(node.contents))
+        elif type(node) in (NavigableString, CData):  # Skips comments, doctype, script/style strings
+            extractor.text(node)
+
+
+class _StdlibFeeder(HTMLParser):
+    """html.parser.HTMLParser subclass that streams events straight to a PageExtractor (no tree)."""
+    
+    def __init__(self, extractor: PageExtractor):
+        super().__init__(convert_charrefs=True)
+        self.extractor = extractor
+    
+    def handle_starttag(self, tag, attrs):
+        self.extractor.start(tag, {name: value or '' for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.extractor.end(tag)
+    
+    def handle_startendtag(self, tag, attrs):
+        self.extractor.start(tag, {name: value or '' for name, value in attrs})
+        self.extractor.end(tag)
+    
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS:
+            self.extractor.end(tag)
+    
+    def handle_data(self, data):
+        self.extractor.text(data)
+
+
+class _LxmlTarget:
+    """lxml parser target that forwards events to a PageExtractor, merging split text chunks."""
+    
+    def __init__(self, extractor: PageExtractor):
+        self.extractor = extractor
+        self._text = []
+    
+    def _flush(self):
+        if self._text:
+            self.extractor.text(''.join(self._text))
+            self._text = []
+    
+    def start(self, tag, attrib):
+        self._flush()
+        self.extractor.start(tag, dict(attrib))
+    
+    def end(self, tag):
+        self._flush()
+        self.extractor.end(tag)
+    
+    def data(self, data):
+        self._text.append(data)
+    
+    def comment(self, text):
+        self._flush()
+    
+    def close(self):
+        self._flush()
+
+
+def _parse_bs4(html, extractor: PageExtractor) -> None:
+    """BeautifulSoup with Python's html.parser, then a walk of the tree (reference backend)."""
+    _walk_soup(BeautifulSoup(html, 'html.parser'), extractor)
+
+
+def _parse_stdlib(html, extractor: PageExtractor) -> None:
+    """Stream events from Python's html.parser without building a tree."""
+    if isinstance(html, bytes):
+        html = UnicodeDammit(html, is_html=True).unicode_markup or ''
+    feeder = _StdlibFeeder(extractor)
+    feeder.feed(html)
+    feeder.close()
+
+
+def _parse_lxml(html, extractor: PageExtractor) -> None:
+    """Stream events from libxml2's HTML parser (C implementation, fastest)."""
+    if isinstance(html, bytes):
+        html = UnicodeDammit(html, is_html=True).unicode_markup or ''
+    parser = lxml_etree.HTMLParser(target=_LxmlTarget(extractor), remove_comments=True)
+    parser.feed(html)
+    parser.close()
+
+
+# Parser backends selectable via config.HTML_PARSER_BACKEND
+PARSER_BACKENDS = {
+    'html.parser': _parse_bs4,
+    'stdlib': _parse_stdlib,
+    'lxml': _parse_lxml,
+}
+
+
+def resolve_parser_backend(name: Optional[str]) -> str:
+    """
+    Validate a parser backend name, falling back when it is unknown or unavailable.
+    
+    Args:
+        name: Backend name ('lxml', 'stdlib' or 'html.parser')
+    
+    Returns:
+        Backend name that will actually be used
+    """
+    name = (name or 'lxml').lower()
+    if name not in PARSER_BACKENDS:
+        logger.warning(f"⚠️  Unknown HTML parser backend '{name}', using 'stdlib'")
+        return 'stdlib'
+    if name == 'lxml' and lxml_etree is None:
+        logger.warning("⚠️  lxml is not installed, using 'stdlib' HTML parser backend")
+        return 'stdlib'
+    return name
+
 
 class WebsiteScraper:
     """Scrapes website content for company analysis."""
     
-    def __init__(self, timeout: int = 10, max_content_length: int = 50000):
+    def __init__(
+        self,
+        timeout: int = 10,
+        max_content_length: int = 50000,
+        max_bytes: int = None,
+        parser_backend: str = None,
+        cache: Optional[ScrapeCache] = None
+    ):
         """
         Initialize website scraper.
         
         Args:
             timeout: Request timeout in seconds
             max_content_length: Maximum content length to scrape (chars)
+            max_bytes: Maximum bytes downloaded per page (download stops at the cap)
+            parser_backend: HTML parser backend ('lxml', 'stdlib' or 'html.parser')
+            cache: Persistent scrape cache (default: the shared cache from get_scrape_cache,
+                   or none when SCRAPE_CACHE_ENABLED is off)
         """
         self.timeout = timeout
         self.max_content_length = max_content_length
+        self.max_bytes = max_bytes or config.SCRAPER_MAX_BYTES
+        self.parser_backend = resolve_parser_backend(parser_backend or config.HTML_PARSER_BACKEND)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -33,20 +418,264 @@ class WebsiteScraper:
         self.session = requests.Session()
         self.session.proxies = {'http': None, 'https': None}
         self.session.trust_env = False
+        # One pool per host for the Layer 4 scrape workers, sized to the per-host limit
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=max(config.PIPELINE_WORKERS['scrape'], 10),
+            pool_maxsize=config.SCRAPER_PER_HOST_LIMIT
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Lookup order: per-run memo, then the persistent cache, then the network
+        self.cache = cache if cache is not None else get_scrape_cache()
+        
+        # Per-run memo so each domain is fetched at most once (shared by Layer 3 and Layer 4)
+        self._results: Dict[str, Optional[Dict]] = {}
+        self._domain_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.fetch_count = 0
+        self.cache_hits = 0
+        self.revalidated_count = 0
+    
+    def reset_run_stats(self):
+        """Forget memoized results and fetch counts (call at the start of a run)."""
+        with self._lock:
+            self._results = {}
+            self._domain_locks = {}
+            self.fetch_count = 0
+            self.cache_hits = 0
+            self.revalidated_count = 0
+    
+    def get_run_stats(self) -> Dict[str, int]:
+        """
+        Return fetch statistics for the current run.
+        
+        Returns:
+            Dictionary with website_fetches (HTTP requests made, including conditional ones),
+            scrape_cache_hits (domains served from the persistent cache),
+            scrape_not_modified (conditional requests answered with 304) and
+            unique_domains_scraped (distinct domains resolved). Each domain is resolved
+            once per run, by one request or one cache hit, so
+            website_fetches + scrape_cache_hits == unique_domains_scraped
+        """
+        with self._lock:
+            return {
+                'website_fetches': self.fetch_count,
+                'scrape_cache_hits': self.cache_hits,
+                'scrape_not_modified': self.revalidated_count,
+                'unique_domains_scraped': len(self._results)
+            }
     
     def scrape_website(self, url: str) -> Optional[Dict[str, str]]:
         """
         Scrape a website and extract relevant content.
         
+        Results (including failures) are memoized per normalized domain, so a
+        site is fetched at most once per run no matter how many callers ask for it.
+        
         Args:
             url: Website URL to scrape
         
         Returns:
-            Dictionary with scraped content, or None if failed
+            Dictionary with scraped content, or None if failed (or if the domain was
+            resolved this run by a 304 in revalidate, which leaves only formatted content)
+        """
+        result = self._get_result(url)
+        return result['scraped_data'] if result else None
+    
+    def scrape_formatted(self, url: str) -> Optional[Dict]:
         """
-        if not url or url == 'N/A':
+        Scrape a website and return its content formatted for the AI prompt.
+        
+        Uses the same memo and cache as scrape_website; a cache hit skips both
+        the fetch and the parse.
+        
+        Args:
+            url: Website URL to scrape
+        
+        Returns:
+            Dictionary with formatted_content, scraped_at (when the content was
+            fetched or last revalidated), etag and last_modified, or None if failed
+        """
+        return self._get_result(url)
+    
+    def revalidate(
+        self,
+        url: str,
+        formatted_content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Optional[datetime]:
+        """
+        Check with a conditional GET whether content scraped earlier (and stored
+        elsewhere, e.g. in Supabase) is still current.
+        
+        A 304 reply costs a header-only request; the stored content is then memoized
+        for the domain like a fetched page, so other companies on the same domain
+        reuse it without another request. If the page has changed, the new body is
+        parsed and memoized, so a following scrape_formatted call reuses it instead
+        of fetching again.
+        
+        Args:
+            url: Website URL
+            formatted_content: AI-formatted content stored with the validators
+            etag: ETag saved with the earlier content
+            last_modified: Last-Modified saved with the earlier content
+        
+        Returns:
+            Revalidation time if the page is unchanged (or was found unchanged earlier
+            this run), otherwise None; when the domain was already fetched this run,
+            scrape_formatted returns that result
+        """
+        domain = normalize_domain(url)
+        if not domain or not (etag or last_modified):
             return None
         
+        with self._lock:
+            if domain in self._results:
+                return self._not_modified_at(domain)
+            domain_lock = self._domain_locks.setdefault(domain, threading.Lock())
+        
+        with domain_lock:
+            with self._lock:
+                if domain in self._results:
+                    return self._not_modified_at(domain)
+                self.fetch_count += 1
+            
+            page = self._fetch_page(url, etag=etag, last_modified=last_modified)
+            if page and page['not_modified']:
+                result = {
+                    'scraped_data': None,  # Only the stored, formatted content is known
+                    'formatted_content': formatted_content,
+                    'scraped_at': datetime.now(timezone.utc),
+                    'etag': page['etag'],
+                    'last_modified': page['last_modified']
+                }
+                with self._lock:
+                    self.revalidated_count += 1
+                    self._results[domain] = result
+                return result['scraped_at']
+            
+            result = self._store_page(domain, page) if page else None
+            with self._lock:
+                self._results[domain] = result
+            return None
+    
+    def _not_modified_at(self, domain: str) -> Optional[datetime]:
+        """Revalidation time of a domain memoized from a 304, else None (caller holds _lock)."""
+        result = self._results.get(domain)
+        if result and result['scraped_data'] is None:
+            return result['scraped_at']
+        return None
+    
+    def _get_result(self, url: str) -> Optional[Dict]:
+        """
+        Resolve a URL through the per-run memo, the persistent cache, then the network.
+        
+        Stale cache entries that carry validators are revalidated with a conditional
+        GET; on a 304 the cached content is reused without downloading or parsing.
+        
+        Returns:
+            Dictionary with scraped_data, formatted_content, scraped_at, etag and
+            last_modified, or None if failed
+        """
+        domain = normalize_domain(url)
+        if not domain:
+            return None
+        
+        with self._lock:
+            if domain in self._results:
+                return self._results[domain]
+            domain_lock = self._domain_locks.setdefault(domain, threading.Lock())
+        
+        # Only one thread fetches a given domain; others wait and reuse its result
+        with domain_lock:
+            with self._lock:
+                if domain in self._results:
+                    return self._results[domain]
+            
+            entry = self._cache_get(domain)
+            if entry is not None and not entry['stale']:
+                with self._lock:
+                    self.cache_hits += 1
+                result = entry
+            else:
+                with self._lock:
+                    self.fetch_count += 1
+                page = self._fetch_page(
+                    url,
+                    etag=entry['etag'] if entry else None,
+                    last_modified=entry['last_modified'] if entry else None
+                )
+                if page and page['not_modified'] and entry is not None:
+                    with self._lock:
+                        self.revalidated_count += 1
+                    result = self._cache_refresh(domain, entry, page)
+                elif page and not page['not_modified']:
+                    result = self._store_page(domain, page)
+                else:
+                    result = None
+            
+            with self._lock:
+                self._results[domain] = result
+            return result
+    
+    def _store_page(self, domain: str, page: Dict) -> Dict:
+        """Format a freshly fetched page, write it to the persistent cache and return the result."""
+        result = {
+            'scraped_data': page['scraped_data'],
+            'formatted_content': self.format_scraped_content_for_ai(page['scraped_data']),
+            'scraped_at': datetime.now(timezone.utc),
+            'etag': page['etag'],
+            'last_modified': page['last_modified']
+        }
+        if self.cache is not None:
+            try:
+                self.cache.put(
+                    domain, page['url'], page['raw_html'], page['scraped_data'], result['formatted_content'],
+                    etag=page['etag'], last_modified=page['last_modified']
+                )
+            except Exception as e:
+                logger.warning(f"Scrape cache write failed for {domain}: {e}")
+        return result
+    
+    def _cache_get(self, domain: str) -> Optional[Dict]:
+        """Read an entry (fresh, or stale but revalidatable) from the persistent cache; errors count as a miss."""
+        if self.cache is None:
+            return None
+        try:
+            entry = self.cache.get(domain, include_stale=True)
+        except Exception as e:
+            logger.warning(f"Scrape cache read failed for {domain}: {e}")
+            return None
+        if entry and not entry['stale']:
+            logger.info(f"Using cached scrape for {domain} (fetched {entry['scraped_at']:%Y-%m-%d})")
+        return entry
+    
+    def _cache_refresh(self, domain: str, entry: Dict, page: Dict) -> Dict:
+        """Mark a revalidated (304) cache entry as fresh and return it with the new scraped_at."""
+        result = dict(entry, stale=False, scraped_at=datetime.now(timezone.utc),
+                      etag=page['etag'], last_modified=page['last_modified'])
+        try:
+            self.cache.refresh(domain, etag=page['etag'], last_modified=page['last_modified'])
+        except Exception as e:
+            logger.warning(f"Scrape cache refresh failed for {domain}: {e}")
+        return result
+    
+    def _fetch_page(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[Dict]:
+        """
+        Fetch a single page and extract its content (no memoization or caching).
+        
+        Args:
+            url: Website URL to scrape
+            etag: ETag from an earlier fetch (makes the request conditional)
+            last_modified: Last-Modified from an earlier fetch (makes the request conditional)
+        
+        Returns:
+            Dictionary with url, raw_html (bytes), scraped_data, etag, last_modified and
+            not_modified (True on a 304, in which case raw_html and scraped_data are None),
+            or None if failed
+        """
         # Ensure URL has protocol
         if not url.startswith(('http://', 'https://')):
             url = f"https://{url}"
@@ -55,31 +684,27 @@ class WebsiteScraper:
             logger.info(f"Scraping website: {url}")
             
             # Fetch the page
-            response = self.session.get(
-                url,
-                headers=self.headers,
-                timeout=self.timeout,
-                allow_redirects=True
-            )
-            response.raise_for_status()
+            download = self._download_html(url, etag=etag, last_modified=last_modified)
+            if download is None:
+                return None
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract key content
-            scraped_data = {
+            page = {
                 'url': url,
-                'title': self._extract_title(soup),
-                'navigation': self._extract_navigation(soup),
-                'footer': self._extract_footer(soup),
-                'main_content': self._extract_main_content(soup),
-                'product_listings': self._extract_product_listings(soup),
-                'brand_mentions': self._extract_brand_mentions(soup),
-                'meta_description': self._extract_meta_description(soup)
+                'raw_html': download['content'],
+                'scraped_data': None,
+                'etag': download['etag'],
+                'last_modified': download['last_modified'],
+                'not_modified': download['not_modified']
             }
+            if page['not_modified']:
+                logger.info(f"Not modified since last scrape: {url}")
+                return page
+            
+            # Parse HTML and extract key content in a single traversal
+            page['scraped_data'] = self.extract_content(download['content'], url)
             
             logger.info(f"Successfully scraped {url}")
-            return scraped_data
+            return page
             
         except requests.exceptions.RequestException as e:
             logger.warning(f"Error scraping {url}: {e}")
@@ -88,118 +713,97 @@ class WebsiteScraper:
             logger.error(f"Unexpected error scraping {url}: {e}")
             return None
     
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        """Extract page title."""
-        title_tag = soup.find('title')
-        return title_tag.get_text(strip=True) if title_tag else ""
-    
-    def _extract_navigation(self, soup: BeautifulSoup) -> str:
-        """Extract navigation menu items."""
-        nav_items = []
-        
-        # Look for nav, header, menu elements
-        for selector in ['nav', 'header nav', '.navigation', '.menu', '#menu', '.navbar']:
-            nav = soup.select_one(selector)
-            if nav:
-                links = nav.find_all('a', href=True)
-                for link in links:
-                    text = link.get_text(strip=True)
-                    if text:
-                        nav_items.append(text)
-        
-        # Also check for common menu patterns
-        for link in soup.find_all('a', href=True, class_=lambda x: x and ('menu' in str(x).lower() or 'nav' in str(x).lower())):
-            text = link.get_text(strip=True)
-            if text and text not in nav_items:
-                nav_items.append(text)
-        
-        return " | ".join(nav_items[:20])  # Limit to 20 items
-    
-    def _extract_footer(self, soup: BeautifulSoup) -> str:
-        """Extract footer content."""
-        footer = soup.find('footer')
-        if footer:
-            # Get all text from footer
-            footer_text = footer.get_text(separator=' | ', strip=True)
-            # Limit length
-            return footer_text[:1000] if len(footer_text) > 1000 else footer_text
-        return ""
-    
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
-        """Extract main content area."""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Try to find main content area
-        main_content = ""
-        for selector in ['main', '.main-content', '#main', '.content', 'article', 'body']:
-            element = soup.select_one(selector)
-            if element:
-                text = element.get_text(separator=' ', strip=True)
-                if len(text) > len(main_content):
-                    main_content = text
-        
-        # Limit content length
-        if len(main_content) > self.max_content_length:
-            main_content = main_content[:self.max_content_length] + "..."
+    def _download_html(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[Dict]:
+        """
+        Stream a page body, stopping at max_bytes or when the timeout budget is spent.
         
-        return main_content
-    
-    def _extract_product_listings(self, soup: BeautifulSoup) -> str:
-        """Extract product listing information."""
-        product_info = []
-        
-        # Look for product-related elements
-        for selector in ['.product', '.item', '[class*="product"]', '[class*="item"]']:
-            products = soup.select(selector)
-            for product in products[:10]:  # Limit to 10 products
-                # Get product title/name
-                title_elem = product.find(['h1', 'h2', 'h3', 'h4', '.title', '.name', 'a'])
-                if title_elem:
-                    title = title_elem.get_text(strip=True)
-                    if title and title not in product_info:
-                        product_info.append(title)
-        
-        return " | ".join(product_info[:20])  # Limit to 20 products
-    
-    def _extract_brand_mentions(self, soup: BeautifulSoup) -> str:
-        """Extract mentions of brands or brand-related content."""
-        brand_indicators = []
-        
-        # Look for "Brands" (plural) in navigation/links
-        for link in soup.find_all('a', href=True):
-            text = link.get_text(strip=True).lower()
-            href = link.get('href', '').lower()
-            
-            if any(keyword in text or keyword in href for keyword in ['brands', 'companies we carry', 'shop by brand', 'all brands']):
-                brand_indicators.append(link.get_text(strip=True))
-        
-        # Look for brand filter dropdowns
-        for select in soup.find_all('select'):
-            if 'brand' in select.get('name', '').lower() or 'brand' in select.get('id', '').lower():
-                options = [opt.get_text(strip=True) for opt in select.find_all('option')]
-                if len(options) > 1:  # Multiple brands
-                    brand_indicators.append(f"Brand filter with {len(options)} options")
-        
-        # Look for "Dealers", "Wholesale", etc. (negative indicators)
-        negative_indicators = []
-        for text in soup.stripped_strings:
-            text_lower = text.lower()
-            if any(keyword in text_lower for keyword in ['dealer sign up', 'become a distributor', 'where to buy', 'stockists', 'retail partners']):
-                negative_indicators.append(text[:100])  # First 100 chars
+        Non-HTML responses are rejected from their headers, before any body is read.
+        When validators from an earlier fetch are given, the request is conditional
+        (If-None-Match / If-Modified-Since) and a 304 reply returns without a body.
         
-        return {
-            'positive': " | ".join(brand_indicators[:10]),
-            'negative': " | ".join(negative_indicators[:10])
-        }
+        Args:
+            url: Website URL (with protocol)
+            etag: ETag from an earlier fetch of this page
+            last_modified: Last-Modified from an earlier fetch of this page
+        
+        Returns:
+            Dictionary with content (raw HTML bytes, possibly truncated at the cap;
+            None when not_modified), not_modified, etag and last_modified,
+            or None if the response is not HTML
+        """
+        headers = dict(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        response = self.session.get(
+            url,
+            headers=headers,
+            timeout=self.timeout,
+            allow_redirects=True,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+            
+            # Validators for the next conditional request (a 304 may omit them; keep the old ones)
+            download = {
+                'content': None,
+                'not_modified': response.status_code == 304,
+                'etag': response.headers.get('ETag') or etag,
+                'last_modified': response.headers.get('Last-Modified') or last_modified
+            }
+            if download['not_modified']:
+                return download
+            
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                logger.info(f"Skipping {url}: not HTML (Content-Type: {content_type})")
+                return None
+            
+            chunks = []
+            received = 0
+            deadline = time.monotonic() + self.timeout
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= self.max_bytes:
+                    logger.info(f"Stopped downloading {url} at {self.max_bytes} bytes")
+                    break
+                if time.monotonic() > deadline:
+                    logger.info(f"Stopped downloading {url} after {self.timeout}s ({received} bytes)")
+                    break
+            content = b''.join(chunks)[:self.max_bytes]
+            
+            # No Content-Type header: only accept bodies that look like markup
+            if not content_type and not content.lstrip()[:1] == b'<':
+                logger.info(f"Skipping {url}: response does not look like HTML")
+                return None
+            
+            download['content'] = content
+            return download
+        finally:
+            response.close()
     
-    def _extract_meta_description(self, soup: BeautifulSoup) -> str:
-        """Extract meta description."""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc:
-            return meta_desc.get('content', '')
-        return ""
+    def extract_content(self, html, url: str) -> Dict:
+        """
+        Parse HTML and extract all scraped_data fields in one pass over the document.
+        
+        Every parser backend drives the same PageExtractor, so the extracted
+        fields do not depend on which backend is configured.
+        
+        Args:
+            html: Raw HTML (bytes or str)
+            url: Page URL (stored in the result)
+        
+        Returns:
+            scraped_data dictionary (title, navigation, footer, main_content,
+            product_listings, brand_mentions, meta_description)
+        """
+        extractor = PageExtractor(max_content_length=self.max_content_length)
+        PARSER_BACKENDS[self.parser_backend](html, extractor)
+        return extractor.result(url)
     
     def format_scraped_content_for_ai(self, scraped_data: Dict) -> str:
         """
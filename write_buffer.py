@@ -0,0 +1,264 @@
+"""
+Write-Behind Buffer Module
+Collects Supabase inserts and updates for one table and writes them in
+batches from a background thread, so pipeline workers never wait on
+database latency.
+
+Rows get a client-generated UUID when they are queued, so callers still
+receive the record ID immediately and can update the row before it has
+been written (rows upserted on another unique column keep the ID the
+database has or assigns). Updates are coalesced per ID: an update to a row that is
+still waiting to be inserted is merged into the insert, and several
+updates to the same row become one write. Rows inserted on another unique
+column (on_conflict, e.g. company_key) are coalesced on that column too.
+
+A flush writes pending inserts first, as one upsert per conflict column and
+group of rows with the same columns, then pending updates, as one UPDATE per
+row (an update never creates a row, e.g. when the row's insert failed). The
+buffer flushes when SUPABASE_WRITE_BATCH_SIZE rows are pending, every
+SUPABASE_WRITE_FLUSH_SECONDS, and when close() is called at the end of a run
+(or at interpreter shutdown). A closed buffer writes every row inline.
+"""
+import atexit
+import logging
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from postgrest.types import ReturnMethod
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Batches inserts and updates for one Supabase table."""
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        batch_size: int = 100,
+        flush_seconds: float = 2.0,
+        depends_on: Optional["WriteBehindBuffer"] = None
+    ):
+        """
+        Initialize the buffer (the background thread starts with the first queued write).
+
+        Args:
+            client: Supabase client
+            table: Table name
+            batch_size: Pending rows that trigger a flush; 1 or less writes every row
+                        in the calling thread (no buffering)
+            flush_seconds: Maximum seconds a queued row waits before it is written
+            depends_on: Buffer whose rows this table references (foreign key); it is
+                        flushed first on every flush of this buffer
+        """
+        self.client = client
+        self.table = table
+        self.depends_on = depends_on
+        self.batch_size = max(1, int(batch_size or 1))
+        self.flush_seconds = max(0.1, float(flush_seconds or 0.1))
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self._inserts: Dict[str, Dict] = {}
+        self._updates: Dict[str, Dict] = {}
+        self._conflicts: Dict[str, str] = {}  # Conflict column of each pending insert (default "id")
+        self._insert_ids: Dict[tuple, str] = {}  # (conflict column, value) -> key of the pending insert
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps inserts ahead of their updates
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def insert(self, record: Dict, on_conflict: str = "id") -> Optional[str]:
+        """
+        Queue a row for insertion (an upsert: an existing row with the same
+        on_conflict value is updated instead).
+        
+        Rows upserted on a column other than id keep 'id' out of the payload
+        unless the caller sets it: ON CONFLICT DO UPDATE would otherwise replace
+        the existing row's primary key. The database assigns new rows their ID.
+        
+        Args:
+            record: Column values ('id' is generated when missing and on_conflict is "id")
+            on_conflict: Unique column the row is matched on
+        
+        Returns:
+            ID of the queued row (the pending row's ID when one with the same
+            on_conflict value is already queued), or None when the database assigns it
+        """
+        record = dict(record)
+        conflict_value = record.get(on_conflict)
+        if on_conflict == "id" or conflict_value is None:
+            record.setdefault('id', str(uuid.uuid4()))
+            conflict_value = record.get(on_conflict)
+        key = (on_conflict, conflict_value)
+        with self._lock:
+            pending_key = self._insert_ids.get(key)
+            if pending_key in self._inserts:
+                # Same row queued twice before a flush: one write, keeping the first ID
+                pending = self._inserts[pending_key]
+                if pending.get('id'):
+                    record['id'] = pending['id']
+                pending.update(record)
+            else:
+                pending_key = record.get('id') or f"{on_conflict}:{conflict_value}"
+                self._inserts[pending_key] = record
+                self._conflicts[pending_key] = on_conflict
+                if on_conflict != "id":
+                    self._insert_ids[key] = pending_key
+            record_id = self._inserts[pending_key].get('id')
+        self._written()
+        return record_id
+
+    def update(self, record_id: str, update_data: Dict):
+        """
+        Queue an update for a row (merged into its pending insert or earlier pending update).
+
+        Args:
+            record_id: ID of the row
+            update_data: Column values to set
+        """
+        with self._lock:
+            if record_id in self._inserts:
+                self._inserts[record_id].update(update_data)
+            else:
+                self._updates.setdefault(record_id, {}).update(update_data)
+        self._written()
+
+    def pending(self) -> int:
+        """Number of rows waiting to be written."""
+        with self._lock:
+            return len(self._inserts) + len(self._updates)
+
+    def flush(self) -> int:
+        """
+        Write every pending insert and update now.
+
+        Returns:
+            Number of rows written
+        """
+        if self.depends_on:
+            self.depends_on.flush()
+        with self._flush_lock:
+            with self._lock:
+                inserts = [(self._conflicts[record_id], row) for record_id, row in self._inserts.items()]
+                updates = list(self._updates.items())
+                self._inserts, self._updates, self._conflicts, self._insert_ids = {}, {}, {}, {}
+            if not inserts and not updates:
+                return 0
+
+            written = self._upsert(inserts) + self._update(updates)
+            self.flushes += 1
+            logger.debug(f"Flushed {written}/{len(inserts) + len(updates)} rows to {self.table}")
+            return written
+
+    def close(self):
+        """
+        Stop the background thread and write everything still pending.
+        
+        Later writes are still accepted and written inline.
+        """
+        self._closed = True
+        self._wake.set()
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_seconds + 30)
+        if thread:
+            atexit.unregister(self.close)
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """Rows written and failed, flushes made and rows still pending."""
+        return {
+            'rows_written': self.rows_written,
+            'rows_failed': self.rows_failed,
+            'flushes': self.flushes,
+            'pending': self.pending()
+        }
+
+    def _written(self):
+        """Flush inline when buffering is off, otherwise make sure the flusher runs."""
+        if self.batch_size <= 1 or self._closed:
+            self.flush()
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._closed:
+                    self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table}", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        if self.pending() >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        """Background thread: flush when the batch fills up or flush_seconds pass."""
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush to {self.table} failed: {e}")
+
+    def _upsert(self, rows: List[Tuple[str, Dict]]) -> int:
+        """
+        Upsert (conflict column, row) pairs grouped by conflict column and column set
+        (PostgREST bulk writes need the same keys in every row).
+
+        A group that fails is retried row by row, so one bad row does not lose the rest.
+
+        Returns:
+            Number of rows written
+        """
+        groups: Dict[tuple, List[Dict]] = {}
+        for on_conflict, row in rows:
+            groups.setdefault((on_conflict, tuple(sorted(row))), []).append(row)
+
+        written = 0
+        for (on_conflict, _), group in groups.items():
+            for start in range(0, len(group), self.batch_size):
+                batch = group[start:start + self.batch_size]
+                try:
+                    self._execute(batch, on_conflict)
+                    written += len(batch)
+                except Exception as e:
+                    logger.warning(f"Batch write of {len(batch)} rows to {self.table} failed ({e}); retrying row by row")
+                    for row in batch:
+                        try:
+                            self._execute([row], on_conflict)
+                            written += 1
+                        except Exception as row_error:
+                            self.rows_failed += 1
+                            logger.error(f"Error writing row {row.get(on_conflict)} to {self.table}: {row_error}")
+        self.rows_written += written
+        return written
+
+    def _update(self, updates: List[Tuple[str, Dict]]) -> int:
+        """
+        Send (record ID, changed columns) pairs as one UPDATE per row.
+        
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        for record_id, update_data in updates:
+            try:
+                self.client.table(self.table)\
+                    .update(update_data, returning=ReturnMethod.minimal)\
+                    .eq("id", record_id)\
+                    .execute()
+                written += 1
+            except Exception as e:
+                self.rows_failed += 1
+                logger.error(f"Error updating row {record_id} in {self.table}: {e}")
+        self.rows_written += written
+        return written
+
+    def _execute(self, rows: List[Dict], on_conflict: str):
+        """Send one upsert request for rows that share the same columns."""
+        self.client.table(self.table)\
+            .upsert(rows, on_conflict=on_conflict, returning=ReturnMethod.minimal)\
+            .execute()